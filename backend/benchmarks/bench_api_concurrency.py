@@ -0,0 +1,187 @@
+"""
+Benchmark de l'API sous charge mixte (débit et latence par type de requête)
+
+Des clients concurrents interrogent en boucle, pendant --duration secondes:
+- des agrégations lentes (statistiques du tableau de bord, scores de
+  réputation, recherche plein texte, solutions agrégées);
+- des lectures rapides (liste des entités, compteur d'alertes, dernières
+  mentions) et /health, qui ne touche pas la base: sa latence mesure
+  directement le blocage de la boucle d'événements.
+
+Sans --url, l'API est lancée dans le processus (uvicorn, un worker) sur une
+base SQLite temporaire remplie de --mentions mentions.
+
+Nécessite httpx (pip install -r requirements-dev.txt).
+
+Usage (depuis backend/): python benchmarks/bench_api_concurrency.py [--mentions 50000] [--duration 10]
+                         [--fast-clients 16] [--slow-clients 4] [--url http://localhost:8000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+# Ajouter le dossier backend au path Python
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+SLOW_PATHS = [
+    "/api/dashboard/stats",
+    "/api/dashboard/reputation-scores",
+    "/api/mentions/search?q=retard&limit=20",
+    "/api/insights/solutions",
+]
+FAST_PATHS = [
+    "/api/entities/",
+    "/api/alerts/active/count",
+    "/api/mentions/?limit=20",
+]
+HEALTH_PATH = "/health"
+
+CONTENTS = [
+    "Train en retard ce matin, aucune information en gare.",
+    "Le wifi ne marche pas et l'application plante au paiement.",
+    "Service client injoignable, je suis très déçu.",
+    "Billet trop cher pour un trajet aussi court.",
+    "Contrôleur très aimable, voyage parfait. Merci !",
+    "Battery drains fast and the camera app is slow.",
+]
+
+
+def seed_database(mentions: int):
+    """Remplir la base (vide) de mentions réparties sur 5 entités et 60 jours"""
+    from database import Base, SessionLocal, engine
+    from models import Entity, Mention, SentimentType, SourceType, ReasonType
+    from services.ingestion import on_mentions_ingested
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        entities = [Entity(name=f"Entité {index}", keywords='["bench"]') for index in range(5)]
+        db.add_all(entities)
+        db.flush()
+        random.seed(42)
+        now = datetime.utcnow()
+        for start in range(0, mentions, 5000):
+            batch = [
+                Mention(
+                    entity_id=random.choice(entities).id,
+                    content=f"{random.choice(CONTENTS)} #{start + index}",
+                    source=random.choice(list(SourceType)),
+                    sentiment=random.choice(list(SentimentType)),
+                    sentiment_score=random.uniform(-1, 1),
+                    reason=random.choice(list(ReasonType)),
+                    published_at=now - timedelta(minutes=random.randint(0, 60 * 24 * 60))
+                )
+                for index in range(min(5000, mentions - start))
+            ]
+            db.add_all(batch)
+            db.flush()
+            on_mentions_ingested(db, batch)
+            db.commit()
+    finally:
+        db.close()
+
+
+def start_server(port: int):
+    """Lancer l'API dans un thread (uvicorn, une boucle d'événements)"""
+    import uvicorn
+    from main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+async def client_loop(client: httpx.AsyncClient, group: str, paths: List[str], deadline: float, results: Dict):
+    index = random.randrange(len(paths))
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        start = time.perf_counter()
+        response = await client.get(path)
+        elapsed = time.perf_counter() - start
+        results[group].append(elapsed)
+        if response.status_code != 200:
+            results["errors"].append(f"{path}: {response.status_code}")
+
+
+async def run_load(url: str, duration: float, fast_clients: int, slow_clients: int) -> Dict[str, List[float]]:
+    results: Dict[str, List] = defaultdict(list)
+    limits = httpx.Limits(max_connections=fast_clients + slow_clients + 1)
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+        # Échauffement: caches, instantanés d'insights, plans de requêtes
+        for path in SLOW_PATHS + FAST_PATHS:
+            await client.get(path)
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            client_loop(client, "health", [HEALTH_PATH], deadline, results),
+            *(client_loop(client, "fast", FAST_PATHS, deadline, results) for _ in range(fast_clients)),
+            *(client_loop(client, "slow", SLOW_PATHS, deadline, results) for _ in range(slow_clients)),
+        )
+    return results
+
+
+def report(results: Dict[str, List[float]], duration: float):
+    print(f"{'requêtes':<10} {'nombre':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for group in ("slow", "fast", "health"):
+        latencies = sorted(results.get(group, []))
+        if not latencies:
+            continue
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(
+            f"{group:<10} {len(latencies):>8} {len(latencies) / duration:>9.1f} "
+            f"{1000 * statistics.median(latencies):>9.1f} {1000 * p95:>9.1f} {1000 * latencies[-1]:>9.1f}"
+        )
+    total = sum(len(results.get(group, [])) for group in ("slow", "fast", "health"))
+    print(f"Total: {total / duration:.1f} req/s")
+    if results.get("errors"):
+        print(f"Erreurs: {len(results['errors'])} (ex. {results['errors'][0]})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mentions", type=int, default=50000)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--fast-clients", type=int, default=16)
+    parser.add_argument("--slow-clients", type=int, default=4)
+    parser.add_argument("--url", default=None, help="API déjà lancée (sinon: serveur local sur une base temporaire)")
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        directory = tempfile.mkdtemp(prefix="bench-api-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{directory}/bench.db"
+        start = time.perf_counter()
+        seed_database(args.mentions)
+        print(f"Base: {args.mentions} mentions ({time.perf_counter() - start:.1f}s)")
+        server, thread = start_server(args.port)
+        url = f"http://127.0.0.1:{args.port}"
+
+    print(f"Charge: {args.slow_clients} clients lents, {args.fast_clients} clients rapides, 1 client /health, {args.duration:.0f}s")
+    try:
+        results = asyncio.run(run_load(url, args.duration, args.fast_clients, args.slow_clients))
+    finally:
+        if server is not None:
+            server.should_exit = True
+            thread.join()
+    report(results, args.duration)
+
+
+if __name__ == "__main__":
+    main()
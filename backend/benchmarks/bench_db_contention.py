@@ -0,0 +1,186 @@
+"""
+Benchmark de contention lecture / écriture par profil de moteur (DB_ENGINE_PROFILE)
+
+Pour chaque profil, pendant --duration secondes:
+- --writers threads insèrent des lots de --batch mentions et committent,
+  comme le collecteur;
+- --readers threads exécutent des requêtes du tableau de bord (répartition
+  par sentiment sur 7 jours, dernières mentions d'une entité).
+
+Mesure le débit et la latence des commits et des lectures, et les erreurs
+("database is locked", délai dépassé). Sans --url, chaque profil utilise
+une base SQLite temporaire remplie de --mentions mentions; avec --url
+(PostgreSQL), la même base est réutilisée (les mentions insérées y restent).
+
+Usage (depuis backend/): python benchmarks/bench_db_contention.py [--profiles none,balanced,throughput]
+                         [--mentions 50000] [--duration 10] [--writers 1] [--readers 8] [--batch 200]
+                         [--url postgresql://...]
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy import func, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+# Ajouter le dossier backend au path Python
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import Base, ENGINE_PROFILES, create_db_engine
+from models import Entity, Mention, SentimentType, SourceType
+from services.search import ensure_search_index
+
+CONTENTS = [
+    "Train en retard ce matin, aucune information en gare.",
+    "Le wifi ne marche pas et l'application plante au paiement.",
+    "Service client injoignable, je suis très déçu.",
+    "Contrôleur très aimable, voyage parfait. Merci !",
+]
+
+
+def mention_rows(entity_ids: List[int], count: int, offset: int) -> List[Dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "entity_id": random.choice(entity_ids),
+            "content": f"{random.choice(CONTENTS)} #{offset + index}",
+            "source": random.choice(list(SourceType)),
+            "sentiment": random.choice(list(SentimentType)),
+            "sentiment_score": random.uniform(-1, 1),
+            "published_at": now - timedelta(minutes=random.randint(0, 60 * 24 * 30)),
+        }
+        for index in range(count)
+    ]
+
+
+def prepare(Session, mentions: int) -> List[int]:
+    db = Session()
+    try:
+        entity_ids = [entity_id for (entity_id,) in db.query(Entity.id)]
+        if not entity_ids:
+            entities = [Entity(name=f"Entité {index}", keywords='["bench"]') for index in range(5)]
+            db.add_all(entities)
+            db.flush()
+            entity_ids = [entity.id for entity in entities]
+        existing = db.query(func.count(Mention.id)).scalar()
+        for start in range(existing, mentions, 5000):
+            db.execute(insert(Mention), mention_rows(entity_ids, min(5000, mentions - start), start))
+        db.commit()
+        return entity_ids
+    finally:
+        db.close()
+
+
+def writer(Session, entity_ids: List[int], batch: int, deadline: float, results: Dict):
+    offset = 10_000_000 + threading.get_ident() % 1000 * 1_000_000
+    while time.perf_counter() < deadline:
+        db = Session()
+        start = time.perf_counter()
+        try:
+            db.execute(insert(Mention), mention_rows(entity_ids, batch, offset))
+            db.commit()
+            results["write"].append(time.perf_counter() - start)
+        except OperationalError as exc:
+            db.rollback()
+            results["write_errors"].append(str(exc.orig))
+        finally:
+            db.close()
+        offset += batch
+
+
+def reader(Session, entity_ids: List[int], deadline: float, results: Dict):
+    while time.perf_counter() < deadline:
+        entity_id = random.choice(entity_ids)
+        db = Session()
+        start = time.perf_counter()
+        try:
+            db.query(Mention.sentiment, func.count(Mention.id)).filter(
+                Mention.entity_id == entity_id,
+                Mention.published_at >= datetime.utcnow() - timedelta(days=7)
+            ).group_by(Mention.sentiment).all()
+            db.query(Mention).filter(Mention.entity_id == entity_id).order_by(
+                Mention.published_at.desc()
+            ).limit(20).all()
+            results["read"].append(time.perf_counter() - start)
+        except OperationalError as exc:
+            db.rollback()
+            results["read_errors"].append(str(exc.orig))
+        finally:
+            db.close()
+
+
+def run_profile(url: str, profile: str, args) -> Dict[str, List]:
+    engine = create_db_engine(url, profile)
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    random.seed(42)
+    entity_ids = prepare(Session, args.mentions)
+
+    results: Dict[str, List] = defaultdict(list)
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=writer, args=(Session, entity_ids, args.batch, deadline, results))
+        for _ in range(args.writers)
+    ] + [
+        threading.Thread(target=reader, args=(Session, entity_ids, deadline, results))
+        for _ in range(args.readers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    return results
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profiles", default="none,balanced,throughput")
+    parser.add_argument("--mentions", type=int, default=50000)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--writers", type=int, default=1)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--url", default=None, help="Base à utiliser (sinon: une base SQLite temporaire par profil)")
+    args = parser.parse_args()
+
+    profiles = [profile.strip() for profile in args.profiles.split(",") if profile.strip()]
+    unknown = [profile for profile in profiles if profile not in ENGINE_PROFILES]
+    if unknown:
+        parser.error(f"profils inconnus: {', '.join(unknown)} (disponibles: {', '.join(ENGINE_PROFILES)})")
+
+    print(f"Charge: {args.writers} écrivain(s) (lots de {args.batch}), {args.readers} lecteurs, {args.duration:.0f}s")
+    print(f"{'profil':<12} {'commits/s':>10} {'écr. p95':>9} {'lect./s':>9} {'lect. p50':>10} {'lect. p95':>10} {'lect. max':>10} {'erreurs':>8}")
+    for profile in profiles:
+        url = args.url or f"sqlite:///{tempfile.mkdtemp(prefix='bench-db-')}/bench.db"
+        results = run_profile(url, profile, args)
+        writes, reads = sorted(results["write"]), sorted(results["read"])
+        errors = len(results["write_errors"]) + len(results["read_errors"])
+        print(
+            f"{profile:<12} {len(writes) / args.duration:>10.1f} "
+            f"{1000 * percentile(writes, 0.95) if writes else 0:>8.1f}ms "
+            f"{len(reads) / args.duration:>9.1f} "
+            f"{1000 * statistics.median(reads) if reads else 0:>8.1f}ms "
+            f"{1000 * percentile(reads, 0.95) if reads else 0:>8.1f}ms "
+            f"{1000 * reads[-1] if reads else 0:>8.1f}ms {errors:>8}"
+        )
+        for error in (results["write_errors"] + results["read_errors"])[:1]:
+            print(f"  ex. erreur: {error}")
+
+
+if __name__ == "__main__":
+    main()
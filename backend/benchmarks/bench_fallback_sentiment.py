@@ -0,0 +1,128 @@
+"""
+Benchmark de l'analyse de sentiment de repli (débit en documents/seconde)
+
+Compare l'ancienne implémentation (listes reconstruites à chaque appel et
+recherche de sous-chaînes) à l'analyse actuelle (KeywordMatcher), puis, par
+taille de lexique, trois recherches de mots-clés: sous-chaînes (sans bornes de
+mots, résultats différents), bornes vérifiées mot-clé par mot-clé (mêmes
+résultats que KeywordMatcher) et KeywordMatcher (expression unique en trie).
+Rapport > 1: KeywordMatcher plus rapide. Sur le lexique de sentiment livré
+(~25 mots), il est plus lent que les sous-chaînes: le gain n'apparaît qu'à
+partir d'environ 50 mots-clés.
+
+Usage (depuis backend/): python benchmarks/bench_fallback_sentiment.py [--docs 20000]
+"""
+import argparse
+import csv
+import io
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+# Ajouter le dossier backend au path Python
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from import_oneplus_reviews import RAW_CSV
+from import_sample_companies import SAMPLE_DATA
+from models import SentimentType
+from services.keyword_matcher import DEFAULT_INFLECTION, KeywordMatcher, normalize_text
+from services.reason_classifier import REASON_KEYWORDS
+from services.sentiment_analyzer import SentimentAnalyzer, POSITIVE_WORDS, NEGATIVE_WORDS
+
+
+def legacy_fallback_analysis(text: str) -> Dict:
+    """Implémentation précédente de _fallback_analysis (référence)"""
+    text_lower = text.lower()
+    positive_words = ["excellent", "super", "génial", "merci", "bravo", "félicitations",
+                      "parfait", "top", "recommandé", "satisfait", "content", "heureux"]
+    negative_words = ["mauvais", "nul", "déçu", "problème", "erreur", "bug", "lent",
+                      "cher", "inutile", "décevant", "horrible", "catastrophe", "scandale"]
+    positive_count = sum(1 for word in positive_words if word in text_lower)
+    negative_count = sum(1 for word in negative_words if word in text_lower)
+    if positive_count > negative_count:
+        sentiment, score = SentimentType.POSITIVE, min(0.7, 0.3 + (positive_count * 0.1))
+    elif negative_count > positive_count:
+        sentiment, score = SentimentType.NEGATIVE, max(-0.7, -0.3 - (negative_count * 0.1))
+    else:
+        sentiment, score = SentimentType.NEUTRAL, 0.0
+    return {
+        "sentiment": sentiment,
+        "score": score,
+        "confidence": {"positive": 0.5, "neutral": 0.5, "negative": 0.5}
+    }
+
+
+def load_corpus(size: int):
+    texts = [row["Review-Body"] for row in csv.DictReader(io.StringIO(RAW_CSV)) if row.get("Review-Body")]
+    texts += [review["content"] for company in SAMPLE_DATA.values() for review in company["reviews"]]
+    texts += [
+        "Service client nul, je suis très déçu. Problème de remboursement.",
+        "Je cherche encore le bouton stop, l'application est lente.",
+        "Super expérience, personnel parfait et train à l'heure. Merci !",
+    ]
+    return (texts * (size // len(texts) + 1))[:size]
+
+
+def bench(label: str, func, corpus, repeat: int = 3):
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(corpus)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    print(f"{label:<32} {len(corpus) / elapsed:>12,.0f} docs/s  ({elapsed:.3f}s)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=20000)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.docs)
+    analyzer = SentimentAnalyzer()
+    analyzer.client = None  # Forcer l'analyse de repli
+
+    print(f"Corpus: {len(corpus)} documents")
+    legacy = bench("legacy (substring scan)", lambda texts: [legacy_fallback_analysis(t) for t in texts], corpus)
+    single = bench("compiled (_fallback_analysis)", lambda texts: [analyzer._fallback_analysis(t) for t in texts], corpus)
+    batch = bench("compiled (fallback_batch)", analyzer.fallback_batch, corpus)
+    print(f"Rapport: x{legacy / single:.2f} (single), x{legacy / batch:.2f} (batch)")
+
+    changed = sum(
+        1 for text in corpus[:len(set(corpus))]
+        if legacy_fallback_analysis(text)["sentiment"] != analyzer._fallback_analysis(text)["sentiment"]
+    )
+    print(f"Documents classés différemment (correspondance par mots entiers): {changed}")
+
+    # Passage à l'échelle: lexique de repli étendu aux mots-clés de raisons
+    keywords = POSITIVE_WORDS + NEGATIVE_WORDS + [k for words in REASON_KEYWORDS.values() for k in words]
+    normalized = [normalize_text(text) for text in corpus]
+    print("\nPar taille de lexique (textes déjà normalisés):")
+    for size in (10, 25, 50, 100, len(keywords)):
+        vocabulary = keywords[:size]
+        matcher = KeywordMatcher({"keyword": vocabulary})
+        word_patterns = {
+            keyword: re.compile(rf"(?<!\w){re.escape(keyword)}{DEFAULT_INFLECTION}(?!\w)")
+            for keyword in matcher.keywords
+        }
+        print(f"{size} mots-clés")
+        substring = bench(
+            "  substring scan",
+            lambda texts: [[keyword for keyword in vocabulary if keyword in text] for text in texts],
+            normalized
+        )
+        bounded = bench(
+            "  word-bounded scan",
+            lambda texts: [
+                [keyword for keyword, pattern in word_patterns.items() if keyword in text and pattern.search(text)]
+                for text in texts
+            ],
+            normalized
+        )
+        compiled = bench("  KeywordMatcher", lambda texts: [matcher.find(text) for text in texts], normalized)
+        print(f"  Rapport: x{substring / compiled:.2f} (sous-chaînes), x{bounded / compiled:.2f} (bornes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark du modèle de sentiment local: précision (validation croisée) et débit
+
+Compare la précision du modèle local seul, de l'analyse par mots-clés et du
+backend local (mots-clés, puis modèle pour les textes restés neutres) sur les
+données annotées du dépôt, puis mesure le débit de prédiction par lots.
+
+Usage (depuis backend/): python benchmarks/bench_local_sentiment.py [--docs 50000] [--folds 5]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Ajouter le dossier backend au path Python
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.language_detector import detect_language
+from services.local_sentiment_model import LocalSentimentModel, get_local_model
+from services.sentiment_analyzer import SentimentAnalyzer
+from train_sentiment_model import build_training_set
+
+
+def accuracy(predicted, expected) -> float:
+    return sum(1 for p, e in zip(predicted, expected) if p == e) / max(len(expected), 1)
+
+
+def cross_validate(texts, labels, folds: int):
+    """Précision moyenne du modèle local, du lexique et du backend local sur des plis de validation"""
+    indices = list(range(len(texts)))
+    random.Random(42).shuffle(indices)
+    lexicon = SentimentAnalyzer(backend="lexicon")
+    combined = SentimentAnalyzer(backend="lexicon")
+    model_scores, lexicon_scores, combined_scores = [], [], []
+    for fold in range(folds):
+        held_out = set(indices[fold::folds])
+        train = [i for i in indices if i not in held_out]
+        test = sorted(held_out)
+        model = LocalSentimentModel().fit([texts[i] for i in train], [labels[i] for i in train])
+        expected = [labels[i] for i in test]
+        model_scores.append(accuracy([r["sentiment"] for r in model.predict([texts[i] for i in test])], expected))
+        lexicon_scores.append(accuracy(
+            [lexicon._fallback_analysis(texts[i], detect_language(texts[i]))["sentiment"] for i in test],
+            expected
+        ))
+        # Backend local avec le modèle du pli
+        combined.local_model = model
+        combined_scores.append(accuracy(
+            [combined._offline_batch([texts[i]], detect_language(texts[i]))[0]["sentiment"] for i in test],
+            expected
+        ))
+    return sum(model_scores) / folds, sum(lexicon_scores) / folds, sum(combined_scores) / folds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    texts, labels = build_training_set()
+    model_accuracy, lexicon_accuracy, combined_accuracy = cross_validate(texts, labels, args.folds)
+    print(f"Données annotées: {len(texts)} textes, validation croisée {args.folds} plis")
+    print(f"  précision modèle local seul : {model_accuracy:.1%}")
+    print(f"  précision lexique           : {lexicon_accuracy:.1%}")
+    print(f"  précision backend local     : {combined_accuracy:.1%}")
+
+    model = get_local_model()
+    corpus = (texts * (args.docs // len(texts) + 1))[:args.docs]
+    start = time.perf_counter()
+    for i in range(0, len(corpus), args.batch_size):
+        model.predict(corpus[i:i + args.batch_size])
+    elapsed = time.perf_counter() - start
+    print(f"Débit ({args.batch_size} docs/lot): {len(corpus) / elapsed:,.0f} docs/s ({elapsed:.2f}s pour {len(corpus)} docs)")
+
+
+if __name__ == "__main__":
+    main()
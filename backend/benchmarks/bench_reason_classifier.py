@@ -0,0 +1,77 @@
+"""
+Benchmark du classifieur de raisons (débit en documents/seconde)
+
+Compare l'ancienne implémentation de determine_reason (première catégorie du
+dictionnaire ayant une sous-chaîne présente) à l'automate compilé, qui classe
+toutes les catégories en un seul passage.
+
+Usage (depuis backend/): python benchmarks/bench_reason_classifier.py [--docs 20000]
+"""
+import argparse
+import sys
+from collections import Counter
+from pathlib import Path
+
+# Ajouter le dossier backend au path Python
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_fallback_sentiment import bench, load_corpus
+from models import ReasonType
+from services.reason_classifier import (
+    REASON_KEYWORDS, classify_reasons, classify_reasons_batch, determine_reason
+)
+
+
+def legacy_determine_reason(content: str) -> ReasonType:
+    """Implémentation précédente de determine_reason (référence)"""
+    text = content.lower()
+    for reason_type, keywords in REASON_KEYWORDS.items():
+        if any(keyword in text for keyword in keywords):
+            return reason_type
+    return ReasonType.OTHER
+
+
+def legacy_all_reasons(content: str):
+    """Équivalent naïf du multi-étiquettes: un balayage par catégorie et par mot-clé"""
+    text = content.lower()
+    return {
+        reason_type: sum(text.count(keyword) for keyword in keywords)
+        for reason_type, keywords in REASON_KEYWORDS.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=20000)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.docs)
+    keywords = sum(len(words) for words in REASON_KEYWORDS.values())
+    print(f"Corpus: {len(corpus)} documents, {len(REASON_KEYWORDS)} catégories, {keywords} mots-clés")
+
+    print("\nRaison principale (top-1)")
+    legacy = bench("legacy (first substring hit)", lambda texts: [legacy_determine_reason(t) for t in texts], corpus)
+    compiled = bench("compiled (determine_reason)", lambda texts: [determine_reason(t) for t in texts], corpus)
+    print(f"Speed-up: x{legacy / compiled:.2f}")
+
+    print("\nToutes les catégories avec nombre d'occurrences")
+    legacy = bench("legacy (per-category scan)", lambda texts: [legacy_all_reasons(t) for t in texts], corpus)
+    single = bench("compiled (classify_reasons)", lambda texts: [classify_reasons(t) for t in texts], corpus)
+    batch = bench("compiled (classify_reasons_batch)", classify_reasons_batch, corpus)
+    print(f"Speed-up: x{legacy / single:.2f} (single), x{legacy / batch:.2f} (batch)")
+
+    unique = list(dict.fromkeys(corpus))
+    changes = Counter(
+        (legacy_determine_reason(text).value, determine_reason(text)[0].value)
+        for text in unique
+        if legacy_determine_reason(text) != determine_reason(text)[0]
+    )
+    print(f"\nRaison principale modifiée: {sum(changes.values())}/{len(unique)} documents uniques")
+    for (before, after), count in changes.most_common(8):
+        print(f"  {before:>16} -> {after:<16} {count}")
+    multi = sum(1 for text in unique if len(classify_reasons(text)) > 1)
+    print(f"Documents avec plusieurs catégories: {multi}/{len(unique)}")
+
+
+if __name__ == "__main__":
+    main()
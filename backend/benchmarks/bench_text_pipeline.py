@@ -0,0 +1,77 @@
+"""
+Benchmark du pipeline de texte partagé (temps CPU par mention)
+
+Compare, pour chaque mention, les analyses lexicales faites chacune de leur
+côté (un passage par matcher: langue, sentiment de repli, raisons, alerte,
+aspects, solution) au pipeline partagé: une normalisation et un passage du
+matcher unique du pack, dont le résultat est réutilisé par tous.
+
+Les contenus sont rendus uniques (suffixe numéroté) et le cache du pipeline
+est vidé avant chaque mesure: seul le gain du passage unique est mesuré.
+
+Usage (depuis backend/): python benchmarks/bench_text_pipeline.py [--docs 20000]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Ajouter le dossier backend au path Python
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_fallback_sentiment import bench, load_corpus
+from models import Mention, SentimentType, SourceType
+from services.alert_service import AlertService
+from services.aspect_extractor import extract_aspects
+from services.keyword_packs import DEFAULT_PACK, get_pack
+from services.language_detector import detect_language
+from services.reason_classifier import classify_reasons
+from services.sentiment_analyzer import SentimentAnalyzer
+from services.solution_generator import SolutionGenerator
+
+
+def analyze_mentions(texts, analyzer: SentimentAnalyzer, pack=None):
+    """Toutes les analyses lexicales d'une mention (pack=None: matchers séparés)"""
+    if pack is not None:
+        pack.pipeline.analyze.cache_clear()
+    for text in texts:
+        if pack is not None:
+            language = detect_language(text, tokens=pack.pipeline.analyze(text).tokens)
+        else:
+            language = detect_language(text)
+        analysis = analyzer._fallback_analysis(text, language, pack)
+        classify_reasons(text, pack)
+        mention = Mention(
+            content=text,
+            source=SourceType.WEB,
+            sentiment=analysis["sentiment"],
+            sentiment_score=analysis["score"]
+        )
+        AlertService.evaluate(mention, pack)
+        extract_aspects(text, language, analysis["sentiment"], pack)
+        SolutionGenerator.generate_solution(mention, pack)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=20000)
+    args = parser.parse_args()
+
+    corpus = [f"{text} #{index}" for index, text in enumerate(load_corpus(args.docs))]
+    analyzer = SentimentAnalyzer()
+    transport = get_pack("transport")
+    print(f"Corpus: {len(corpus)} documents, {len(DEFAULT_PACK.pipeline.matcher.keywords)} mots-clés (pack default)")
+
+    separate = bench("separate matchers", lambda texts: analyze_mentions(texts, analyzer), corpus)
+    shared = bench("shared pipeline (default)", lambda texts: analyze_mentions(texts, analyzer, DEFAULT_PACK), corpus)
+    bench("shared pipeline (transport)", lambda texts: analyze_mentions(texts, analyzer, transport), corpus)
+    print(f"Speed-up: x{separate / shared:.2f}")
+    print(f"CPU par mention: {1e6 * separate / len(corpus):.0f} us -> {1e6 * shared / len(corpus):.0f} us")
+
+    single = bench("pipeline pass only", lambda texts: (
+        DEFAULT_PACK.pipeline.analyze.cache_clear(), DEFAULT_PACK.pipeline.analyze_batch(texts)
+    ), corpus)
+    print(f"Part du passage unique: {100 * single / shared:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
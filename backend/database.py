@@ -1,14 +1,65 @@
 """
 Configuration de la base de données
+
+Le moteur est créé avec un profil de réglages (DB_ENGINE_PROFILE, voir
+ENGINE_PROFILES): PRAGMA appliqués à chaque connexion SQLite (journal WAL:
+les lectures du tableau de bord ne sont plus bloquées par les écritures du
+collecteur), pool de connexions et délai maximal des requêtes pour PostgreSQL.
+Quel que soit le profil, le pool peut s'étendre (max_overflow) jusqu'à
+SESSIONS_PER_REQUEST connexions par thread du pool de l'API
+(API_THREADPOOL_SIZE): une requête n'attend pas une connexion libre.
+
+Les lectures analytiques (tableau de bord, insights, listes) passent par
+get_read_db: réplique en lecture seule si DATABASE_READ_URL est défini,
+base principale sinon, ou si la réplique est injoignable ou en retard de plus
+de READ_REPLICA_MAX_LAG secondes, ou si le client a écrit dans ce délai
+(cookie posé par PrimaryReadsMiddleware): il relit alors ses propres écritures.
 """
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Profils de moteur: PRAGMA SQLite, options du pool et statement_timeout (ms) PostgreSQL
+ENGINE_PROFILES = {
+    # Réglages par défaut de SQLAlchemy et du pilote (journal rollback, pool 5 + 10),
+    # hormis les clés étrangères SQLite et l'extension du pool, toujours appliquées
+    "none": {},
+    # Serveur d'API et collecteur sur la même base
+    "balanced": {
+        "sqlite": {"journal_mode": "WAL", "synchronous": "NORMAL", "mmap_size": 256 * 1024 * 1024, "cache_size": -64000},
+        "postgresql": {"pool_size": 10, "max_overflow": 20, "pool_recycle": 1800, "pool_timeout": 30, "statement_timeout": 30000},
+    },
+    # Forte concurrence (API_THREADPOOL_SIZE élevé, plusieurs workers de réanalyse)
+    "throughput": {
+        "sqlite": {"journal_mode": "WAL", "synchronous": "NORMAL", "mmap_size": 1024 * 1024 * 1024, "cache_size": -256000},
+        "postgresql": {"pool_size": 20, "max_overflow": 40, "pool_recycle": 1800, "pool_timeout": 10, "statement_timeout": 15000},
+    },
+    # Fonctions serverless (Vercel): peu de connexions par instance, vite recyclées
+    "serverless": {
+        "sqlite": {"journal_mode": "WAL", "synchronous": "NORMAL", "cache_size": -16000},
+        "postgresql": {"pool_size": 1, "max_overflow": 2, "pool_recycle": 300, "pool_timeout": 10, "statement_timeout": 10000},
+    },
+}
+DEFAULT_ENGINE_PROFILE = "balanced"
+DB_ENGINE_PROFILE = os.getenv("DB_ENGINE_PROFILE", DEFAULT_ENGINE_PROFILE)
+
+# Nombre de requêtes API interrogeant la base traitées simultanément (pool de threads, main.py)
+API_THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", 40))
+# Connexions tenues au plus par une requête: get_db et get_read_db (base principale sans réplique)
+SESSIONS_PER_REQUEST = 2
+# Taille par défaut du pool SQLAlchemy (QueuePool)
+_DEFAULT_POOL = {"pool_size": 5, "max_overflow": 10}
+
 # Vercel Postgres utilise POSTGRES_URL, convertir en DATABASE_URL si nécessaire
 postgres_url = os.getenv("POSTGRES_URL")
 if postgres_url:
@@ -26,14 +77,84 @@ if DATABASE_URL and not DATABASE_URL.startswith("sqlite://") and not DATABASE_UR
     # Si ce n'est pas un format valide, utiliser la valeur par défaut
     DATABASE_URL = "sqlite:///./reputation.db"
 
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL, connect_args={"check_same_thread": False}
-    )
-else:
-    engine = create_engine(DATABASE_URL)
+# Réplique en lecture (optionnelle) et retard toléré, en secondes
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+if DATABASE_READ_URL and DATABASE_READ_URL.startswith("postgres://"):
+    DATABASE_READ_URL = DATABASE_READ_URL.replace("postgres://", "postgresql://", 1)
+READ_REPLICA_MAX_LAG = float(os.getenv("READ_REPLICA_MAX_LAG", 5))
+# Intervalle minimal entre deux mesures du retard de la réplique (secondes)
+READ_REPLICA_CHECK_INTERVAL = float(os.getenv("READ_REPLICA_CHECK_INTERVAL", 5))
+
+
+def _sqlite_pragmas(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+    return set_pragmas
+
+
+def _postgres_statement_timeout(timeout_ms):
+    def set_statement_timeout(dbapi_connection, connection_record):
+        # Hors transaction: le rollback de remise au pool n'annule pas le SET
+        autocommit = dbapi_connection.autocommit
+        dbapi_connection.autocommit = True
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET statement_timeout = {int(timeout_ms)}")
+        cursor.close()
+        dbapi_connection.autocommit = autocommit
+    return set_statement_timeout
+
+
+def _pool_options(options, concurrency):
+    """
+    Options du pool: taille du profil, débordement porté si besoin à
+    SESSIONS_PER_REQUEST connexions par requête concurrente (ouvertes à la demande)
+    """
+    pool_size = options.get("pool_size", _DEFAULT_POOL["pool_size"])
+    max_overflow = options.get("max_overflow", _DEFAULT_POOL["max_overflow"])
+    options["pool_size"] = pool_size
+    options["max_overflow"] = max(max_overflow, SESSIONS_PER_REQUEST * concurrency - pool_size)
+    return options
+
+
+def create_db_engine(url, profile=DB_ENGINE_PROFILE, concurrency=API_THREADPOOL_SIZE):
+    """
+    Moteur SQLAlchemy pour une URL, configuré selon un profil de ENGINE_PROFILES,
+    avec un pool dimensionné pour `concurrency` requêtes simultanées
+    """
+    if profile not in ENGINE_PROFILES:
+        logger.warning(f"Unknown DB_ENGINE_PROFILE {profile!r}, using {DEFAULT_ENGINE_PROFILE!r}")
+        profile = DEFAULT_ENGINE_PROFILE
+
+    if url.startswith("sqlite"):
+        # Clés étrangères (ON DELETE CASCADE) appliquées quel que soit le profil:
+        # SQLite ne les vérifie que si chaque connexion les active
+        pragmas = {"foreign_keys": "ON", **ENGINE_PROFILES[profile].get("sqlite", {})}
+        # Base en mémoire: une connexion par thread (SingletonThreadPool), sans options de pool
+        pool_options = {} if url in ("sqlite://", "sqlite:///:memory:") else _pool_options({}, concurrency)
+        db_engine = create_engine(url, connect_args={"check_same_thread": False}, **pool_options)
+        event.listen(db_engine, "connect", _sqlite_pragmas(pragmas))
+        return db_engine
+
+    options = dict(ENGINE_PROFILES[profile].get("postgresql", {}))
+    statement_timeout = options.pop("statement_timeout", None)
+    if options:
+        # Connexions coupées (redémarrage, pare-feu) détectées avant usage
+        options["pool_pre_ping"] = True
+    db_engine = create_engine(url, **_pool_options(options, concurrency))
+    if statement_timeout:
+        event.listen(db_engine, "connect", _postgres_statement_timeout(statement_timeout))
+    return db_engine
+
+
+engine = create_db_engine(DATABASE_URL)
+read_engine = create_db_engine(DATABASE_READ_URL) if DATABASE_READ_URL else engine
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Sessions de lecture: liées à la réplique ou, à défaut, à la base principale
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 def get_db():
@@ -43,3 +164,118 @@ def get_db():
     finally:
         db.close()
 
+
+@event.listens_for(ReadSessionLocal, "before_flush")
+def _refuse_read_session_writes(session, flush_context, instances):
+    raise RuntimeError("Read-only session: writes must use get_db (primary database)")
+
+
+class ReplicaMonitor:
+    """Disponibilité et retard d'une réplique, mesurés au plus tous les `interval` secondes"""
+
+    def __init__(self, replica_engine, max_lag: float = READ_REPLICA_MAX_LAG, interval: float = READ_REPLICA_CHECK_INTERVAL):
+        self.engine = replica_engine
+        self.max_lag = max_lag
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self._usable = True
+
+    def _lag(self):
+        """Retard de réplication en secondes (None si inconnu: réplique sans réplication mesurable)"""
+        with self.engine.connect() as connection:
+            if self.engine.dialect.name != "postgresql":
+                connection.execute(text("SELECT 1"))
+                return None
+            # Réplique à jour (tout le WAL reçu est rejoué): pas de retard, même sans écriture récente
+            return connection.execute(text(
+                "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+            )).scalar()
+
+    def usable(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self.interval:
+                return self._usable
+            # Une seule mesure à la fois: les autres requêtes gardent le dernier résultat
+            self._checked_at = now
+        try:
+            lag = self._lag()
+            usable = lag is None or float(lag) <= self.max_lag
+            if not usable:
+                logger.warning(f"Read replica lagging {float(lag):.1f}s, reading from primary")
+        except Exception as exc:
+            usable = False
+            logger.warning(f"Read replica unavailable, reading from primary: {exc}")
+        self._usable = usable
+        return usable
+
+
+replica_monitor = ReplicaMonitor(read_engine) if read_engine is not engine else None
+
+# Écriture récente du client: ses lectures restent sur la base principale jusqu'à cette date (epoch)
+PRIMARY_READS_COOKIE = "db_primary_until"
+# En-tête pour forcer une lecture sur la base principale (clients sans cookie)
+PRIMARY_READS_HEADER = "x-read-primary"
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def _reads_primary(request) -> bool:
+    if replica_monitor is None:
+        return True
+    if request.headers.get(PRIMARY_READS_HEADER):
+        return True
+    try:
+        if float(request.cookies.get(PRIMARY_READS_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    return not replica_monitor.usable()
+
+
+def get_read_db(request: Request):
+    """Session de lecture seule: réplique si configurée et assez à jour, base principale sinon"""
+    db = ReadSessionLocal(bind=engine if _reads_primary(request) else read_engine)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class PrimaryReadsMiddleware:
+    """
+    Après une requête d'écriture réussie, pose un cookie qui garde les lectures
+    du client sur la base principale pendant READ_REPLICA_MAX_LAG secondes
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in _SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = (
+                    f"{PRIMARY_READS_COOKIE}={time.time() + READ_REPLICA_MAX_LAG:.3f}; "
+                    f"Max-Age={int(READ_REPLICA_MAX_LAG) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+def dialect_insert(db, table):
+    """
+    Instruction INSERT propre au dialecte de la session
+    (expose on_conflict_do_nothing / on_conflict_do_update pour SQLite et PostgreSQL)
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
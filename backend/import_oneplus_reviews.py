@@ -8,6 +8,9 @@ import random
 
 from database import engine, Base, SessionLocal
 from models import Entity, Mention, SentimentType, SourceType, Alert
+from services.entity_data import purge_entity
+from services.incidents import insert_alerts
+from services.ingestion import on_mentions_ingested
 from services.reason_classifier import determine_reason
 from services.sentiment_analyzer import SentimentAnalyzer
 
@@ -116,9 +119,7 @@ def import_reviews():
         existing = db.query(Entity).filter(Entity.name == "OnePlus Nord CE 2 5G").first()
         if existing:
             print("Suppression des anciennes données OnePlus...")
-            db.query(Mention).filter(Mention.entity_id == existing.id).delete()
-            db.query(Alert).filter(Alert.mention_id == None).delete()
-            db.delete(existing)
+            purge_entity(db, existing.id)
             db.commit()
 
         print("Création de l'entité OnePlus...")
@@ -136,6 +137,8 @@ def import_reviews():
         base_date = datetime.utcnow()
         mention_count = 0
         alert_count = 0
+        mentions = []
+        alerts = []
 
         for index, row in enumerate(reader, start=1):
             rating_str = row.get("rating", "").strip()
@@ -169,17 +172,21 @@ def import_reviews():
             )
             db.add(mention)
             db.flush()
+            mentions.append(mention)
             mention_count += 1
 
             if sentiment == SentimentType.NEGATIVE and score < -0.5:
-                alert = Alert(
-                    mention_id=mention.id,
-                    severity="high" if score < -0.7 else "medium",
-                    message=f"Alerte avis négatif ({reason_enum.value})",
-                )
-                db.add(alert)
+                alerts.append({
+                    "mention_id": mention.id,
+                    "entity_id": mention.entity_id,
+                    "reason": reason_enum,
+                    "severity": "high" if score < -0.7 else "medium",
+                    "message": f"Alerte avis négatif ({reason_enum.value})",
+                })
                 alert_count += 1
 
+        on_mentions_ingested(db, mentions)
+        insert_alerts(db, alerts)
         db.commit()
         print(f"✓ Import terminé : {mention_count} avis insérés, {alert_count} alertes créées.")
 
@@ -8,8 +8,8 @@ import random
 from database import engine, Base, SessionLocal
 from models import Entity, Mention, Alert, SentimentType, SourceType, ReasonType
 from services.sentiment_analyzer import SentimentAnalyzer
-from services.reason_classifier import determine_reason
-from services.alert_service import AlertService
+from services.analysis_cache import analyze_contents
+from services.ingestion import on_mentions_ingested
 
 # Données d'exemple pour différentes entreprises
 SAMPLE_DATA = {
@@ -128,7 +128,6 @@ def import_sample_companies():
     Base.metadata.create_all(bind=engine)
     db = SessionLocal()
     sentiment_analyzer = SentimentAnalyzer()
-    alert_service = AlertService(db)
     
     try:
         base_date = datetime.utcnow()
@@ -153,8 +152,15 @@ def import_sample_companies():
             db.refresh(entity)
             print(f"✓ Created entity: {company_name}")
             
+            # Analyser sentiment et raison de tous les avis de l'entreprise en un seul batch
+            analyses = analyze_contents(
+                [review["content"] for review in company_data["reviews"]],
+                db=db,
+                analyzer=sentiment_analyzer
+            )
+            
             # Ajouter les mentions
-            for review in company_data["reviews"]:
+            for review, analysis in zip(company_data["reviews"], analyses):
                 # Déterminer le sentiment basé sur la note
                 rating = review["rating"]
                 if rating >= 4.5:
@@ -170,12 +176,6 @@ def import_sample_companies():
                     sentiment = SentimentType.NEGATIVE
                     sentiment_score = -0.7 - (2.5 - rating) * 0.3
                 
-                # Analyser le sentiment avec l'analyseur
-                analysis = sentiment_analyzer.analyze_sentiment(review["content"])
-                
-                # Déterminer la raison
-                reason_enum, reason_detail = determine_reason(review["content"])
-                
                 # Date aléatoire dans les 30 derniers jours
                 days_ago = random.randint(0, 30)
                 published_at = base_date - timedelta(
@@ -192,17 +192,16 @@ def import_sample_companies():
                     author=review["author"],
                     sentiment=analysis["sentiment"],
                     sentiment_score=analysis["score"],
-                    reason=reason_enum,
-                    reason_detail=reason_detail,
+                    reason=analysis["reason"],
+                    reason_detail=analysis["reason_detail"],
                     published_at=published_at,
-                    language="en"
+                    language=analysis["language"]
                 )
                 
                 db.add(mention)
                 db.flush()
-                
-                # Créer des alertes si nécessaire
-                alert_service.check_and_create_alert(mention)
+                # Index dérivés et alertes si nécessaire
+                on_mentions_ingested(db, [mention], alerts=True)
             
             db.commit()
             print(f"  → Added {len(company_data['reviews'])} reviews for {company_name}")
@@ -1,13 +1,27 @@
 """
 Script pour initialiser la base de données
 """
-from database import engine, Base
+from database import engine, Base, SessionLocal
 from models import Entity, Mention, Alert
+from services.alert_counters import ensure_counters
+from services.schema import upgrade_schema
+from services.search import ensure_search_index
 
 def init_database():
     """Créer toutes les tables de la base de données"""
     print("Création des tables de la base de données...")
     Base.metadata.create_all(bind=engine)
+    # Base existante: colonnes ajoutées depuis sa création
+    upgrade_schema(engine)
+    ensure_search_index(engine)
+    # Base antérieure aux compteurs d'alertes: les remplir à partir des alertes
+    db = SessionLocal()
+    try:
+        if ensure_counters(db):
+            db.commit()
+            print("✓ Compteurs d'alertes ouvertes recalculés")
+    finally:
+        db.close()
     print("✓ Base de données initialisée avec succès!")
     print("Fichier: reputation.db")
 
@@ -5,6 +5,11 @@ from database import engine, Base, SessionLocal
 from models import Entity, Mention, Alert, SentimentType, SourceType, ReasonType
 from services.sentiment_analyzer import SentimentAnalyzer
 from services.reason_classifier import determine_reason
+from services.analysis_cache import analyze_contents
+from services.entity_data import purge_entity
+from services.incidents import insert_alerts
+from services.ingestion import on_mentions_ingested
+from services.keyword_packs import get_pack_for_entity
 from datetime import datetime, timedelta
 import random
 
@@ -22,9 +27,8 @@ def init_sncf_data():
         
         if sncf:
             print("L'entité SNCF existe déjà. Suppression des anciennes données...")
-            # Supprimer les mentions existantes
-            db.query(Mention).filter(Mention.entity_id == sncf.id).delete()
-            db.query(Entity).filter(Entity.id == sncf.id).delete()
+            # Supprimer l'entité avec ses mentions, alertes et données dérivées
+            purge_entity(db, sncf.id)
             db.commit()
         
         # Créer l'entité SNCF
@@ -72,7 +76,7 @@ def init_sncf_data():
                 "sentiment": "positive",
                 "source": SourceType.REDDIT,
                 "author": "u/economy_traveler",
-                "reason": ReasonType.PRICING,
+                "reason": ReasonType.PRICE,
                 "reason_detail": "Tarifs attractifs pour un service efficace"
             },
             {
@@ -80,7 +84,7 @@ def init_sncf_data():
                 "sentiment": "positive",
                 "source": SourceType.TWITTER,
                 "author": "@happy_traveler",
-                "reason": ReasonType.CUSTOMER_SERVICE,
+                "reason": ReasonType.CUSTOMER_SUPPORT,
                 "reason_detail": "Qualité du service client et assistance en gare"
             },
             {
@@ -132,7 +136,7 @@ def init_sncf_data():
                 "sentiment": "negative",
                 "source": SourceType.TWITTER,
                 "author": "@angry_customer",
-                "reason": ReasonType.CUSTOMER_SERVICE,
+                "reason": ReasonType.CUSTOMER_SUPPORT,
                 "reason_detail": "Annulation et absence de prise en charge"
             },
             {
@@ -156,7 +160,7 @@ def init_sncf_data():
                 "sentiment": "negative",
                 "source": SourceType.NEWS,
                 "author": "Le Monde",
-                "reason": ReasonType.PRICING,
+                "reason": ReasonType.PRICE,
                 "reason_detail": "Tarification jugée trop élevée"
             },
             {
@@ -206,17 +210,26 @@ def init_sncf_data():
         # Générer des dates sur les 30 derniers jours
         base_date = datetime.utcnow()
         
-        for i, avis in enumerate(avis_sncf):
+        # Analyser le sentiment de tous les avis en un seul batch (via le cache),
+        # avec le pack de mots-clés transport
+        pack = get_pack_for_entity(sncf.name)
+        analyses = analyze_contents(
+            [avis["content"] for avis in avis_sncf],
+            db=db,
+            analyzer=sentiment_analyzer,
+            pack=pack
+        )
+        
+        for i, (avis, analysis) in enumerate(zip(avis_sncf, analyses)):
             # Date aléatoire dans les 30 derniers jours
             days_ago = random.randint(0, 30)
             published_at = base_date - timedelta(days=days_ago, hours=random.randint(0, 23), minutes=random.randint(0, 59))
             
-            # Analyser le sentiment
-            analysis = sentiment_analyzer.analyze_sentiment(avis["content"])
             reason_enum, reason_detail = determine_reason(
                 content=avis["content"],
                 provided_reason=avis.get("reason"),
-                provided_detail=avis.get("reason_detail")
+                provided_detail=avis.get("reason_detail"),
+                pack=pack
             )
             
             # Créer la mention
@@ -230,21 +243,24 @@ def init_sncf_data():
                 sentiment_score=analysis["score"],
                 reason=reason_enum,
                 reason_detail=reason_detail,
+                reason_provided=avis.get("reason") is not None,
                 published_at=published_at,
-                language="fr"
+                language=analysis["language"]
             )
             
             db.add(mention)
             db.flush()  # Pour obtenir l'ID de la mention
+            on_mentions_ingested(db, [mention])
             
             # Créer des alertes pour les mentions très négatives
             if avis["sentiment"] == "negative" and analysis["score"] < -0.6:
-                alert = Alert(
-                    mention_id=mention.id,
-                    severity="high" if analysis["score"] < -0.7 else "medium",
-                    message=f"Mention négative détectée sur {avis['source'].value} ({reason_enum.value})"
-                )
-                db.add(alert)
+                insert_alerts(db, [{
+                    "mention_id": mention.id,
+                    "entity_id": sncf.id,
+                    "reason": reason_enum,
+                    "severity": "high" if analysis["score"] < -0.7 else "medium",
+                    "message": f"Mention négative détectée sur {avis['source'].value} ({reason_enum.value})"
+                }])
         
         db.commit()
         
@@ -2,6 +2,7 @@
 API principale pour l'analyse automatisée de réputation en ligne
 """
 import os
+from anyio import to_thread
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -9,21 +10,31 @@ from contextlib import asynccontextmanager
 import uvicorn
 from datetime import datetime, timedelta
 
-from database import engine, Base, get_db
+from database import engine, Base, get_db, API_THREADPOOL_SIZE, DATABASE_READ_URL, PrimaryReadsMiddleware
 from models import Mention, Entity, Alert
 from schemas import (
     MentionCreate, MentionResponse, EntityCreate, EntityResponse,
     AlertResponse, ReputationScore, DashboardStats
 )
 from services.collector import DataCollector
-from services.sentiment_analyzer import SentimentAnalyzer
+from services.sentiment_analyzer import SentimentAnalyzer, azure_breaker
 from services.alert_service import AlertService
-from routers import entities, mentions, alerts, dashboard, collection, insights
+from services.schema import upgrade_schema
+from services.search import ensure_search_index
+from routers import entities, mentions, alerts, incidents, dashboard, collection, insights
+
+# Les routes qui interrogent la base sont synchrones (def): FastAPI les exécute
+# dans un pool de threads, sans bloquer la boucle d'événements (flux SSE, requêtes
+# concurrentes), de API_THREADPOOL_SIZE threads (database.py, qui y proportionne
+# le pool de connexions).
 
 # Créer les tables au démarrage
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    ensure_search_index(engine)
     yield
 
 app = FastAPI(
@@ -51,6 +62,10 @@ if extra_origins:
         origin.strip() for origin in extra_origins.split(",") if origin.strip()
     )
 
+# Réplique en lecture: un client qui vient d'écrire relit sur la base principale
+if DATABASE_READ_URL:
+    app.add_middleware(PrimaryReadsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -64,6 +79,7 @@ app.add_middleware(
 app.include_router(entities.router, prefix="/api/entities", tags=["entities"])
 app.include_router(mentions.router, prefix="/api/mentions", tags=["mentions"])
 app.include_router(alerts.router, prefix="/api/alerts", tags=["alerts"])
+app.include_router(incidents.router, prefix="/api/incidents", tags=["incidents"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
 app.include_router(collection.router, prefix="/api/collection", tags=["collection"])
 app.include_router(insights.router, prefix="/api/insights", tags=["insights"])
@@ -78,7 +94,12 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat(),
+        # Disjoncteur Azure: état, échecs, appels lents/refusés, latence moyenne
+        "azure_sentiment": azure_breaker.snapshot()
+    }
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,9 +1,9 @@
 """
 Modèles de données SQLAlchemy
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, Boolean, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import false, func
 from database import Base
 import enum
 
@@ -31,8 +31,18 @@ class ReasonType(str, enum.Enum):
     CUSTOMER_SUPPORT = "customer_support"
     DELIVERY = "delivery"
     EXPERIENCE = "experience"
+    # Transport (pack de mots-clés "transport")
+    PUNCTUALITY = "punctuality"
+    COMFORT = "comfort"
+    CLEANLINESS = "cleanliness"
+    SAFETY = "safety"
+    DIGITAL_EXPERIENCE = "digital_experience"
     OTHER = "other"
 
+class AlertKind(str, enum.Enum):
+    MENTION = "mention"  # Règles par mention (AlertService.evaluate)
+    SPIKE = "spike"  # Pic de volume d'une entité et d'une raison (spike_detector)
+
 class Entity(Base):
     __tablename__ = "entities"
     
@@ -48,6 +58,9 @@ class Entity(Base):
 
 class Mention(Base):
     __tablename__ = "mentions"
+    __table_args__ = (
+        Index("ix_mentions_entity_reason_published", "entity_id", "reason", "published_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     entity_id = Column(Integer, ForeignKey("entities.id"), nullable=False)
@@ -59,12 +72,15 @@ class Mention(Base):
     sentiment_score = Column(Float, nullable=False)  # -1 to 1
     reason = Column(Enum(ReasonType), nullable=True)
     reason_detail = Column(String(255), nullable=True)
+    # Raison fournie à l'ingestion (conservée par la réanalyse) plutôt que classifiée
+    reason_provided = Column(Boolean, nullable=False, default=False, server_default=false())
     language = Column(String(10), default="fr")
     published_at = Column(DateTime(timezone=True), nullable=False)
     collected_at = Column(DateTime(timezone=True), server_default=func.now())
     
     entity = relationship("Entity", back_populates="mentions")
     alerts = relationship("Alert", back_populates="mention", cascade="all, delete-orphan")
+    aspects = relationship("MentionAspect", cascade="all, delete-orphan")
 
 class Alert(Base):
     __tablename__ = "alerts"
@@ -73,9 +89,178 @@ class Alert(Base):
     mention_id = Column(Integer, ForeignKey("mentions.id"), nullable=False)
     severity = Column(String(20), nullable=False)  # low, medium, high, critical
     message = Column(Text, nullable=False)
+    kind = Column(String(20), nullable=False, default=AlertKind.MENTION.value, server_default=AlertKind.MENTION.value)
+    incident_id = Column(Integer, ForeignKey("incidents.id", ondelete="SET NULL"), nullable=True, index=True)
     is_resolved = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     resolved_at = Column(DateTime(timezone=True), nullable=True)
     
     mention = relationship("Mention", back_populates="alerts")
 
+
+class AnalysisResult(Base):
+    """Cache persistant des analyses (sentiment + raison) par empreinte de contenu"""
+    __tablename__ = "analysis_cache"
+    
+    content_hash = Column(String(64), primary_key=True)
+    analyzer_version = Column(String(64), primary_key=True)
+    sentiment = Column(Enum(SentimentType), nullable=False)
+    sentiment_score = Column(Float, nullable=False)
+    confidence = Column(Text, nullable=True)  # JSON des scores de confiance
+    reason = Column(Enum(ReasonType), nullable=False)
+    reason_detail = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ReprocessingCheckpoint(Base):
+    """Avancement d'un job de réanalyse des mentions (reprise après interruption)"""
+    __tablename__ = "reprocessing_checkpoints"
+    
+    job_name = Column(String(100), primary_key=True)
+    analyzer_version = Column(String(64), nullable=False)
+    entity_id = Column(Integer, nullable=True)
+    last_mention_id = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    changed = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class MentionAspect(Base):
+    """Aspect détecté dans une mention, avec sa polarité propre (rempli à l'ingestion)"""
+    __tablename__ = "mention_aspects"
+    __table_args__ = (
+        Index("ix_mention_aspects_entity_aspect_day", "entity_id", "aspect", "day"),
+        Index("ix_mention_aspects_aspect_day", "aspect", "day"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    mention_id = Column(Integer, ForeignKey("mentions.id", ondelete="CASCADE"), nullable=False, index=True)
+    entity_id = Column(Integer, ForeignKey("entities.id"), nullable=False)
+    aspect = Column(Enum(ReasonType), nullable=False)
+    sentiment = Column(Enum(SentimentType), nullable=False)
+    score = Column(Float, nullable=False)  # -1 to 1
+    hits = Column(Integer, nullable=False, default=1)
+    day = Column(Date, nullable=False)  # Jour de publication de la mention
+
+
+class MentionRollup(Base):
+    """
+    Nombre de mentions par entité, raison et fenêtre de temps (alimenté à l'ingestion)
+    Sert à restaurer l'état du détecteur de pics sans relire les mentions.
+    """
+    __tablename__ = "mention_rollups"
+    
+    entity_id = Column(Integer, ForeignKey("entities.id", ondelete="CASCADE"), primary_key=True)
+    reason = Column(Enum(ReasonType), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)  # Début de la fenêtre (UTC)
+    mention_count = Column(Integer, nullable=False, default=0)
+    negative_count = Column(Integer, nullable=False, default=0)
+    # Pic déjà signalé pour cette fenêtre (pas de nouvelle alerte après un redémarrage)
+    volume_spike = Column(Boolean, nullable=False, default=False)
+    negative_spike = Column(Boolean, nullable=False, default=False)
+
+
+class Incident(Base):
+    """
+    Regroupement des alertes d'une entité pour une même raison sur une période
+    Les compteurs (alertes non résolues) sont mis à jour sur place à chaque
+    création ou résolution d'une alerte du groupe.
+    """
+    __tablename__ = "incidents"
+    __table_args__ = (
+        Index("ix_incidents_entity_reason_open", "entity_id", "reason", "is_resolved"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    entity_id = Column(Integer, ForeignKey("entities.id", ondelete="CASCADE"), nullable=False)
+    reason = Column(Enum(ReasonType), nullable=False)
+    title = Column(Text, nullable=False)  # Message de la première alerte
+    alert_count = Column(Integer, nullable=False, default=0)
+    critical_count = Column(Integer, nullable=False, default=0)
+    high_count = Column(Integer, nullable=False, default=0)
+    medium_count = Column(Integer, nullable=False, default=0)
+    low_count = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    last_alert_at = Column(DateTime(timezone=True), nullable=False)
+    is_resolved = Column(Boolean, default=False)
+    resolved_at = Column(DateTime(timezone=True), nullable=True)
+    
+    @property
+    def severity(self) -> str:
+        """Sévérité la plus haute parmi les alertes de l'incident"""
+        for severity in ("critical", "high", "medium", "low"):
+            if getattr(self, f"{severity}_count"):
+                return severity
+        return "low"
+
+
+class AlertCounter(Base):
+    """
+    Nombre d'alertes non résolues par entité et sévérité
+    Mis à jour dans la transaction qui crée ou résout les alertes.
+    """
+    __tablename__ = "alert_counters"
+    
+    entity_id = Column(Integer, ForeignKey("entities.id", ondelete="CASCADE"), primary_key=True)
+    severity = Column(String, primary_key=True)
+    open_count = Column(Integer, nullable=False, default=0)
+
+
+class AlertAcknowledgement(Base):
+    """Prise en charge d'une alerte (vue, en cours de traitement) avant sa résolution"""
+    __tablename__ = "alert_acknowledgements"
+    
+    alert_id = Column(Integer, ForeignKey("alerts.id", ondelete="CASCADE"), primary_key=True)
+    acknowledged_by = Column(String, nullable=True)
+    acknowledged_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class AlertSolutionSignature(Base):
+    """
+    Signature de la solution d'une alerte (raison, problèmes spécifiques, niveau de sentiment)
+    Calculée à la création de l'alerte: la solution est retrouvée sans relire le contenu.
+    """
+    __tablename__ = "alert_solution_signatures"
+    
+    alert_id = Column(Integer, ForeignKey("alerts.id", ondelete="CASCADE"), primary_key=True)
+    signature = Column(String(64), nullable=False)
+
+
+class InsightSnapshot(Base):
+    """
+    Insights précalculés pour une portée (entity_id, 0 = toutes les entités)
+    et une fenêtre (days, 0 = toute la période), rafraîchis en arrière-plan
+    """
+    __tablename__ = "insight_snapshots"
+    
+    entity_id = Column(Integer, primary_key=True)
+    days = Column(Integer, primary_key=True)
+    payload = Column(Text, nullable=False)  # JSON
+    generated_at = Column(DateTime, nullable=False)
+
+
+class TermCount(Base):
+    """
+    Nombre de mentions contenant un terme (mot ou paire de mots consécutifs),
+    par entité et jour de publication (alimenté à l'ingestion)
+    """
+    __tablename__ = "term_counts"
+    __table_args__ = (
+        Index("ix_term_counts_entity_day", "entity_id", "day"),
+    )
+    
+    entity_id = Column(Integer, ForeignKey("entities.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    term = Column(String(100), primary_key=True)
+    mention_count = Column(Integer, nullable=False, default=0)
+
+
+class TermDay(Base):
+    """Nombre de mentions indexées dans term_counts par entité et jour (dénominateur des fréquences)"""
+    __tablename__ = "term_days"
+    
+    entity_id = Column(Integer, ForeignKey("entities.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    mention_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,29 @@
+"""
+Script pour recalculer les compteurs d'alertes ouvertes (table alert_counters)
+à partir des alertes, par exemple après une modification manuelle de la base
+ou pour une base antérieure à leur création.
+
+Usage: python reconcile_alert_counters.py
+"""
+import logging
+
+from database import engine, Base, SessionLocal
+from services.alert_counters import active_alerts_by_severity, reconcile_counters
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        corrected = reconcile_counters(db)
+        db.commit()
+        by_severity = active_alerts_by_severity(db)
+    finally:
+        db.close()
+    print(f"✓ {corrected} compteur(s) corrigé(s) ; alertes ouvertes : {sum(by_severity.values())} {by_severity}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Script pour réanalyser les mentions stockées après un changement de lexique,
+de mots-clés de raison ou de backend de sentiment.
+
+Le job reprend automatiquement là où il s'était arrêté (table reprocessing_checkpoints).
+--rebuild-rollups recalcule seulement les agrégats de volume (mention_rollups),
+par exemple pour une base antérieure à leur création; --rebuild-terms fait de
+même pour les compteurs de termes (term_counts, term_days).
+
+Usage: python reprocess_mentions.py [--job default] [--entity-id 3] [--chunk-size 500] [--workers 4] [--reset]
+       python reprocess_mentions.py --rebuild-rollups [--entity-id 3]
+       python reprocess_mentions.py --rebuild-terms [--entity-id 3]
+"""
+import argparse
+import logging
+
+from database import engine, Base, SessionLocal
+from services.reprocessing import REPROCESS_CHUNK_SIZE, REPROCESS_WORKERS, MentionReprocessor
+from services.rollups import rebuild_rollups
+from services.schema import upgrade_schema
+from services.term_stats import rebuild_term_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réanalyse des mentions stockées")
+    parser.add_argument("--job", default="default", help="Nom du job (clé du point de contrôle)")
+    parser.add_argument("--entity-id", type=int, default=None, help="Limiter à une entité")
+    parser.add_argument("--chunk-size", type=int, default=REPROCESS_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=REPROCESS_WORKERS)
+    parser.add_argument("--reset", action="store_true", help="Ignorer le point de contrôle et tout réanalyser")
+    parser.add_argument("--rebuild-rollups", action="store_true", help="Recalculer seulement les agrégats de volume")
+    parser.add_argument("--rebuild-terms", action="store_true", help="Recalculer seulement les compteurs de termes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+    if args.rebuild_rollups:
+        db = SessionLocal()
+        try:
+            count = rebuild_rollups(db, args.entity_id)
+            db.commit()
+        finally:
+            db.close()
+        print(f"✓ {count} agrégats recalculés.")
+        return
+
+    if args.rebuild_terms:
+        db = SessionLocal()
+        try:
+            count = rebuild_term_counts(db, args.entity_id)
+            db.commit()
+        finally:
+            db.close()
+        print(f"✓ Compteurs de termes recalculés à partir de {count} mentions.")
+        return
+
+    reprocessor = MentionReprocessor(
+        job_name=args.job,
+        entity_id=args.entity_id,
+        chunk_size=args.chunk_size,
+        workers=args.workers
+    )
+    print(f"Réanalyse des mentions (version {reprocessor.version})...")
+    summary = reprocessor.run(reset=args.reset)
+    print(
+        f"✓ Réanalyse terminée : {summary['processed']} mentions lues, "
+        f"{summary['changed']} modifiées (dernier id {summary['last_mention_id']})."
+    )
+
+
+if __name__ == "__main__":
+    main()
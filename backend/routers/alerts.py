@@ -1,26 +1,44 @@
 """
 Router pour la gestion des alertes
 """
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+import os
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, exists
 from typing import List, Optional
 from datetime import datetime
 
-from database import get_db
-from models import Alert, Mention
-from schemas import AlertResponse
+from database import get_db, get_read_db
+from models import Alert, AlertAcknowledgement, Mention
+from schemas import AlertBulkRequest, AlertResponse
+from services.alert_counters import active_alerts_by_severity, adjust_counters
+from services.alert_triage import SELECTION_FILTERS, bulk_acknowledge, bulk_resolve
+from services.event_bus import ALERT_RESOLVED, event_bus, queue_event
+from services.incidents import release_alerts
+from services.keyword_packs import get_pack_for_entity_id
 from services.solution_generator import SolutionGenerator
 
 router = APIRouter()
 
+# Intervalle (secondes) des commentaires de maintien de connexion du flux SSE
+EVENT_STREAM_HEARTBEAT = float(os.getenv("EVENT_STREAM_HEARTBEAT", 15))
+# Délai de reconnexion conseillé aux clients (millisecondes)
+EVENT_STREAM_RETRY_MS = 3000
+
+def _format_event(event_id: int, kind: str, data: dict) -> str:
+    return f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 @router.get("/", response_model=List[AlertResponse])
-async def get_alerts(
+def get_alerts(
     resolved: Optional[bool] = None,
     severity: Optional[str] = None,
+    acknowledged: Optional[bool] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Récupérer les alertes avec filtres optionnels"""
     query = db.query(Alert)
@@ -29,12 +47,84 @@ async def get_alerts(
         query = query.filter(Alert.is_resolved == resolved)
     if severity:
         query = query.filter(Alert.severity == severity)
+    if acknowledged is not None:
+        is_acknowledged = exists().where(AlertAcknowledgement.alert_id == Alert.id)
+        query = query.filter(is_acknowledged if acknowledged else ~is_acknowledged)
     
     alerts = query.order_by(desc(Alert.created_at)).offset(skip).limit(limit).all()
     return alerts
 
+@router.get("/stream")
+async def stream_alerts(
+    request: Request,
+    entity_id: Optional[int] = None,
+    last_event_id: Optional[int] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Flux Server-Sent Events des alertes créées / résolues (d'une entité, ou de toutes).
+    Un client reconnecté reprend après son dernier id (en-tête Last-Event-ID ou
+    paramètre last_event_id); si ces événements ne sont plus disponibles, un
+    événement "reset" lui demande de recharger les alertes.
+    """
+    if last_event_id is None and last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
+    resume = last_event_id is not None
+    if not resume:
+        # Événements publiés avant le début du flux: rejoués depuis l'historique
+        last_event_id = event_bus.last_id
+
+    async def events():
+        # Abonnement pris au début du flux et retiré à sa fin: un client déconnecté
+        # avant la première lecture ne laisse pas d'abonnement ouvert
+        subscription, missed = event_bus.subscribe(entity_id, last_event_id)
+        try:
+            yield f"retry: {EVENT_STREAM_RETRY_MS}\n\n"
+            if missed is None and resume:
+                yield _format_event(event_bus.last_id, "reset", {"last_event_id": event_bus.last_id})
+            for item in missed or ():
+                yield _format_event(*item)
+            while not subscription.overflowed or not subscription.queue.empty():
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), EVENT_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    # Commentaire SSE: garde la connexion ouverte à travers les proxys
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _format_event(*item)
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _bulk_selection(request: AlertBulkRequest) -> dict:
+    selection = request.model_dump(include=set(SELECTION_FILTERS))
+    if all(value is None for value in selection.values()):
+        raise HTTPException(status_code=400, detail="Provide alert ids or at least one filter")
+    return selection
+
+@router.post("/bulk/resolve")
+def bulk_resolve_alerts(request: AlertBulkRequest, db: Session = Depends(get_db)):
+    """Résoudre en une fois les alertes ouvertes d'une sélection (sans générer de solution)"""
+    resolved = bulk_resolve(db, **_bulk_selection(request))
+    db.commit()
+    return {"resolved": resolved}
+
+@router.post("/bulk/acknowledge")
+def bulk_acknowledge_alerts(request: AlertBulkRequest, db: Session = Depends(get_db)):
+    """Prendre en charge en une fois les alertes ouvertes d'une sélection"""
+    acknowledged = bulk_acknowledge(db, request.acknowledged_by, **_bulk_selection(request))
+    db.commit()
+    return {"acknowledged": acknowledged}
+
 @router.get("/{alert_id}", response_model=AlertResponse)
-async def get_alert(alert_id: int, db: Session = Depends(get_db)):
+def get_alert(alert_id: int, db: Session = Depends(get_db)):
     """Récupérer une alerte par ID"""
     alert = db.query(Alert).filter(Alert.id == alert_id).first()
     if not alert:
@@ -42,37 +132,48 @@ async def get_alert(alert_id: int, db: Session = Depends(get_db)):
     return alert
 
 @router.get("/{alert_id}/solution")
-async def get_alert_solution(alert_id: int, db: Session = Depends(get_db)):
+def get_alert_solution(alert_id: int, db: Session = Depends(get_db)):
     """Obtenir la solution recommandée pour une alerte"""
     alert = db.query(Alert).filter(Alert.id == alert_id).first()
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
-    mention = db.query(Mention).filter(Mention.id == alert.mention_id).first()
-    if not mention:
+    solution = SolutionGenerator.solution_for_alert(
+        db, alert, lambda entity_id: get_pack_for_entity_id(db, entity_id)
+    )
+    if solution is None:
         raise HTTPException(status_code=404, detail="Mention not found")
-    
-    solution = SolutionGenerator.generate_solution(mention)
+    db.commit()
     return {
         "alert_id": alert_id,
         "solution": solution
     }
 
 @router.post("/{alert_id}/resolve")
-async def resolve_alert(alert_id: int, db: Session = Depends(get_db)):
+def resolve_alert(alert_id: int, db: Session = Depends(get_db)):
     """Marquer une alerte comme résolue avec la solution appliquée"""
     alert = db.query(Alert).filter(Alert.id == alert_id).first()
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
-    # Générer la solution avant de résoudre
+    # Solution appliquée (retrouvée par la signature de l'alerte)
     mention = db.query(Mention).filter(Mention.id == alert.mention_id).first()
     solution = None
     if mention:
-        solution = SolutionGenerator.generate_solution(mention)
+        solution = SolutionGenerator.solution_for_alert(
+            db, alert, lambda entity_id: get_pack_for_entity_id(db, entity_id)
+        )
     
+    if not alert.is_resolved:
+        if mention:
+            adjust_counters(db, {(mention.entity_id, alert.severity): -1})
+        release_alerts(db, [(alert.incident_id, alert.severity)])
     alert.is_resolved = True
     alert.resolved_at = datetime.utcnow()
+    queue_event(db, ALERT_RESOLVED, {
+        "alert_id": alert.id,
+        "entity_id": mention.entity_id if mention else None,
+    })
     db.commit()
     db.refresh(alert)
     
@@ -82,8 +183,8 @@ async def resolve_alert(alert_id: int, db: Session = Depends(get_db)):
     }
 
 @router.get("/active/count")
-async def get_active_alerts_count(db: Session = Depends(get_db)):
-    """Obtenir le nombre d'alertes actives"""
-    count = db.query(Alert).filter(Alert.is_resolved == False).count()
-    return {"active_alerts": count}
+def get_active_alerts_count(entity_id: Optional[int] = None, db: Session = Depends(get_read_db)):
+    """Obtenir le nombre d'alertes actives (toutes ou d'une entité), total et par sévérité"""
+    by_severity = active_alerts_by_severity(db, entity_id)
+    return {"active_alerts": sum(by_severity.values()), "by_severity": by_severity}
 
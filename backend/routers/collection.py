@@ -13,7 +13,7 @@ from services.collector import DataCollector
 router = APIRouter()
 
 @router.post("/trigger")
-async def trigger_collection(
+def trigger_collection(
     request: CollectionRequest,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
@@ -1,26 +1,27 @@
 """
 Router pour le tableau de bord
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timedelta
 from collections import Counter
 
-from database import get_db
-from models import Entity, Mention, Alert, ReasonType
+from database import get_read_db
+from models import Entity, Mention, MentionAspect, ReasonType
 from schemas import DashboardStats, ReputationScore, MentionResponse
+from services.alert_counters import active_alerts_count
 
 router = APIRouter()
 
 @router.get("/stats", response_model=DashboardStats)
-async def get_dashboard_stats(db: Session = Depends(get_db)):
+def get_dashboard_stats(db: Session = Depends(get_read_db)):
     """Obtenir les statistiques globales du tableau de bord"""
     # Statistiques globales
     total_entities = db.query(Entity).filter(Entity.is_active == True).count()
     total_mentions = db.query(Mention).count()
-    active_alerts = db.query(Alert).filter(Alert.is_resolved == False).count()
+    active_alerts = active_alerts_count(db)
     
     # Calculer les totaux de sentiment pour Overview Metrics
     mentions = db.query(Mention).all()
@@ -89,7 +90,7 @@ async def get_dashboard_stats(db: Session = Depends(get_db)):
     )
 
 @router.get("/reputation-scores", response_model=List[ReputationScore])
-async def get_reputation_scores(db: Session = Depends(get_db)):
+def get_reputation_scores(db: Session = Depends(get_read_db)):
     """Obtenir les scores de réputation pour toutes les entités actives"""
     entities = db.query(Entity).filter(Entity.is_active == True).all()
     scores = []
@@ -101,7 +102,7 @@ async def get_reputation_scores(db: Session = Depends(get_db)):
     return scores
 
 @router.get("/reputation-scores/{entity_id}", response_model=ReputationScore)
-async def get_entity_reputation_score(entity_id: int, db: Session = Depends(get_db)):
+def get_entity_reputation_score(entity_id: int, db: Session = Depends(get_read_db)):
     """Obtenir le score de réputation pour une entité spécifique"""
     entity = db.query(Entity).filter(Entity.id == entity_id).first()
     if not entity:
@@ -111,10 +112,16 @@ async def get_entity_reputation_score(entity_id: int, db: Session = Depends(get_
     return calculate_reputation_score(entity_id, db)
 
 @router.get("/aspect-sentiment")
-async def get_aspect_sentiment_analysis(db: Session = Depends(get_db)):
-    """Obtenir l'analyse de sentiment par aspect (camera, battery, performance, design, price)"""
-    from collections import defaultdict
-    
+def get_aspect_sentiment_analysis(
+    entity_id: Optional[int] = None,
+    days: Optional[int] = Query(None, ge=1, le=365),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Obtenir l'analyse de sentiment par aspect (camera, battery, performance, design, price)
+    Agrégé en SQL sur l'index mention_aspects (polarité propre à chaque aspect d'une mention),
+    optionnellement pour une entité et sur les `days` derniers jours.
+    """
     # Mapping des aspects aux ReasonType
     aspect_mapping = {
         "camera": ReasonType.CAMERA,
@@ -124,39 +131,37 @@ async def get_aspect_sentiment_analysis(db: Session = Depends(get_db)):
         "price": ReasonType.PRICE,
     }
     
-    # Récupérer toutes les mentions avec un reason
-    mentions = db.query(Mention).filter(Mention.reason.isnot(None)).all()
+    query = db.query(
+        MentionAspect.aspect,
+        MentionAspect.sentiment,
+        func.count(MentionAspect.id)
+    ).filter(MentionAspect.aspect.in_(aspect_mapping.values()))
+    if entity_id is not None:
+        query = query.filter(MentionAspect.entity_id == entity_id)
+    if days is not None:
+        query = query.filter(MentionAspect.day >= (datetime.utcnow() - timedelta(days=days)).date())
+    
+    counts = {}
+    for aspect, sentiment, count in query.group_by(MentionAspect.aspect, MentionAspect.sentiment):
+        counts[(aspect, sentiment.value)] = count
     
     # Calculer les statistiques par aspect
     aspect_stats = {}
     for aspect_name, reason_type in aspect_mapping.items():
-        aspect_mentions = [m for m in mentions if m.reason == reason_type]
+        positive = counts.get((reason_type, "positive"), 0)
+        neutral = counts.get((reason_type, "neutral"), 0)
+        negative = counts.get((reason_type, "negative"), 0)
+        total = positive + neutral + negative
         
-        total = len(aspect_mentions)
-        positive = sum(1 for m in aspect_mentions if m.sentiment.value == "positive")
-        neutral = sum(1 for m in aspect_mentions if m.sentiment.value == "neutral")
-        negative = sum(1 for m in aspect_mentions if m.sentiment.value == "negative")
-        
-        if total > 0:
-            aspect_stats[aspect_name] = {
-                "total_mentions": total,
-                "positive": positive,
-                "neutral": neutral,
-                "negative": negative,
-                "positive_percentage": round(positive / total * 100, 1),
-                "neutral_percentage": round(neutral / total * 100, 1),
-                "negative_percentage": round(negative / total * 100, 1),
-            }
-        else:
-            aspect_stats[aspect_name] = {
-                "total_mentions": 0,
-                "positive": 0,
-                "neutral": 0,
-                "negative": 0,
-                "positive_percentage": 0,
-                "neutral_percentage": 0,
-                "negative_percentage": 0,
-            }
+        aspect_stats[aspect_name] = {
+            "total_mentions": total,
+            "positive": positive,
+            "neutral": neutral,
+            "negative": negative,
+            "positive_percentage": round(positive / total * 100, 1) if total else 0,
+            "neutral_percentage": round(neutral / total * 100, 1) if total else 0,
+            "negative_percentage": round(negative / total * 100, 1) if total else 0,
+        }
     
     return aspect_stats
 
@@ -6,14 +6,15 @@ from sqlalchemy.orm import Session
 from typing import List
 import json
 
-from database import get_db
+from database import get_db, get_read_db
 from models import Entity
 from schemas import EntityCreate, EntityResponse
+from services.entity_data import purge_entity
 
 router = APIRouter()
 
 @router.post("/", response_model=EntityResponse)
-async def create_entity(entity: EntityCreate, db: Session = Depends(get_db)):
+def create_entity(entity: EntityCreate, db: Session = Depends(get_db)):
     """Créer une nouvelle entité à surveiller"""
     # Vérifier si l'entité existe déjà
     existing = db.query(Entity).filter(Entity.name == entity.name).first()
@@ -35,7 +36,7 @@ async def create_entity(entity: EntityCreate, db: Session = Depends(get_db)):
     return db_entity
 
 @router.get("/", response_model=List[EntityResponse])
-async def get_entities(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_entities(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
     """Récupérer toutes les entités"""
     entities = db.query(Entity).offset(skip).limit(limit).all()
     for entity in entities:
@@ -43,7 +44,7 @@ async def get_entities(skip: int = 0, limit: int = 100, db: Session = Depends(ge
     return entities
 
 @router.get("/{entity_id}", response_model=EntityResponse)
-async def get_entity(entity_id: int, db: Session = Depends(get_db)):
+def get_entity(entity_id: int, db: Session = Depends(get_db)):
     """Récupérer une entité par ID"""
     entity = db.query(Entity).filter(Entity.id == entity_id).first()
     if not entity:
@@ -52,7 +53,7 @@ async def get_entity(entity_id: int, db: Session = Depends(get_db)):
     return entity
 
 @router.put("/{entity_id}", response_model=EntityResponse)
-async def update_entity(
+def update_entity(
     entity_id: int, 
     entity: EntityCreate, 
     db: Session = Depends(get_db)
@@ -73,13 +74,14 @@ async def update_entity(
     return db_entity
 
 @router.delete("/{entity_id}")
-async def delete_entity(entity_id: int, db: Session = Depends(get_db)):
+def delete_entity(entity_id: int, db: Session = Depends(get_db)):
     """Supprimer une entité"""
     entity = db.query(Entity).filter(Entity.id == entity_id).first()
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found")
     
-    db.delete(entity)
+    # Mentions, alertes, incidents et données dérivées supprimés avec l'entité
+    purge_entity(db, entity_id)
     db.commit()
     return {"message": "Entity deleted successfully"}
 
@@ -0,0 +1,67 @@
+"""
+Router pour les incidents (alertes regroupées par entité, raison et période)
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy import desc
+from typing import List, Optional
+
+from database import get_db, get_read_db
+from models import Alert, Incident
+from schemas import IncidentDetailResponse, IncidentResponse
+from services.incidents import resolve_incident
+
+router = APIRouter()
+
+@router.get("/", response_model=List[IncidentResponse])
+def get_incidents(
+    resolved: Optional[bool] = None,
+    entity_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_read_db)
+):
+    """Récupérer les incidents, les plus récemment actifs d'abord"""
+    query = db.query(Incident)
+
+    if resolved is not None:
+        query = query.filter(Incident.is_resolved == resolved)
+    if entity_id is not None:
+        query = query.filter(Incident.entity_id == entity_id)
+
+    return query.order_by(desc(Incident.last_alert_at)).offset(skip).limit(limit).all()
+
+@router.get("/{incident_id}", response_model=IncidentDetailResponse)
+def get_incident(
+    incident_id: int,
+    alerts_limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """Récupérer un incident et ses alertes les plus récentes"""
+    incident = db.query(Incident).filter(Incident.id == incident_id).first()
+    if not incident:
+        raise HTTPException(status_code=404, detail="Incident not found")
+
+    alerts = db.query(Alert).filter(
+        Alert.incident_id == incident_id
+    ).order_by(desc(Alert.created_at)).limit(alerts_limit).all()
+
+    response = IncidentDetailResponse.model_validate(incident)
+    response.alerts = alerts
+    return response
+
+@router.post("/{incident_id}/resolve")
+def resolve(incident_id: int, db: Session = Depends(get_db)):
+    """Résoudre un incident et toutes ses alertes"""
+    incident = db.query(Incident).filter(Incident.id == incident_id).first()
+    if not incident:
+        raise HTTPException(status_code=404, detail="Incident not found")
+
+    resolved_alerts = resolve_incident(db, incident)
+    db.commit()
+    db.refresh(incident)
+
+    return {
+        "incident": IncidentResponse.model_validate(incident),
+        "resolved_alerts": resolved_alerts
+    }
@@ -1,20 +1,104 @@
 """
 Router exposing demo AI insights generated locally.
 """
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from database import get_db
-from services.insights import generate_demo_insights
+from database import get_db, get_read_db
+from models import Entity, SentimentType
+from services.insights import (
+    INSIGHT_WINDOWS, get_insights_snapshot, refresh_snapshot, refresh_snapshot_in_background
+)
+from services.keyword_packs import get_pack_for_entity_id
+from services.solution_generator import SolutionGenerator
+from services.term_stats import emerging_terms
 
 router = APIRouter()
 
 
 @router.get("/demo")
-async def get_demo_insights(db: Session = Depends(get_db)):
+def get_demo_insights(
+    background_tasks: BackgroundTasks,
+    entity_id: Optional[int] = None,
+    days: Optional[int] = None,
+    refresh: bool = False,
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db)
+):
     """
     Return synthetic AI-like insights to showcase the assistant without
-    relying on external APIs.
+    relying on external APIs, for all entities or one entity, optionally
+    limited to the last `days` days (7, 30, 90 or 365). Served from a precomputed snapshot,
+    refreshed in the background once stale (or immediately with refresh=true).
+    Snapshots are read from the read replica when one is configured.
+    """
+    if entity_id is not None and db.get(Entity, entity_id) is None:
+        raise HTTPException(status_code=404, detail="Entity not found")
+    if days is not None and days not in INSIGHT_WINDOWS:
+        raise HTTPException(
+            status_code=400, detail=f"days must be one of {', '.join(map(str, INSIGHT_WINDOWS))}"
+        )
+    if refresh:
+        insights = refresh_snapshot(db, entity_id, days)
+        db.commit()
+        return insights
+    insights, stale = get_insights_snapshot(db, entity_id, days, read_db=read_db)
+    if stale:
+        background_tasks.add_task(refresh_snapshot_in_background, entity_id, days)
+    return insights
+
+
+@router.get("/solutions")
+def get_aggregated_solutions(
+    entity_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    severity: Optional[str] = None,
+    sentiment: Optional[SentimentType] = None,
+    samples: int = Query(3, ge=0, le=20),
+    db: Session = Depends(get_read_db)
+):
     """
-    return generate_demo_insights(db)
+    Recommended solutions per reason for the mentions matching the filters
+    (entity, publication period, alert severity, sentiment), with counts,
+    priority ordering and a few recent sample quotes per reason.
+    """
+    pack = get_pack_for_entity_id(db, entity_id) if entity_id is not None else None
+    return SolutionGenerator.aggregate_solutions(
+        db,
+        entity_id=entity_id,
+        start=start,
+        end=end,
+        severity=severity,
+        sentiment=sentiment,
+        samples=samples,
+        pack=pack
+    )
+
 
+@router.get("/emerging-terms")
+def get_emerging_terms(
+    entity_id: Optional[int] = None,
+    recent_days: int = Query(3, ge=1, le=30),
+    baseline_days: int = Query(28, ge=1, le=365),
+    min_count: int = Query(3, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Words and word pairs whose share of mentions grew the most in the last
+    `recent_days` days compared with the `baseline_days` days before, ranked
+    by lift. Answered from the per-day term counters filled at ingestion, so
+    new complaint themes show up before they map onto a known reason.
+    """
+    return emerging_terms(
+        db,
+        entity_id=entity_id,
+        recent_days=recent_days,
+        baseline_days=baseline_days,
+        min_count=min_count,
+        limit=limit
+    )
@@ -7,28 +7,29 @@ from sqlalchemy import desc
 from typing import List, Optional
 from datetime import datetime, timedelta
 
-from database import get_db
+from database import get_db, get_read_db
 from models import Mention, Entity, ReasonType
-from schemas import MentionResponse, MentionCreate
+from schemas import MentionResponse, MentionCreate, MentionSearchResult
 from services.sentiment_analyzer import SentimentAnalyzer
 from services.reason_classifier import determine_reason
+from services.analysis_cache import analyze_contents
+from services.ingestion import on_mentions_ingested
+from services.keyword_packs import get_pack_for_entity
+from services.search import search_mentions
 
 router = APIRouter()
 sentiment_analyzer = SentimentAnalyzer()
 
-@router.get("/", response_model=List[MentionResponse])
-async def get_mentions(
+def _filter_mentions(
+    query,
     entity_id: Optional[int] = None,
     source: Optional[str] = None,
     sentiment: Optional[str] = None,
     reason: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
 ):
-    """Récupérer les mentions avec filtres optionnels"""
-    query = db.query(Mention)
-    
+    """Appliquer les filtres communs aux listes de mentions"""
     if entity_id:
         query = query.filter(Mention.entity_id == entity_id)
     if source:
@@ -41,12 +42,57 @@ async def get_mentions(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid reason")
         query = query.filter(Mention.reason == reason_enum)
+    if start:
+        query = query.filter(Mention.published_at >= start)
+    if end:
+        query = query.filter(Mention.published_at < end)
+    return query
+
+@router.get("/", response_model=List[MentionResponse])
+def get_mentions(
+    entity_id: Optional[int] = None,
+    source: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    reason: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_read_db)
+):
+    """Récupérer les mentions avec filtres optionnels"""
+    query = _filter_mentions(db.query(Mention), entity_id, source, sentiment, reason)
     
     mentions = query.order_by(desc(Mention.published_at)).offset(skip).limit(limit).all()
     return mentions
 
+@router.get("/search", response_model=List[MentionSearchResult])
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    entity_id: Optional[int] = None,
+    source: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    reason: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Recherche plein texte dans le contenu des mentions ("remboursement", "retard TGV", "rembours*"),
+    combinable avec les filtres de la liste; résultats classés par pertinence, avec extrait surligné
+    """
+    filtered = _filter_mentions(db.query(Mention), entity_id, source, sentiment, reason, start, end)
+    return [
+        MentionSearchResult(
+            **MentionResponse.model_validate(mention).model_dump(),
+            rank=rank,
+            highlight=highlight
+        )
+        for mention, rank, highlight in search_mentions(db, q, filtered, skip, limit)
+    ]
+
 @router.get("/{mention_id}", response_model=MentionResponse)
-async def get_mention(mention_id: int, db: Session = Depends(get_db)):
+def get_mention(mention_id: int, db: Session = Depends(get_db)):
     """Récupérer une mention par ID"""
     mention = db.query(Mention).filter(Mention.id == mention_id).first()
     if not mention:
@@ -54,20 +100,32 @@ async def get_mention(mention_id: int, db: Session = Depends(get_db)):
     return mention
 
 @router.post("/", response_model=MentionResponse)
-async def create_mention(mention: MentionCreate, db: Session = Depends(get_db)):
+def create_mention(mention: MentionCreate, db: Session = Depends(get_db)):
     """Créer une nouvelle mention (avec analyse de sentiment automatique)"""
     # Vérifier que l'entité existe
     entity = db.query(Entity).filter(Entity.id == mention.entity_id).first()
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found")
     
-    # Analyser le sentiment
-    analysis = sentiment_analyzer.analyze_sentiment(mention.content)
-    reason_enum, reason_detail = determine_reason(
-        content=mention.content,
-        provided_reason=mention.reason,
-        provided_detail=mention.reason_detail
-    )
+    # Analyser le sentiment et la raison (via le cache)
+    pack = get_pack_for_entity(entity.name)
+    analysis = analyze_contents(
+        [mention.content],
+        db=db,
+        analyzer=sentiment_analyzer,
+        language=mention.language,
+        pack=pack
+    )[0]
+    if mention.reason:
+        reason_enum, reason_detail = determine_reason(
+            content=mention.content,
+            provided_reason=mention.reason,
+            provided_detail=mention.reason_detail,
+            pack=pack
+        )
+    else:
+        reason_enum = analysis["reason"]
+        reason_detail = mention.reason_detail or analysis["reason_detail"]
     
     db_mention = Mention(
         entity_id=mention.entity_id,
@@ -79,20 +137,23 @@ async def create_mention(mention: MentionCreate, db: Session = Depends(get_db)):
         sentiment_score=analysis["score"],
         reason=reason_enum,
         reason_detail=reason_detail,
+        reason_provided=bool(mention.reason),
         published_at=mention.published_at,
-        language="fr"  # Détection automatique possible
+        language=analysis["language"]
     )
     
     db.add(db_mention)
+    db.flush()
+    on_mentions_ingested(db, [db_mention])
     db.commit()
     db.refresh(db_mention)
     return db_mention
 
 @router.get("/entity/{entity_id}/stats")
-async def get_entity_mention_stats(
+def get_entity_mention_stats(
     entity_id: int,
     days: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtenir les statistiques de mentions pour une entité"""
     entity = db.query(Entity).filter(Entity.id == entity_id).first()
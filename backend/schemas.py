@@ -34,6 +34,7 @@ class MentionBase(BaseModel):
 
 class MentionCreate(MentionBase):
     entity_id: int
+    language: Optional[str] = Field(default=None, description="Code langue (détecté automatiquement si absent)")
 
 class MentionResponse(MentionBase):
     id: int
@@ -46,6 +47,10 @@ class MentionResponse(MentionBase):
     class Config:
         from_attributes = True
 
+class MentionSearchResult(MentionResponse):
+    rank: Optional[float] = None  # Pertinence (plus élevé = plus pertinent)
+    highlight: str  # Contenu échappé (HTML), les termes trouvés entre <mark> et </mark>
+
 class AlertResponse(BaseModel):
     id: int
     mention_id: int
@@ -58,6 +63,28 @@ class AlertResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class IncidentResponse(BaseModel):
+    id: int
+    entity_id: int
+    reason: ReasonType
+    title: str
+    severity: str
+    alert_count: int
+    critical_count: int
+    high_count: int
+    medium_count: int
+    low_count: int
+    started_at: datetime
+    last_alert_at: datetime
+    is_resolved: bool
+    resolved_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class IncidentDetailResponse(IncidentResponse):
+    alerts: List[AlertResponse] = []
+
 class ReputationScore(BaseModel):
     entity_id: int
     entity_name: str
@@ -83,3 +110,13 @@ class CollectionRequest(BaseModel):
     entity_id: Optional[int] = None
     force: bool = False
 
+
+class AlertBulkRequest(BaseModel):
+    """Sélection d'alertes pour une action groupée: liste d'id et / ou filtres (au moins un)"""
+    ids: Optional[List[int]] = None
+    entity_id: Optional[int] = None
+    severity: Optional[str] = None
+    incident_id: Optional[int] = None
+    created_before: Optional[datetime] = None
+    created_after: Optional[datetime] = None
+    acknowledged_by: Optional[str] = None  # Auteur de la prise en charge (acknowledge)
@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 
 from database import Base, engine, SessionLocal
 from models import Mention, SentimentType, ReasonType, SourceType, Entity
-from services.alert_service import AlertService
+from services.ingestion import on_mentions_ingested
 
 
 SEED_ITEMS = [
@@ -91,7 +91,6 @@ SEED_ITEMS = [
 def seed_alerts():
     Base.metadata.create_all(bind=engine)
     db = SessionLocal()
-    alert_service = AlertService(db)
 
     try:
         for item in SEED_ITEMS:
@@ -121,13 +120,13 @@ def seed_alerts():
                     sentiment_score=mention_data["score"],
                     reason=mention_data["reason"],
                     reason_detail=mention_data["detail"],
+                    reason_provided=True,
                     published_at=published_at,
                     language="en",
                 )
                 db.add(mention)
                 db.flush()
-
-                alert_service.check_and_create_alert(mention)
+                on_mentions_ingested(db, [mention], alerts=True)
                 print(f"✓ Seeded mention for {item['entity']} ({mention_data['reason'].value})")
 
         db.commit()
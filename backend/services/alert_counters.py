@@ -0,0 +1,133 @@
+"""
+Compteurs d'alertes non résolues par entité et sévérité (table alert_counters)
+
+Les compteurs sont ajustés dans la transaction qui crée (insert_alerts),
+résout (alerte, incident) ou supprime (réanalyse) des alertes, par un
+INSERT ... ON CONFLICT DO UPDATE: les badges du tableau de bord lisent
+quelques lignes au lieu de compter les alertes.
+
+Les écritures qui ne passent pas par ces fonctions (scripts d'import,
+suppressions en masse) sont rattrapées par reconcile_counters
+(python reconcile_alert_counters.py). Une base antérieure à alert_counters
+(compteurs vides, alertes ouvertes présentes) est réconciliée automatiquement
+par init_db.py, ou à la première lecture des compteurs du processus.
+"""
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, dialect_insert
+from models import Alert, AlertCounter, Mention
+
+logger = logging.getLogger(__name__)
+
+CounterKey = Tuple[int, str]
+
+# Vérification des compteurs vides faite par ce processus (ensure_counters_once)
+_counters_checked = False
+_counters_lock = threading.Lock()
+
+
+def adjust_counters(db: Session, deltas: Dict[CounterKey, int]):
+    """Ajouter des variations {(entity_id, sévérité): delta} aux compteurs (commit à la charge de l'appelant)"""
+    rows = [
+        {"entity_id": entity_id, "severity": severity, "open_count": delta}
+        for (entity_id, severity), delta in deltas.items()
+        if delta and entity_id is not None
+    ]
+    if not rows:
+        return
+    table = AlertCounter.__table__
+    statement = dialect_insert(db, table).values(rows)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[table.c.entity_id, table.c.severity],
+        set_={"open_count": table.c.open_count + statement.excluded.open_count}
+    ))
+
+
+def count_changes(keys: Iterable[CounterKey], sign: int = 1) -> Dict[CounterKey, int]:
+    """Variations des compteurs pour des alertes créées (sign=1) ou résolues / supprimées (sign=-1)"""
+    return {key: sign * count for key, count in Counter(keys).items()}
+
+
+def active_alerts_count(db: Session, entity_id: Optional[int] = None, severity: Optional[str] = None) -> int:
+    """Nombre d'alertes non résolues (toutes, d'une entité et / ou d'une sévérité)"""
+    ensure_counters_once()
+    query = db.query(func.coalesce(func.sum(AlertCounter.open_count), 0))
+    if entity_id is not None:
+        query = query.filter(AlertCounter.entity_id == entity_id)
+    if severity:
+        query = query.filter(AlertCounter.severity == severity)
+    return query.scalar()
+
+
+def active_alerts_by_severity(db: Session, entity_id: Optional[int] = None) -> Dict[str, int]:
+    """Nombre d'alertes non résolues par sévérité"""
+    ensure_counters_once()
+    query = db.query(AlertCounter.severity, func.sum(AlertCounter.open_count))
+    if entity_id is not None:
+        query = query.filter(AlertCounter.entity_id == entity_id)
+    return {severity: count for severity, count in query.group_by(AlertCounter.severity) if count}
+
+
+def reconcile_counters(db: Session) -> int:
+    """
+    Recalculer les compteurs à partir des alertes (commit à la charge de l'appelant).
+    Retourne le nombre de compteurs qui étaient faux.
+    """
+    actual = {
+        (entity_id, severity): count
+        for entity_id, severity, count in db.query(Mention.entity_id, Alert.severity, func.count(Alert.id))
+        .join(Mention, Mention.id == Alert.mention_id)
+        .filter(Alert.is_resolved == False)
+        .group_by(Mention.entity_id, Alert.severity)
+    }
+    stored = {(row.entity_id, row.severity): row.open_count for row in db.query(AlertCounter)}
+
+    wrong = {key for key in actual.keys() | stored.keys() if actual.get(key, 0) != stored.get(key, 0)}
+    if wrong:
+        db.query(AlertCounter).delete(synchronize_session=False)
+        if actual:
+            db.execute(dialect_insert(db, AlertCounter.__table__).values([
+                {"entity_id": entity_id, "severity": severity, "open_count": count}
+                for (entity_id, severity), count in actual.items()
+            ]))
+        logger.info(f"Reconciled alert counters: {len(wrong)} counter(s) corrected")
+    return len(wrong)
+
+
+def ensure_counters(db: Session) -> bool:
+    """
+    Réconcilier les compteurs s'ils sont vides alors que des alertes non résolues
+    existent (base antérieure à alert_counters). Commit à la charge de l'appelant.
+    """
+    if db.query(AlertCounter.entity_id).first() is not None:
+        return False
+    if db.query(Alert.id).filter(Alert.is_resolved == False).first() is None:
+        return False
+    reconcile_counters(db)
+    return True
+
+
+def ensure_counters_once():
+    """ensure_counters à la première lecture des compteurs du processus, sur la base principale"""
+    global _counters_checked
+    if _counters_checked:
+        return
+    with _counters_lock:
+        if _counters_checked:
+            return
+        db = SessionLocal()
+        try:
+            if ensure_counters(db):
+                db.commit()
+            _counters_checked = True
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error checking alert counters: {e}")
+        finally:
+            db.close()
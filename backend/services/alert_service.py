@@ -1,68 +1,162 @@
 """
 Service de gestion des alertes
+
+Les critères d'alerte sont déclarés sous forme de règles (DEFAULT_ALERT_RULES),
+compilées une seule fois en AlertRuleSet. La première règle satisfaite donne la
+sévérité et le message de l'alerte. Un pack de mots-clés peut remplacer ces
+règles (clé "alert_rules" de son fichier JSON) pour les entités de son domaine.
+
+Format d'une règle:
+- severity: sévérité de l'alerte (critical, high, medium, low)
+- message: message, {source} est remplacé par la source de la mention
+- sentiment: sentiment(s) requis (optionnel)
+- max_score: score de sentiment strictement inférieur requis (optionnel)
+- reasons: raison(s) requise(s) (optionnel)
+- critical_keywords: true pour exiger un mot-clé critique du pack (optionnel)
 """
 import logging
 from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from sqlalchemy.orm import Session
 
-from models import Mention, Alert
+from models import Mention, Alert, ReasonType, SentimentType
+from services.alert_counters import active_alerts_count
+from services.incidents import insert_alerts
+from services.keyword_matcher import KeywordMatcher, normalize_text
+from services.solution_generator import SolutionGenerator
+from services.text_pipeline import CRITICAL_VOCABULARY
 
 logger = logging.getLogger(__name__)
 
+# Mots-clés critiques communs à tous les domaines (les packs de mots-clés en ajoutent)
+CRITICAL_KEYWORDS = ["scandale", "crise", "problème grave", "erreur critique",
+                     "bug majeur", "défaillance", "incident"]
+CRITICAL_MATCHER = KeywordMatcher({"critical": CRITICAL_KEYWORDS})
+
+SEVERITIES = ("critical", "high", "medium", "low")
+
+# Règles par défaut, dans l'ordre d'évaluation (la première satisfaite l'emporte)
+DEFAULT_ALERT_RULES = [
+    # Alerte critique: sentiment très négatif
+    {"severity": "critical", "sentiment": "negative", "max_score": -0.7,
+     "message": "Mention très négative détectée sur {source}"},
+    # Alerte haute: mots-clés critiques dans le contenu
+    {"severity": "high", "critical_keywords": True,
+     "message": "Mention contenant des mots-clés critiques sur {source}"},
+    # Alerte haute: sentiment négatif avec score élevé
+    {"severity": "high", "sentiment": "negative", "max_score": -0.5,
+     "message": "Mention négative détectée sur {source}"},
+    # Alerte moyenne: sentiment négatif modéré
+    {"severity": "medium", "sentiment": "negative",
+     "message": "Mention négative modérée sur {source}"},
+]
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+class AlertRule:
+    """Règle d'alerte compilée (ValueError si la déclaration est invalide)"""
+
+    def __init__(self, rule: Dict):
+        self.severity = rule["severity"]
+        if self.severity not in SEVERITIES:
+            raise ValueError(f"Unknown alert severity: {self.severity}")
+        self.message = rule["message"]
+        self.sentiments = frozenset(SentimentType(value) for value in _as_list(rule.get("sentiment")))
+        self.max_score = float(rule["max_score"]) if rule.get("max_score") is not None else None
+        self.reasons = frozenset(ReasonType(value) for value in _as_list(rule.get("reasons")))
+        self.critical_keywords = bool(rule.get("critical_keywords", False))
+        unknown = set(rule) - {"severity", "message", "sentiment", "max_score", "reasons", "critical_keywords"}
+        if unknown:
+            raise ValueError(f"Unknown alert rule fields: {sorted(unknown)}")
+
+    def matches(self, mention: Mention, has_critical_keyword: Callable[[], bool]) -> bool:
+        if self.sentiments and mention.sentiment not in self.sentiments:
+            return False
+        if self.max_score is not None and not (mention.sentiment_score or 0.0) < self.max_score:
+            return False
+        if self.reasons and mention.reason not in self.reasons:
+            return False
+        # Recherche des mots-clés critiques en dernier: seulement si nécessaire
+        return not self.critical_keywords or has_critical_keyword()
+
+
+class AlertRuleSet:
+    """Règles d'alerte ordonnées, compilées une seule fois"""
+
+    def __init__(self, rules: Iterable[Dict]):
+        self.rules = [AlertRule(rule) for rule in rules]
+
+    def evaluate(self, mention: Mention, has_critical_keyword: Callable[[], bool]) -> Optional[Tuple[str, str]]:
+        """(sévérité, message) de la première règle satisfaite, None sinon"""
+        for rule in self.rules:
+            if rule.matches(mention, has_critical_keyword):
+                return rule.severity, rule.message.format(source=mention.source.value)
+        return None
+
+
+DEFAULT_ALERT_RULESET = AlertRuleSet(DEFAULT_ALERT_RULES)
+
+
 class AlertService:
     def __init__(self, db: Session):
         self.db = db
     
-    def check_and_create_alert(self, mention: Mention):
-        """Vérifier si une mention nécessite une alerte et la créer si nécessaire"""
-        try:
-            # Critères pour créer une alerte
-            severity = None
-            message = ""
-            
-            # Alerte critique: sentiment très négatif
-            if mention.sentiment.value == "negative" and mention.sentiment_score < -0.7:
-                severity = "critical"
-                message = f"Mention très négative détectée sur {mention.source.value}"
-            
-            # Alerte haute: sentiment négatif avec score élevé
-            elif mention.sentiment.value == "negative" and mention.sentiment_score < -0.5:
-                severity = "high"
-                message = f"Mention négative détectée sur {mention.source.value}"
-            
-            # Alerte moyenne: sentiment négatif modéré
-            elif mention.sentiment.value == "negative":
-                severity = "medium"
-                message = f"Mention négative modérée sur {mention.source.value}"
-            
-            # Vérifier les mots-clés critiques dans le contenu
-            critical_keywords = ["scandale", "crise", "problème grave", "erreur critique", 
-                               "bug majeur", "défaillance", "incident"]
-            content_lower = mention.content.lower()
-            
-            if any(keyword in content_lower for keyword in critical_keywords):
-                if severity != "critical":
-                    severity = "high"
-                    message = f"Mention contenant des mots-clés critiques sur {mention.source.value}"
-            
-            # Créer l'alerte si nécessaire
-            if severity:
-                alert = Alert(
-                    mention_id=mention.id,
-                    severity=severity,
-                    message=message
-                )
-                self.db.add(alert)
-                self.db.commit()
-                logger.info(f"Alert created for mention {mention.id}: {severity}")
-        
-        except Exception as e:
-            logger.error(f"Error creating alert: {e}")
-            self.db.rollback()
+    @staticmethod
+    def evaluate(mention: Mention, pack=None) -> Optional[Tuple[str, str]]:
+        """
+        Appliquer les règles d'alerte à une mention (sans écrire en base)
+        pack: pack de mots-clés de l'entité (règles et mots-clés critiques propres au domaine)
+        Retourne (sévérité, message) ou None si aucune alerte n'est nécessaire
+        """
+        if pack is not None:
+            rules = pack.alert_rules
+            has_critical_keyword = lambda: pack.pipeline.analyze(mention.content).has(CRITICAL_VOCABULARY)
+        else:
+            rules = DEFAULT_ALERT_RULESET
+            has_critical_keyword = lambda: bool(CRITICAL_MATCHER.find(normalize_text(mention.content)))
+        return rules.evaluate(mention, has_critical_keyword)
+    
+    @staticmethod
+    def evaluate_batch(mentions: List[Mention], pack=None) -> List[Optional[Tuple[str, str]]]:
+        """Appliquer les règles d'alerte à une liste de mentions (d'une même entité si pack est fourni)"""
+        return [AlertService.evaluate(mention, pack) for mention in mentions]
+    
+    def create_alerts(self, mentions: List[Mention], pack=None) -> int:
+        """
+        Créer les alertes nécessaires pour des mentions flushées (avec un id),
+        en un seul INSERT dans la transaction de l'appelant (commit à sa charge),
+        avec la signature de leur solution, et les rattacher à leurs incidents.
+        Retourne le nombre d'alertes créées.
+        """
+        rows = [
+            {
+                "mention_id": mention.id,
+                "entity_id": mention.entity_id,
+                "reason": mention.reason,
+                "severity": result[0],
+                "message": result[1],
+                "solution_signature": SolutionGenerator.solution_signature(mention, pack),
+            }
+            for mention, result in zip(mentions, self.evaluate_batch(mentions, pack))
+            if result
+        ]
+        if rows:
+            insert_alerts(self.db, rows)
+            logger.info(f"{len(rows)} alert(s) created for {len(mentions)} mention(s)")
+        return len(rows)
+    
+    def check_and_create_alert(self, mention: Mention, pack=None):
+        """Vérifier si une mention nécessite une alerte et la créer si nécessaire (commit à la charge de l'appelant)"""
+        self.create_alerts([mention], pack)
     
     def get_active_alerts_count(self) -> int:
         """Obtenir le nombre d'alertes actives"""
-        return self.db.query(Alert).filter(Alert.is_resolved == False).count()
+        return active_alerts_count(self.db)
     
     def get_critical_alerts(self, limit: int = 10):
         """Obtenir les alertes critiques"""
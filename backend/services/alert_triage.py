@@ -0,0 +1,101 @@
+"""
+Actions groupées sur les alertes (résolution, prise en charge)
+
+Une sélection (liste d'id et / ou filtres: entité, sévérité, incident,
+période) est traduite en une sous-requête d'id, puis appliquée par une seule
+instruction: UPDATE pour la résolution, INSERT ... SELECT pour la prise en
+charge. Aucune solution n'est générée par alerte; les compteurs d'alertes
+ouvertes, les incidents et le flux d'événements sont mis à jour dans la même
+transaction.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import String, literal, select, update
+from sqlalchemy.orm import Session
+
+from database import dialect_insert
+from models import Alert, AlertAcknowledgement, Mention
+from services.alert_counters import adjust_counters, count_changes
+from services.event_bus import ALERTS_RESOLVED, queue_event
+from services.incidents import release_alerts
+
+logger = logging.getLogger(__name__)
+
+SELECTION_FILTERS = ("ids", "entity_id", "severity", "incident_id", "created_before", "created_after")
+
+
+def select_alert_ids(
+    ids: Optional[List[int]] = None,
+    entity_id: Optional[int] = None,
+    severity: Optional[str] = None,
+    incident_id: Optional[int] = None,
+    created_before: Optional[datetime] = None,
+    created_after: Optional[datetime] = None,
+    resolved: Optional[bool] = False
+):
+    """Sous-requête des id d'alertes d'une sélection (alertes ouvertes par défaut)"""
+    query = select(Alert.id)
+    if ids is not None:
+        query = query.where(Alert.id.in_(ids))
+    if entity_id is not None:
+        query = query.join(Mention, Mention.id == Alert.mention_id).where(Mention.entity_id == entity_id)
+    if incident_id is not None:
+        query = query.where(Alert.incident_id == incident_id)
+    if severity:
+        query = query.where(Alert.severity == severity)
+    if created_before is not None:
+        query = query.where(Alert.created_at < created_before)
+    if created_after is not None:
+        query = query.where(Alert.created_at >= created_after)
+    if resolved is not None:
+        query = query.where(Alert.is_resolved == resolved)
+    return query
+
+
+def bulk_resolve(db: Session, **selection) -> int:
+    """Résoudre les alertes ouvertes d'une sélection (un seul UPDATE); retourne leur nombre"""
+    alerts = Alert.__table__
+    resolved = db.execute(
+        update(alerts)
+        .where(alerts.c.id.in_(select_alert_ids(**selection).scalar_subquery()))
+        .values(is_resolved=True, resolved_at=datetime.utcnow())
+        .returning(alerts.c.id, alerts.c.mention_id, alerts.c.severity, alerts.c.incident_id)
+    ).all()
+    if not resolved:
+        return 0
+
+    entities = dict(db.query(Mention.id, Mention.entity_id).filter(
+        Mention.id.in_({row.mention_id for row in resolved})
+    ))
+    by_entity: Dict[int, List[int]] = defaultdict(list)
+    for row in resolved:
+        by_entity[entities.get(row.mention_id)].append(row.id)
+    adjust_counters(db, count_changes(((entities.get(row.mention_id), row.severity) for row in resolved), sign=-1))
+    release_alerts(db, ((row.incident_id, row.severity) for row in resolved))
+    for entity_id, alert_ids in by_entity.items():
+        queue_event(db, ALERTS_RESOLVED, {"entity_id": entity_id, "alert_ids": alert_ids})
+    logger.info(f"{len(resolved)} alert(s) resolved in bulk")
+    return len(resolved)
+
+
+def bulk_acknowledge(db: Session, acknowledged_by: Optional[str] = None, **selection) -> int:
+    """
+    Prendre en charge les alertes ouvertes d'une sélection (un seul INSERT ... SELECT);
+    les alertes déjà prises en charge sont ignorées. Retourne le nombre d'alertes prises en charge.
+    """
+    ids = select_alert_ids(**selection).where(
+        ~select(AlertAcknowledgement.alert_id).where(AlertAcknowledgement.alert_id == Alert.id).exists()
+    )
+    source = ids.add_columns(
+        literal(acknowledged_by, String).label("acknowledged_by"),
+        literal(datetime.utcnow()).label("acknowledged_at")
+    )
+    statement = dialect_insert(db, AlertAcknowledgement.__table__).from_select(
+        ["alert_id", "acknowledged_by", "acknowledged_at"], source
+    ).on_conflict_do_nothing()
+    acknowledged = db.execute(statement).rowcount
+    logger.info(f"{acknowledged} alert(s) acknowledged in bulk")
+    return acknowledged
@@ -0,0 +1,220 @@
+"""
+Cache des résultats d'analyse (sentiment + raison) indexé par empreinte du contenu.
+
+Deux niveaux: un LRU en mémoire partagé par le processus, puis la table
+analysis_cache lorsque une session est fournie. Les contenus repris ou
+syndiqués (retweets, dépêches) ne sont ainsi analysés qu'une seule fois.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from database import dialect_insert
+from models import AnalysisResult
+from services.keyword_packs import DEFAULT_PACK, KeywordPack
+from services.language_detector import detect_language
+from services.reason_classifier import CLASSIFIER_VERSION, determine_reason
+from services.sentiment_analyzer import SentimentAnalyzer
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", 10000))
+# Nombre de lignes par INSERT multi-valeurs (limite de variables SQLite)
+_INSERT_CHUNK_SIZE = 500
+
+_RETWEET_PREFIX = re.compile(r"^rt @\w+:\s*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_content(text: str) -> str:
+    """Normaliser un contenu avant calcul de l'empreinte (casse, Unicode, espaces, préfixe RT)"""
+    text = unicodedata.normalize("NFKC", text or "").lower().strip()
+    text = _RETWEET_PREFIX.sub("", text)
+    return _WHITESPACE.sub(" ", text)
+
+
+def content_hash(text: str) -> str:
+    """Empreinte SHA-256 du contenu normalisé"""
+    return hashlib.sha256(normalize_content(text).encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """LRU thread-safe des résultats d'analyse"""
+
+    def __init__(self, maxsize: int = ANALYSIS_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[Dict]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: Dict):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+memory_cache = AnalysisCache()
+_default_analyzer: Optional[SentimentAnalyzer] = None
+
+
+def _get_default_analyzer() -> SentimentAnalyzer:
+    global _default_analyzer
+    if _default_analyzer is None:
+        _default_analyzer = SentimentAnalyzer()
+    return _default_analyzer
+
+
+def _to_row(digest: str, version: str, result: Dict) -> Dict:
+    return {
+        "content_hash": digest,
+        "analyzer_version": version,
+        "sentiment": result["sentiment"],
+        "sentiment_score": result["score"],
+        "confidence": json.dumps(result.get("confidence")),
+        "reason": result["reason"],
+        "reason_detail": result["reason_detail"],
+    }
+
+
+def _from_row(row: AnalysisResult) -> Dict:
+    return {
+        "sentiment": row.sentiment,
+        "score": row.sentiment_score,
+        "confidence": json.loads(row.confidence) if row.confidence else None,
+        "reason": row.reason,
+        "reason_detail": row.reason_detail,
+    }
+
+
+def analyze_contents(
+    texts: List[str],
+    db: Optional[Session] = None,
+    analyzer: Optional[SentimentAnalyzer] = None,
+    language: Optional[str] = None,
+    pack: Optional[KeywordPack] = None
+) -> List[Dict]:
+    """
+    Analyser le sentiment et la raison d'une liste de textes en passant par le cache.
+    La langue de chaque texte est détectée (sauf si imposée) et les textes sont
+    regroupés par langue afin que chaque appel à l'analyseur soit homogène.
+    pack: pack de mots-clés de l'entité (pack par défaut si absent).
+    Retourne, dans l'ordre d'entrée: {sentiment, score, confidence, reason, reason_detail, language}.
+    Les nouveaux résultats sont ajoutés à la session fournie (commit à la charge de l'appelant).
+    """
+    if not texts:
+        return []
+    analyzer = analyzer or _get_default_analyzer()
+    pack = pack or DEFAULT_PACK
+    if language:
+        languages = [language] * len(texts)
+    else:
+        # Un seul passage du pipeline de texte par contenu: ses mots servent à la
+        # détection de langue, ses occurrences au sentiment et à la raison
+        languages = [
+            detect_language(text, tokens=features.tokens)
+            for text, features in zip(texts, pack.pipeline.analyze_batch(texts))
+        ]
+
+    by_language: Dict[str, List[int]] = {}
+    for index, text_language in enumerate(languages):
+        by_language.setdefault(text_language, []).append(index)
+
+    results: List[Optional[Dict]] = [None] * len(texts)
+    for text_language, indices in by_language.items():
+        analyses = _analyze_language_group([texts[i] for i in indices], text_language, db, analyzer, pack)
+        for index, analysis in zip(indices, analyses):
+            analysis["language"] = text_language
+            results[index] = analysis
+    return results
+
+
+def _analyze_language_group(
+    texts: List[str],
+    language: str,
+    db: Optional[Session],
+    analyzer: SentimentAnalyzer,
+    pack: KeywordPack
+) -> List[Dict]:
+    """Analyser, via le cache, des textes d'une même langue"""
+    version = f"{analyzer.version}/{CLASSIFIER_VERSION}/{pack.version}/{language}"
+    digests = [content_hash(text) for text in texts]
+
+    results: Dict[str, Dict] = {}
+    for digest in set(digests):
+        cached = memory_cache.get((version, digest))
+        if cached is not None:
+            results[digest] = cached
+
+    missing = [digest for digest in set(digests) if digest not in results]
+    if missing and db is not None:
+        rows = db.query(AnalysisResult).filter(
+            AnalysisResult.analyzer_version == version,
+            AnalysisResult.content_hash.in_(missing)
+        ).all()
+        for row in rows:
+            results[row.content_hash] = _from_row(row)
+            memory_cache.put((version, row.content_hash), results[row.content_hash])
+
+    # Analyser une seule fois chaque contenu absent des deux niveaux de cache
+    pending: Dict[str, str] = {}
+    for digest, text in zip(digests, texts):
+        if digest not in results and digest not in pending:
+            pending[digest] = text
+
+    if pending:
+        analyses = analyzer.analyze_batch(list(pending.values()), language, pack)
+        new_rows = []
+        for (digest, text), analysis in zip(pending.items(), analyses):
+            reason_enum, reason_detail = determine_reason(text, pack=pack)
+            result = {
+                "sentiment": analysis["sentiment"],
+                "score": analysis["score"],
+                "confidence": analysis.get("confidence"),
+                "reason": reason_enum,
+                "reason_detail": reason_detail,
+            }
+            results[digest] = result
+            # Ne pas mémoriser un résultat de repli sous la version du backend principal
+            if analysis.get("backend") == analyzer.backend:
+                memory_cache.put((version, digest), result)
+                new_rows.append(_to_row(digest, version, result))
+
+        if new_rows and db is not None:
+            try:
+                # Savepoint: un échec n'annule que l'écriture du cache, pas la transaction de l'appelant
+                with db.begin_nested():
+                    for i in range(0, len(new_rows), _INSERT_CHUNK_SIZE):
+                        db.execute(
+                            dialect_insert(db, AnalysisResult.__table__)
+                            .values(new_rows[i:i + _INSERT_CHUNK_SIZE])
+                            .on_conflict_do_nothing()
+                        )
+            except Exception as e:
+                logger.error(f"Error persisting analysis cache: {e}")
+
+    return [dict(results[digest]) for digest in digests]
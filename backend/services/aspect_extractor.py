@@ -0,0 +1,125 @@
+"""
+Extraction des aspects d'un avis avec une polarité par aspect
+
+Un avis comme "camera good, battery bad" est découpé en propositions
+(ponctuation, "but" / "mais"...). Dans chaque proposition, les mots-clés de
+raison désignent les aspects et les mots du lexique de sentiment donnent la
+polarité (inversée en présence d'une négation). Un aspect sans mot polarisé
+hérite du sentiment global de la mention.
+
+Avec un pack de mots-clés, les propositions sont délimitées sur le texte
+normalisé du pipeline partagé et les mots-clés de chacune sont lus parmi les
+occurrences déjà trouvées (aucun nouveau passage sur le texte).
+"""
+import re
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from models import ReasonType, SentimentType
+from services.keyword_matcher import normalize_text, tokenize
+from services.reason_classifier import REASON_MATCHER
+from services.sentiment_analyzer import FALLBACK_MATCHERS, count_sentiment
+from services.text_pipeline import NEGATION_VOCABULARY, REASON_VOCABULARY
+
+_CLAUSE_SEPARATOR = re.compile(
+    r"[.,;:!?\n]+|\b(?:but|however|though|although|whereas|mais|cependant|pourtant|alors que)\b"
+)
+NEGATIONS = {
+    "not", "no", "never", "t", "nothing", "without",
+    "pas", "jamais", "aucun", "aucune", "sans", "ni", "rien",
+}
+SENTIMENT_SCORES = {
+    SentimentType.POSITIVE: 1.0,
+    SentimentType.NEUTRAL: 0.0,
+    SentimentType.NEGATIVE: -1.0,
+}
+
+
+def _clause_spans(text_normalized: str) -> List[Tuple[int, int, str]]:
+    """Propositions d'un texte normalisé: (début, fin, proposition)"""
+    spans = []
+    start = 0
+    for separator in [*_CLAUSE_SEPARATOR.finditer(text_normalized), None]:
+        end = separator.start() if separator else len(text_normalized)
+        clause = text_normalized[start:end].strip()
+        if clause:
+            spans.append((start, end, clause))
+        if separator:
+            start = separator.end()
+    return spans
+
+
+def split_clauses(text: str) -> List[str]:
+    """Découper un texte en propositions"""
+    return [clause for _, _, clause in _clause_spans(normalize_text(text))]
+
+
+def _polarity(counts: Counter, negated: bool) -> Optional[float]:
+    """Polarité dans [-1, 1] à partir des mots polarisés, None s'il n'y en a aucun"""
+    positive = counts[SentimentType.POSITIVE]
+    negative = counts[SentimentType.NEGATIVE]
+    if not positive and not negative:
+        return None
+    polarity = (positive - negative) / (positive + negative)
+    return -polarity if negated else polarity
+
+
+def _clause_aspects(text: str, language: Optional[str], pack=None) -> Iterator[Tuple[str, Optional[float], List]]:
+    """Propositions contenant des aspects: (proposition, polarité ou None, aspects par occurrence)"""
+    if pack is not None:
+        features = pack.pipeline.analyze(text)
+        if not features.has(REASON_VOCABULARY):
+            return
+        for start, end, clause in _clause_spans(features.text):
+            occurrences = features.occurrences(REASON_VOCABULARY, start, end)
+            if not occurrences:
+                continue
+            counts = count_sentiment(features, language, pack.sentiment_languages, start, end, distinct=False)
+            negated = bool(features.occurrences(NEGATION_VOCABULARY, start, end))
+            yield clause, _polarity(counts, negated), [aspect for _, _, aspect in occurrences]
+        return
+
+    matcher = FALLBACK_MATCHERS.get(language) or FALLBACK_MATCHERS[None]
+    for clause in split_clauses(text):
+        keywords = REASON_MATCHER.find(clause)
+        if not keywords:
+            continue
+        negated = bool(NEGATIONS.intersection(tokenize(clause)))
+        polarity = _polarity(matcher.count_labels(clause, distinct=False), negated)
+        yield clause, polarity, [aspect for keyword in keywords for aspect in REASON_MATCHER.labels(keyword)]
+
+
+def extract_aspects(
+    text: str,
+    language: Optional[str] = "fr",
+    default_sentiment: SentimentType = SentimentType.NEUTRAL,
+    pack=None
+) -> List[Dict]:
+    """
+    Aspects détectés dans un texte, un par catégorie:
+    {aspect: ReasonType, sentiment: SentimentType, score: float, hits: int}
+    pack: pack de mots-clés de l'entité (aspects et vocabulaire du domaine)
+    """
+    aspects: Dict[ReasonType, Dict] = {}
+    for clause, polarity, clause_aspects in _clause_aspects(text, language, pack):
+        if polarity is None:
+            polarity = SENTIMENT_SCORES[default_sentiment]
+        for aspect in clause_aspects:
+            entry = aspects.setdefault(aspect, {"hits": 0, "clauses": set(), "polarity": 0.0})
+            entry["hits"] += 1
+            # Une proposition ne compte qu'une fois dans la polarité d'un aspect
+            if clause not in entry["clauses"]:
+                entry["clauses"].add(clause)
+                entry["polarity"] += polarity
+
+    results = []
+    for aspect, entry in aspects.items():
+        score = round(entry["polarity"] / len(entry["clauses"]), 3)
+        if score > 0:
+            sentiment = SentimentType.POSITIVE
+        elif score < 0:
+            sentiment = SentimentType.NEGATIVE
+        else:
+            sentiment = SentimentType.NEUTRAL
+        results.append({"aspect": aspect, "sentiment": sentiment, "score": score, "hits": entry["hits"]})
+    return results
@@ -0,0 +1,137 @@
+"""
+Disjoncteur (circuit breaker) pour les appels à un service externe
+
+États:
+- closed: les appels passent; les échecs consécutifs sont comptés
+- open: après failure_threshold échecs, les appels sont refusés immédiatement
+  pendant reset_timeout secondes (l'appelant utilise son repli)
+- half_open: passé ce délai, un seul appel de test est autorisé; un succès
+  referme le circuit, un échec le rouvre
+
+Un appel plus lent que le budget de latence compte comme un échec.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Disjoncteur thread-safe avec budget de latence et métriques"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 latency_budget: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latency_budget = latency_budget
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._metrics = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "slow_calls": 0,
+            "rejected": 0,
+            "opened": 0,
+        }
+        self._total_latency = 0.0
+        self._last_failure: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        # Appelé sous verrou: open devient half_open une fois le délai écoulé
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Indiquer si un appel peut être tenté (sinon l'appelant doit utiliser son repli)"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._metrics["rejected"] += 1
+            return False
+
+    def record_success(self, latency: float):
+        """Enregistrer un appel réussi (un appel hors budget compte comme un échec)"""
+        if self.latency_budget is not None and latency > self.latency_budget:
+            with self._lock:
+                self._metrics["slow_calls"] += 1
+            self.record_failure(latency, f"latency {latency:.2f}s over budget {self.latency_budget:.2f}s")
+            return
+        with self._lock:
+            self._metrics["calls"] += 1
+            self._metrics["successes"] += 1
+            self._total_latency += latency
+            if self._state != CLOSED:
+                logger.info(f"Circuit {self.name} closed after successful probe")
+            self._state = CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, latency: float, error: Optional[str] = None):
+        """Enregistrer un appel en échec"""
+        with self._lock:
+            self._metrics["calls"] += 1
+            self._metrics["failures"] += 1
+            self._total_latency += latency
+            self._last_failure = error
+            self._consecutive_failures += 1
+            state = self._current_state()
+            if state == HALF_OPEN or (state == CLOSED and self._consecutive_failures >= self.failure_threshold):
+                logger.warning(
+                    f"Circuit {self.name} opened for {self.reset_timeout:.0f}s "
+                    f"after {self._consecutive_failures} failure(s): {error}"
+                )
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+                self._metrics["opened"] += 1
+
+    def reset(self):
+        """Refermer le circuit et remettre les métriques à zéro"""
+        with self._lock:
+            self._state = CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            self._total_latency = 0.0
+            self._last_failure = None
+            for key in self._metrics:
+                self._metrics[key] = 0
+
+    def snapshot(self) -> Dict:
+        """État et métriques du disjoncteur (exposés par /health)"""
+        with self._lock:
+            state = self._current_state()
+            calls = self._metrics["calls"]
+            return {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                **self._metrics,
+                "avg_latency_ms": round(1000 * self._total_latency / calls, 1) if calls else None,
+                "latency_budget_ms": round(1000 * self.latency_budget) if self.latency_budget else None,
+                "retry_in_s": (
+                    round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1)
+                    if state == OPEN else None
+                ),
+                "last_failure": self._last_failure,
+            }
@@ -14,7 +14,9 @@ import time
 from models import Entity, Mention, SourceType
 from services.sentiment_analyzer import SentimentAnalyzer
 from services.alert_service import AlertService
-from services.reason_classifier import determine_reason
+from services.analysis_cache import analyze_contents
+from services.ingestion import on_mentions_ingested
+from services.keyword_packs import get_pack_for_entity_id
 
 logger = logging.getLogger(__name__)
 
@@ -93,16 +95,16 @@ class DataCollector:
                     data = response.json()
                     articles = data.get("articles", [])
                     
-                    for article in articles:
-                        if self._save_mention(
-                            entity_id=entity_id,
-                            content=article.get("title", "") + " " + article.get("description", ""),
-                            source=SourceType.NEWS,
-                            source_url=article.get("url"),
-                            author=article.get("source", {}).get("name"),
-                            published_at=self._parse_date(article.get("publishedAt"))
-                        ):
-                            count += 1
+                    count += self._save_mentions(entity_id, [
+                        {
+                            "content": (article.get("title") or "") + " " + (article.get("description") or ""),
+                            "source": SourceType.NEWS,
+                            "source_url": article.get("url"),
+                            "author": (article.get("source") or {}).get("name"),
+                            "published_at": self._parse_date(article.get("publishedAt"))
+                        }
+                        for article in articles
+                    ])
                 
                 time.sleep(0.5)  # Rate limiting
                 
@@ -133,16 +135,16 @@ class DataCollector:
                     data = response.json()
                     tweets = data.get("data", [])
                     
-                    for tweet in tweets:
-                        if self._save_mention(
-                            entity_id=entity_id,
-                            content=tweet.get("text", ""),
-                            source=SourceType.TWITTER,
-                            source_url=f"https://twitter.com/i/web/status/{tweet.get('id')}",
-                            author=f"user_{tweet.get('author_id')}",
-                            published_at=self._parse_date(tweet.get("created_at"))
-                        ):
-                            count += 1
+                    count += self._save_mentions(entity_id, [
+                        {
+                            "content": tweet.get("text", ""),
+                            "source": SourceType.TWITTER,
+                            "source_url": f"https://twitter.com/i/web/status/{tweet.get('id')}",
+                            "author": f"user_{tweet.get('author_id')}",
+                            "published_at": self._parse_date(tweet.get("created_at"))
+                        }
+                        for tweet in tweets
+                    ])
                 
                 time.sleep(1)  # Rate limiting Twitter
                 
@@ -191,19 +193,18 @@ class DataCollector:
                 response = requests.get(url, headers=headers, params=params, timeout=10)
                 if response.status_code == 200:
                     data = response.json()
-                    posts = data.get("data", {}).get("children", [])
+                    posts = [post_data.get("data", {}) for post_data in data.get("data", {}).get("children", [])]
                     
-                    for post_data in posts:
-                        post = post_data.get("data", {})
-                        if self._save_mention(
-                            entity_id=entity_id,
-                            content=post.get("title", "") + " " + post.get("selftext", ""),
-                            source=SourceType.REDDIT,
-                            source_url=f"https://reddit.com{post.get('permalink', '')}",
-                            author=post.get("author"),
-                            published_at=datetime.fromtimestamp(post.get("created_utc", 0))
-                        ):
-                            count += 1
+                    count += self._save_mentions(entity_id, [
+                        {
+                            "content": post.get("title", "") + " " + post.get("selftext", ""),
+                            "source": SourceType.REDDIT,
+                            "source_url": f"https://reddit.com{post.get('permalink', '')}",
+                            "author": post.get("author"),
+                            "published_at": datetime.fromtimestamp(post.get("created_utc", 0))
+                        }
+                        for post in posts
+                    ])
                 
                 time.sleep(1)
                 
@@ -229,59 +230,76 @@ class DataCollector:
         
         return count
     
-    def _save_mention(
-        self,
-        entity_id: int,
-        content: str,
-        source: SourceType,
-        source_url: Optional[str],
-        author: Optional[str],
-        published_at: datetime
-    ) -> bool:
-        """Sauvegarder une mention dans la base de données"""
+    def _save_mentions(self, entity_id: int, items: List[Dict]) -> int:
+        """
+        Sauvegarder une page de mentions dans la base de données.
+        Le sentiment de toute la page est analysé en un seul appel batch.
+        Retourne le nombre de nouvelles mentions.
+        """
         try:
-            # Vérifier si la mention existe déjà (éviter les doublons)
-            existing = self.db.query(Mention).filter(
-                Mention.entity_id == entity_id,
-                Mention.source_url == source_url,
-                Mention.source == source
-            ).first()
+            # Vérifier les mentions déjà existantes (éviter les doublons)
+            urls = [item["source_url"] for item in items if item.get("source_url")]
+            existing = set()
+            if urls:
+                existing = {
+                    (source, source_url)
+                    for source, source_url in self.db.query(Mention.source, Mention.source_url).filter(
+                        Mention.entity_id == entity_id,
+                        Mention.source_url.in_(urls)
+                    )
+                }
             
-            if existing:
-                return False
+            new_items = []
+            for item in items:
+                if item.get("source_url"):
+                    key = (item["source"], item["source_url"])
+                    if key in existing:
+                        continue
+                    existing.add(key)
+                new_items.append(item)
             
-            # Analyser le sentiment
-            analysis = self.sentiment_analyzer.analyze_sentiment(content)
-            reason_enum, reason_detail = determine_reason(content)
+            if not new_items:
+                return 0
             
-            # Créer la mention
-            mention = Mention(
-                entity_id=entity_id,
-                content=content[:5000],  # Limiter la longueur
-                source=source,
-                source_url=source_url,
-                author=author,
-                sentiment=analysis["sentiment"],
-                sentiment_score=analysis["score"],
-                reason=reason_enum,
-                reason_detail=reason_detail,
-                published_at=published_at,
-                language="fr"
+            # Analyser le sentiment et la raison de toute la page (via le cache),
+            # avec le pack de mots-clés du domaine de l'entité
+            pack = get_pack_for_entity_id(self.db, entity_id)
+            analyses = analyze_contents(
+                [item["content"] for item in new_items],
+                db=self.db,
+                analyzer=self.sentiment_analyzer,
+                pack=pack
             )
             
-            self.db.add(mention)
-            self.db.commit()
-            self.db.refresh(mention)
+            mentions = []
+            for item, analysis in zip(new_items, analyses):
+                mention = Mention(
+                    entity_id=entity_id,
+                    content=item["content"][:5000],  # Limiter la longueur
+                    source=item["source"],
+                    source_url=item.get("source_url"),
+                    author=item.get("author"),
+                    sentiment=analysis["sentiment"],
+                    sentiment_score=analysis["score"],
+                    reason=analysis["reason"],
+                    reason_detail=analysis["reason_detail"],
+                    published_at=item["published_at"],
+                    language=analysis["language"]
+                )
+                self.db.add(mention)
+                mentions.append(mention)
             
-            # Vérifier si une alerte doit être créée
-            self.alert_service.check_and_create_alert(mention)
+            # Index dérivés et alertes dans la même transaction que les mentions
+            self.db.flush()
+            on_mentions_ingested(self.db, mentions, alerts=True)
+            self.db.commit()
             
-            return True
+            return len(mentions)
             
         except Exception as e:
-            logger.error(f"Error saving mention: {e}")
+            logger.error(f"Error saving mentions: {e}")
             self.db.rollback()
-            return False
+            return 0
     
     def _parse_date(self, date_str: Optional[str]) -> datetime:
         """Parser une date depuis une chaîne"""
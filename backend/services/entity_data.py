@@ -0,0 +1,41 @@
+"""
+Suppression d'une entité et de toutes ses données
+
+Les mentions, leurs alertes et les tables dérivées (incidents, compteurs,
+index de termes...) sont supprimées par des DELETE groupés, dans l'ordre des
+clés étrangères, sans charger les lignes en mémoire. Les suppressions sont
+explicites même là où la contrainte porte ON DELETE CASCADE: une base SQLite
+ouverte sans PRAGMA foreign_keys (ancienne version, autre outil) ne garde
+ainsi aucune ligne orpheline qu'un identifiant réutilisé retrouverait.
+L'état en mémoire du détecteur de pics pour l'entité est oublié.
+Le commit reste à la charge de l'appelant.
+"""
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import (
+    Alert, AlertAcknowledgement, AlertCounter, AlertSolutionSignature, Entity, Incident,
+    InsightSnapshot, Mention, MentionAspect, MentionRollup, TermCount, TermDay
+)
+from services.spike_detector import spike_detector
+
+logger = logging.getLogger(__name__)
+
+
+def purge_entity(db: Session, entity_id: int):
+    """Supprimer une entité, ses mentions, leurs alertes et les données dérivées"""
+    mention_ids = select(Mention.id).where(Mention.entity_id == entity_id).scalar_subquery()
+    alert_ids = select(Alert.id).where(Alert.mention_id.in_(mention_ids)).scalar_subquery()
+
+    for model in (AlertAcknowledgement, AlertSolutionSignature):
+        db.query(model).filter(model.alert_id.in_(alert_ids)).delete(synchronize_session=False)
+    db.query(Alert).filter(Alert.id.in_(alert_ids)).delete(synchronize_session=False)
+    db.query(Incident).filter(Incident.entity_id == entity_id).delete(synchronize_session=False)
+    for model in (MentionAspect, MentionRollup, AlertCounter, TermCount, TermDay, InsightSnapshot):
+        db.query(model).filter(model.entity_id == entity_id).delete(synchronize_session=False)
+    mentions = db.query(Mention).filter(Mention.entity_id == entity_id).delete(synchronize_session=False)
+    db.query(Entity).filter(Entity.id == entity_id).delete(synchronize_session=False)
+    spike_detector.forget_entity(entity_id)
+    logger.info(f"Entity {entity_id} deleted with {mentions} mention(s)")
@@ -0,0 +1,130 @@
+"""
+Bus d'événements en mémoire pour la diffusion des alertes (Server-Sent Events)
+
+Les événements (alerte créée, alerte(s) résolue(s), incident résolu) sont mis en
+attente dans la session qui les produit (queue_event) et publiés seulement
+après son commit: un client ne reçoit jamais une alerte annulée par un
+rollback. Chaque événement reçoit un id croissant; les EVENT_BUFFER_SIZE
+derniers sont gardés pour qu'un client reconnecté reprenne après son
+dernier id (en-tête Last-Event-ID).
+
+Le bus est propre au processus: avec plusieurs workers, un client ne reçoit
+que les événements des écritures faites par le worker qui le sert.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", 1000))
+# Événements en attente par abonné avant de le déconnecter (client trop lent)
+EVENT_SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENT_SUBSCRIBER_QUEUE_SIZE", 1000))
+
+ALERT_CREATED = "alert.created"
+ALERT_RESOLVED = "alert.resolved"
+ALERTS_RESOLVED = "alerts.resolved"  # Résolution groupée: alert_ids par entité
+INCIDENT_RESOLVED = "incident.resolved"
+
+# Événement: (id, type, données); les données contiennent toujours entity_id
+Event = Tuple[int, str, Dict]
+
+
+class Subscription:
+    """File d'événements d'un client, alimentée depuis n'importe quel thread"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, entity_id: Optional[int]):
+        self.loop = loop
+        self.entity_id = entity_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=EVENT_SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def accepts(self, item: Event) -> bool:
+        return self.entity_id is None or item[2].get("entity_id") == self.entity_id
+
+    def _put(self, item: Event):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Flux fermé une fois la file vidée: le client reprendra depuis son dernier id
+            self.overflowed = True
+            logger.warning("Event subscriber too slow, closing its stream")
+
+    def push(self, item: Event):
+        self.loop.call_soon_threadsafe(self._put, item)
+
+
+class EventBus:
+    """Publication / abonnement en mémoire, avec historique borné"""
+
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._history: deque = deque(maxlen=buffer_size)
+        self._subscribers: List[Subscription] = []
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def publish(self, kind: str, data: Dict) -> int:
+        with self._lock:
+            item = (next(self._ids), kind, data)
+            self._last_id = item[0]
+            self._history.append(item)
+            subscribers = [subscriber for subscriber in self._subscribers if subscriber.accepts(item)]
+        for subscriber in subscribers:
+            subscriber.push(item)
+        return item[0]
+
+    def subscribe(self, entity_id: Optional[int] = None, last_event_id: Optional[int] = None) -> Tuple[Subscription, Optional[List[Event]]]:
+        """
+        S'abonner aux événements (d'une entité, ou de toutes), depuis la boucle asyncio du client.
+        Retourne l'abonnement et les événements manqués depuis last_event_id, ou None
+        s'ils ne sont plus disponibles (historique dépassé, redémarrage): le client doit
+        alors recharger son état.
+        """
+        subscription = Subscription(asyncio.get_running_loop(), entity_id)
+        with self._lock:
+            self._subscribers.append(subscription)
+            if last_event_id is None:
+                return subscription, []
+            oldest = self._history[0][0] if self._history else self._last_id + 1
+            if last_event_id > self._last_id or last_event_id < oldest - 1:
+                return subscription, None
+            missed = [item for item in self._history if item[0] > last_event_id and subscription.accepts(item)]
+        return subscription, missed
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+
+event_bus = EventBus()
+
+
+def queue_event(db: Session, kind: str, data: Dict):
+    """Mettre un événement en attente: publié au commit de la session, abandonné en cas de rollback"""
+    db.info.setdefault("pending_events", []).append((kind, data))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session):
+    for kind, data in session.info.pop("pending_events", ()):
+        event_bus.publish(kind, data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop("pending_events", None)
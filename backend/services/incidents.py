@@ -0,0 +1,220 @@
+"""
+Regroupement des alertes en incidents
+
+Pendant une crise, chaque mention négative produit sa propre alerte. Les
+alertes d'une même entité et d'une même raison sont rattachées à un incident
+ouvert tant qu'elles arrivent moins de INCIDENT_WINDOW_MINUTES minutes après
+la dernière alerte de l'incident; au-delà (ou après sa résolution) un nouvel
+incident est ouvert. L'appartenance est portée par la colonne alerts.incident_id
+(renseignée par l'INSERT de l'alerte) et les compteurs de l'incident (alertes
+non résolues, total et par sévérité) sont modifiés sur place par un UPDATE, sans
+relire ses alertes: incrémentés à la création, décrémentés à la résolution d'une
+alerte. Un incident dont toutes les alertes sont résolues est résolu.
+
+Toutes les créations d'alertes du service passent par insert_alerts
+(un INSERT groupé, dans la transaction de l'appelant), qui publie aussi les
+événements "alert.created" du flux /api/alerts/stream après le commit.
+"""
+import logging
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from models import Alert, AlertKind, Incident, ReasonType
+from services.alert_counters import adjust_counters, count_changes
+from services.event_bus import ALERT_CREATED, INCIDENT_RESOLVED, queue_event
+from services.solution_generator import store_signatures
+
+logger = logging.getLogger(__name__)
+
+INCIDENT_WINDOW_MINUTES = int(os.getenv("INCIDENT_WINDOW_MINUTES", 360))
+SEVERITY_COUNTERS = {
+    "critical": "critical_count",
+    "high": "high_count",
+    "medium": "medium_count",
+    "low": "low_count",
+}
+
+
+def insert_alerts(db: Session, alerts: List[Dict]) -> List[int]:
+    """
+    Créer des alertes en un seul INSERT, les rattacher à leurs incidents et les
+    ajouter aux compteurs d'alertes ouvertes.
+    alerts: {mention_id, severity, message, entity_id, reason[, kind, solution_signature]}
+    Retourne les id des alertes créées, dans l'ordre d'entrée (commit à la charge de l'appelant).
+    """
+    if not alerts:
+        return []
+    alerts = [dict(alert) for alert in alerts]
+    group_alerts(db, alerts)
+    result = db.execute(
+        insert(Alert).returning(Alert.id, sort_by_parameter_order=True),
+        [
+            {
+                "mention_id": alert["mention_id"],
+                "severity": alert["severity"],
+                "message": alert["message"],
+                "kind": alert.get("kind", AlertKind.MENTION.value),
+                "incident_id": alert["incident_id"],
+            }
+            for alert in alerts
+        ]
+    )
+    ids = list(result.scalars())
+    created = [{**alert, "id": alert_id} for alert, alert_id in zip(alerts, ids)]
+    store_signatures(db, {
+        alert["id"]: alert["solution_signature"] for alert in created if alert.get("solution_signature")
+    })
+    adjust_counters(db, count_changes((alert["entity_id"], alert["severity"]) for alert in created))
+    for alert in created:
+        queue_event(db, ALERT_CREATED, {
+            "alert_id": alert["id"],
+            "mention_id": alert["mention_id"],
+            "entity_id": alert["entity_id"],
+            "incident_id": alert["incident_id"],
+            "severity": alert["severity"],
+            "message": alert["message"],
+        })
+    return ids
+
+
+def group_alerts(db: Session, alerts: List[Dict], now: Optional[datetime] = None):
+    """
+    Rattacher des alertes à créer ({severity, message, entity_id, reason}) à leurs
+    incidents, compteurs compris; l'id de l'incident est ajouté à chaque alerte (clé incident_id)
+    """
+    now = now or datetime.utcnow()
+    groups: Dict[Tuple[int, ReasonType], List[Dict]] = {}
+    for alert in alerts:
+        groups.setdefault((alert["entity_id"], alert["reason"] or ReasonType.OTHER), []).append(alert)
+
+    # Incidents encore ouverts et actifs récemment (le plus récent par entité et raison)
+    open_incidents: Dict[Tuple[int, ReasonType], int] = {}
+    for incident in db.query(Incident.id, Incident.entity_id, Incident.reason).filter(
+        Incident.entity_id.in_({entity_id for entity_id, _ in groups}),
+        Incident.is_resolved == False,
+        Incident.last_alert_at >= now - timedelta(minutes=INCIDENT_WINDOW_MINUTES)
+    ).order_by(Incident.last_alert_at):
+        open_incidents[(incident.entity_id, incident.reason)] = incident.id
+
+    for (entity_id, reason), group in groups.items():
+        severities = Counter(alert["severity"] for alert in group)
+        counters = {
+            column: severities[severity] for severity, column in SEVERITY_COUNTERS.items() if severities[severity]
+        }
+        incident_id = open_incidents.get((entity_id, reason))
+        if incident_id is None:
+            incident = Incident(
+                entity_id=entity_id,
+                reason=reason,
+                title=group[0]["message"],
+                alert_count=len(group),
+                started_at=now,
+                last_alert_at=now,
+                **counters
+            )
+            db.add(incident)
+            db.flush()
+            incident_id = incident.id
+            logger.info(f"Incident {incident_id} opened for entity {entity_id}, reason {reason.value}")
+        else:
+            db.execute(
+                update(Incident)
+                .where(Incident.id == incident_id)
+                .values(
+                    alert_count=Incident.alert_count + len(group),
+                    last_alert_at=now,
+                    **{column: getattr(Incident, column) + count for column, count in counters.items()}
+                )
+            )
+        for alert in group:
+            alert["incident_id"] = incident_id
+
+
+def _decrement(db: Session, alerts: Iterable[Tuple[Optional[int], str]]) -> Dict[int, int]:
+    """
+    Retirer des alertes ((incident_id, severity)) des compteurs de leurs incidents;
+    retourne le nombre d'alertes retirées par incident
+    """
+    decrements: Dict[int, Counter] = {}
+    for incident_id, severity in alerts:
+        if incident_id is not None:
+            decrements.setdefault(incident_id, Counter())[severity] += 1
+    for incident_id, severities in decrements.items():
+        values = {"alert_count": Incident.alert_count - sum(severities.values())}
+        for severity, count in severities.items():
+            column = SEVERITY_COUNTERS.get(severity)
+            if column:
+                values[column] = getattr(Incident, column) - count
+        db.execute(update(Incident).where(Incident.id == incident_id).values(**values))
+    return {incident_id: sum(severities.values()) for incident_id, severities in decrements.items()}
+
+
+def detach_alerts(db: Session, alert_ids: List[int]):
+    """Retirer des alertes ouvertes (avant leur suppression) de leurs incidents, compteurs compris"""
+    if not alert_ids:
+        return
+    _decrement(db, db.query(Alert.incident_id, Alert.severity).filter(
+        Alert.id.in_(alert_ids), Alert.incident_id.isnot(None)
+    ).all())
+    db.query(Alert).filter(Alert.id.in_(alert_ids)).update({Alert.incident_id: None}, synchronize_session=False)
+
+
+def release_alerts(db: Session, alerts: Iterable[Tuple[Optional[int], str]]):
+    """
+    Retirer des compteurs de leurs incidents des alertes qui viennent d'être résolues
+    ((incident_id, severity)); les incidents sans alerte ouverte sont résolus
+    """
+    released = _decrement(db, alerts)
+    if not released:
+        return
+    incidents = Incident.__table__
+    closed = db.execute(
+        update(incidents)
+        .where(
+            incidents.c.id.in_(released),
+            incidents.c.alert_count <= 0,
+            incidents.c.is_resolved == False
+        )
+        .values(is_resolved=True, resolved_at=datetime.utcnow())
+        .returning(incidents.c.id, incidents.c.entity_id)
+    ).all()
+    for incident in closed:
+        logger.info(f"Incident {incident.id} resolved with its last open alert")
+        queue_event(db, INCIDENT_RESOLVED, {
+            "incident_id": incident.id,
+            "entity_id": incident.entity_id,
+            "resolved_alerts": released[incident.id],
+        })
+
+
+def resolve_incident(db: Session, incident: Incident) -> int:
+    """
+    Résoudre un incident et toutes ses alertes encore ouvertes (un seul UPDATE),
+    compteurs d'alertes ouvertes compris; retourne le nombre d'alertes résolues
+    """
+    now = datetime.utcnow()
+    alerts = Alert.__table__
+    severities = db.execute(
+        update(alerts)
+        .where(alerts.c.incident_id == incident.id, alerts.c.is_resolved == False)
+        .values(is_resolved=True, resolved_at=now)
+        .returning(alerts.c.severity)
+    ).scalars().all()
+    resolved = len(severities)
+    adjust_counters(db, count_changes(((incident.entity_id, severity) for severity in severities), sign=-1))
+    incident.alert_count = 0
+    for column in SEVERITY_COUNTERS.values():
+        setattr(incident, column, 0)
+    incident.is_resolved = True
+    incident.resolved_at = now
+    queue_event(db, INCIDENT_RESOLVED, {
+        "incident_id": incident.id,
+        "entity_id": incident.entity_id,
+        "resolved_alerts": resolved,
+    })
+    return resolved
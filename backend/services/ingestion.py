@@ -0,0 +1,95 @@
+"""
+Traitements exécutés à l'ingestion de nouvelles mentions
+
+Point d'entrée unique appelé par tous les chemins d'insertion (collecte, API,
+scripts d'import) une fois les mentions ajoutées à la session et flushées:
+les index dérivés des mentions (aspects, compteurs de termes, agrégats de
+volume) sont alimentés, le détecteur de pics est mis à jour et, si demandé,
+les alertes sont créées (règles du pack de chaque entité, pics), dans la même
+transaction.
+Le commit reste à la charge de l'appelant.
+"""
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models import Mention, MentionAspect
+from services.alert_service import AlertService
+from services.aspect_extractor import extract_aspects
+from services.keyword_packs import get_pack_for_entity_id
+from services.rollups import update_rollups
+from services.spike_detector import create_spike_alerts, spike_detector
+from services.term_stats import update_term_counts
+
+logger = logging.getLogger(__name__)
+
+
+def _entity_packs(db: Session, mentions: Iterable[Mention]) -> Dict[int, object]:
+    """Pack de mots-clés de chaque entité des mentions"""
+    return {
+        entity_id: get_pack_for_entity_id(db, entity_id)
+        for entity_id in {mention.entity_id for mention in mentions}
+    }
+
+
+def _aspect_rows(db: Session, mentions: Iterable[Mention], packs: Dict[int, object]) -> List[dict]:
+    rows = []
+    for mention in mentions:
+        pack = packs[mention.entity_id]
+        for aspect in extract_aspects(mention.content, mention.language, mention.sentiment, pack):
+            rows.append({
+                "mention_id": mention.id,
+                "entity_id": mention.entity_id,
+                "day": mention.published_at.date(),
+                **aspect
+            })
+    return rows
+
+
+def index_aspects(db: Session, mentions: List[Mention], packs: Optional[Dict[int, object]] = None):
+    """Enregistrer les aspects (avec polarité) des mentions dans mention_aspects"""
+    rows = _aspect_rows(db, mentions, packs or _entity_packs(db, mentions))
+    if rows:
+        db.execute(insert(MentionAspect), rows)
+
+
+def reindex_aspects(db: Session, mentions: List[Mention]):
+    """Recalculer les aspects de mentions existantes (après réanalyse)"""
+    ids = [mention.id for mention in mentions]
+    if ids:
+        db.query(MentionAspect).filter(MentionAspect.mention_id.in_(ids)).delete(synchronize_session=False)
+    index_aspects(db, mentions)
+
+
+def create_alerts(db: Session, mentions: List[Mention]) -> int:
+    """Évaluer les règles d'alerte par entité et insérer les alertes en un lot par entité"""
+    by_entity: Dict[int, List[Mention]] = {}
+    for mention in mentions:
+        by_entity.setdefault(mention.entity_id, []).append(mention)
+    service = AlertService(db)
+    return sum(
+        service.create_alerts(entity_mentions, get_pack_for_entity_id(db, entity_id))
+        for entity_id, entity_mentions in by_entity.items()
+    )
+
+
+def on_mentions_ingested(db: Session, mentions: List[Mention], alerts: bool = False):
+    """
+    Alimenter les index dérivés de nouvelles mentions.
+    alerts: créer aussi les alertes des mentions (désactivé pour les imports qui
+    fournissent leurs propres alertes)
+    Les mentions doivent avoir un id (session flushée); l'appelant commit.
+    """
+    if not mentions:
+        return
+    packs = _entity_packs(db, mentions)
+    index_aspects(db, mentions, packs)
+    update_term_counts(db, mentions, packs)
+    # Le détecteur lit les agrégats antérieurs: à appeler avant leur mise à jour
+    spikes = spike_detector.observe(db, mentions)
+    update_rollups(db, mentions)
+    if alerts:
+        create_alerts(db, mentions)
+        create_spike_alerts(db, spikes)
@@ -1,16 +1,41 @@
 """
 Synthetic AI insight generator used to showcase how automated recommendations
 could look without calling an external LLM.
+
+Insights are computed with grouped queries (counts per reason and sentiment)
+plus one window query for the sample quotes, for all entities or one entity,
+over the whole history or the last `days` days. They are served from
+precomputed snapshots (insight_snapshots table): a snapshot older than
+INSIGHTS_SNAPSHOT_TTL seconds is still returned, and refreshed in the
+background.
 """
 from __future__ import annotations
 
+import json
+import logging
+import os
+import threading
 from collections import Counter
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from models import Mention, SentimentType, ReasonType
+from database import SessionLocal, dialect_insert
+from models import InsightSnapshot, Mention, SentimentType, ReasonType
+
+logger = logging.getLogger(__name__)
+
+INSIGHTS_SNAPSHOT_TTL = int(os.getenv("INSIGHTS_SNAPSHOT_TTL", 300))
+RECENT_WINDOW_DAYS = 14
+# Windows (days) insights can be requested for: one snapshot per window and scope
+INSIGHT_WINDOWS = (7, 30, 90, 365)
+TOP_REASONS = 5
+
+# Snapshots being refreshed by this process: (entity_id, days)
+_refreshing = set()
+_refreshing_lock = threading.Lock()
 
 
 def _format_reason(reason: ReasonType | None) -> str:
@@ -69,54 +94,144 @@ def _build_recommendation(reason: str, negative_share: float, sample_quote: str
     }
 
 
-def generate_demo_insights(db: Session) -> Dict:
-    mentions: List[Mention] = db.query(Mention).all()
-    if not mentions:
+def _sample_quotes(db: Session, conditions: List) -> Dict[str, str]:
+    """First negative quote (lowest id) per reason, from a single window query."""
+    ranked = select(
+        Mention.id,
+        Mention.reason,
+        Mention.content,
+        func.row_number().over(partition_by=Mention.reason, order_by=Mention.id).label("rank"),
+    ).where(
+        Mention.sentiment == SentimentType.NEGATIVE, Mention.content != "", *conditions
+    ).subquery()
+
+    samples: Dict[str, Tuple[int, str]] = {}
+    for row in db.execute(select(ranked).where(ranked.c.rank == 1)):
+        # None and ReasonType.OTHER are both reported as "other"
+        reason = _format_reason(row.reason)
+        if reason not in samples or row.id < samples[reason][0]:
+            samples[reason] = (row.id, row.content)
+    return {reason: content for reason, (_, content) in samples.items()}
+
+
+def generate_insights(db: Session, entity_id: Optional[int] = None, days: Optional[int] = None) -> Dict:
+    """Insights for all entities or one entity, over all mentions or the last `days` days."""
+    now = datetime.utcnow()
+    conditions = []
+    if entity_id is not None:
+        conditions.append(Mention.entity_id == entity_id)
+    if days:
+        conditions.append(Mention.published_at >= now - timedelta(days=days))
+
+    reason_counter: Counter = Counter()
+    negative_counter: Counter = Counter()
+    sentiments: Counter = Counter()
+    for reason, sentiment, count in db.query(Mention.reason, Mention.sentiment, func.count(Mention.id)).filter(
+        *conditions
+    ).group_by(Mention.reason, Mention.sentiment):
+        reason_counter[_format_reason(reason)] += count
+        sentiments[sentiment] += count
+        if sentiment == SentimentType.NEGATIVE:
+            negative_counter[_format_reason(reason)] += count
+
+    total = sum(sentiments.values())
+    if not total:
         return {
-            "generated_at": datetime.utcnow().isoformat(),
+            "generated_at": now.isoformat(),
             "overview": {"message": "No customer feedback found yet."},
             "recommendations": [],
         }
 
-    total = len(mentions)
-    positive = [m for m in mentions if m.sentiment == SentimentType.POSITIVE]
-    negative = [m for m in mentions if m.sentiment == SentimentType.NEGATIVE]
-    neutral = total - len(positive) - len(negative)
-
-    recent_window = datetime.utcnow() - timedelta(days=14)
-    recent_mentions = [m for m in mentions if m.published_at >= recent_window]
-
-    reason_counter = Counter(_format_reason(m.reason) for m in mentions)
-    negative_counter = Counter(
-        _format_reason(m.reason) for m in negative
-    )
+    recent_mentions = db.query(func.count(Mention.id)).filter(
+        Mention.published_at >= now - timedelta(days=RECENT_WINDOW_DAYS), *conditions
+    ).scalar()
 
+    samples = _sample_quotes(db, conditions) if negative_counter else {}
     recommendations: List[Dict] = []
-    for reason, neg_count in negative_counter.most_common(5):
-        total_reason_mentions = reason_counter.get(reason, 1)
-        negative_share = neg_count / max(total_reason_mentions, 1)
-        sample = next(
-            (m.content for m in negative if _format_reason(m.reason) == reason and m.content),
-            None,
-        )
-        recommendations.append(_build_recommendation(reason, negative_share, sample))
+    for reason, neg_count in negative_counter.most_common(TOP_REASONS):
+        negative_share = neg_count / max(reason_counter.get(reason, 1), 1)
+        recommendations.append(_build_recommendation(reason, negative_share, samples.get(reason)))
 
     return {
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": now.isoformat(),
         "overview": {
             "total_mentions": total,
-            "positive": len(positive),
-            "neutral": neutral,
-            "negative": len(negative),
-            "recent_mentions": len(recent_mentions),
+            "positive": sentiments[SentimentType.POSITIVE],
+            "neutral": total - sentiments[SentimentType.POSITIVE] - sentiments[SentimentType.NEGATIVE],
+            "negative": sentiments[SentimentType.NEGATIVE],
+            "recent_mentions": recent_mentions,
         },
         "top_reasons": [
             {
                 "reason": _reason_human_label(reason),
                 "share": round(count / total * 100, 1),
             }
-            for reason, count in reason_counter.most_common(5)
+            for reason, count in reason_counter.most_common(TOP_REASONS)
         ],
         "recommendations": recommendations,
     }
 
+
+def generate_demo_insights(db: Session) -> Dict:
+    return generate_insights(db)
+
+
+def refresh_snapshot(db: Session, entity_id: Optional[int] = None, days: Optional[int] = None) -> Dict:
+    """Recompute and store the snapshot of one scope (the caller commits)."""
+    payload = generate_insights(db, entity_id, days)
+    table = InsightSnapshot.__table__
+    statement = dialect_insert(db, table).values(
+        entity_id=entity_id or 0, days=days or 0, payload=json.dumps(payload), generated_at=datetime.utcnow()
+    )
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[table.c.entity_id, table.c.days],
+        set_={"payload": statement.excluded.payload, "generated_at": statement.excluded.generated_at},
+    ))
+    return payload
+
+
+def refresh_snapshot_in_background(entity_id: Optional[int] = None, days: Optional[int] = None):
+    """Refresh one snapshot with its own session; skipped if this process is already refreshing it."""
+    key = (entity_id or 0, days or 0)
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    db = SessionLocal()
+    try:
+        refresh_snapshot(db, entity_id, days)
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        logger.error(f"Insights snapshot refresh failed for {key}: {exc}")
+    finally:
+        db.close()
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+
+def refresh_all_snapshots(db: Session) -> int:
+    """Refresh every stored snapshot (e.g. after a collection run); the caller commits."""
+    scopes = db.query(InsightSnapshot.entity_id, InsightSnapshot.days).all()
+    for entity_id, days in scopes:
+        refresh_snapshot(db, entity_id or None, days or None)
+    return len(scopes)
+
+
+def get_insights_snapshot(
+    db: Session, entity_id: Optional[int] = None, days: Optional[int] = None, read_db: Optional[Session] = None
+) -> Tuple[Dict, bool]:
+    """
+    Stored insights of a scope, computed (and stored with `db`) on first use.
+    read_db: session the snapshot is looked up with (e.g. a read replica), `db` by default.
+    Returns (insights, stale): a stale snapshot should be refreshed in the background.
+    """
+    snapshot = (read_db or db).query(InsightSnapshot).filter(
+        InsightSnapshot.entity_id == (entity_id or 0), InsightSnapshot.days == (days or 0)
+    ).first()
+    if snapshot is None:
+        payload = refresh_snapshot(db, entity_id, days)
+        db.commit()
+        return payload, False
+    stale = datetime.utcnow() - snapshot.generated_at > timedelta(seconds=INSIGHTS_SNAPSHOT_TTL)
+    return json.loads(snapshot.payload), stale
@@ -0,0 +1,154 @@
+"""
+Recherche de mots-clés compilée une seule fois
+
+Les lexiques sont compilés en une seule expression régulière construite comme
+un trie (les préfixes communs des mots-clés sont factorisés): un texte est
+parcouru en un seul passage et le coût ne croît presque pas avec le nombre de
+mots-clés. Ce passage a un coût fixe: pour un petit lexique (les ~25 mots de
+sentiment d'une langue), il est plus lent que l'ancienne recherche de
+sous-chaînes, qui ne vérifiait ni les bornes des mots ni les accents; il
+devient plus rapide vers 50 mots-clés (raisons, packs), cf.
+benchmarks/bench_fallback_sentiment.py.
+La correspondance se fait par mots entiers ("top" ne correspond pas
+à "stop", "cher" ne correspond pas à "chercher"), avec une tolérance pour les
+flexions simples ("bugs", "déçue"). Mots-clés et textes sont normalisés de la
+même façon (casse, Unicode, accents): "decu" correspond à "déçu".
+"""
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+_TOKEN = re.compile(r"\w+")
+_COMBINING_MARKS = re.compile(r"[\u0300-\u036f]")
+# Suffixes de flexion tolérés après un mot-clé
+DEFAULT_INFLECTION = r"(?:es|s|x|e)?"
+
+
+def tokenize(text: str) -> List[str]:
+    """Découper un texte en mots minuscules"""
+    return _TOKEN.findall((text or "").lower())
+
+
+def normalize_text(text: str) -> str:
+    """Normaliser un texte pour la recherche de mots-clés: casse, formes Unicode et accents"""
+    text = text or ""
+    if text.isascii():
+        return text.lower()
+    return _COMBINING_MARKS.sub("", unicodedata.normalize("NFKD", text)).casefold()
+
+
+def _normalize_keyword(keyword: str) -> str:
+    return " ".join(normalize_text(keyword).split())
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Expression régulière équivalente à l'alternative des mots-clés, factorisée en trie"""
+    root: Dict = {}
+    for keyword in keywords:
+        node = root
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        alternatives = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not alternatives:
+            return ""
+        is_end = "" in node
+        if len(alternatives) == 1 and not is_end:
+            return alternatives[0]
+        # Quantificateur gourmand: le mot-clé le plus long est essayé en premier
+        return "(?:" + "|".join(alternatives) + ")" + ("?" if is_end else "")
+
+    return build(root)
+
+
+class KeywordMatcher:
+    """
+    Ensemble de mots-clés associés à des étiquettes (catégorie, polarité...)
+    inflection: expression régulière des suffixes tolérés après un mot-clé
+    """
+
+    def __init__(self, lexicons: Dict[Hashable, Iterable[str]], inflection: str = DEFAULT_INFLECTION):
+        self._labels: Dict[str, List[Hashable]] = {}
+        for label, keywords in lexicons.items():
+            for keyword in keywords:
+                keyword = _normalize_keyword(keyword)
+                if not keyword:
+                    continue
+                labels = self._labels.setdefault(keyword, [])
+                if label not in labels:
+                    labels.append(label)
+
+        # Une occurrence de mot-clé composé compte aussi pour les mots-clés qu'il
+        # contient ("value for money" -> "value", "money"), que l'expression
+        # régulière ne peut pas trouver puisqu'elle consomme le texte
+        self._expansions: Dict[str, Tuple[str, ...]] = {}
+        for keyword in self._labels:
+            words = keyword.split(" ")
+            contained = [keyword]
+            for size in range(len(words) - 1, 0, -1):
+                for start in range(len(words) - size + 1):
+                    part = " ".join(words[start:start + size])
+                    if part in self._labels and part not in contained:
+                        contained.append(part)
+            self._expansions[keyword] = tuple(contained)
+
+        self._pattern: Optional[re.Pattern] = None
+        if self._labels:
+            self._pattern = re.compile(rf"(?<!\w)({_trie_pattern(self._labels)})({inflection})(?!\w)")
+
+    @property
+    def keywords(self) -> List[str]:
+        return list(self._labels)
+
+    def labels(self, keyword: str) -> List[Hashable]:
+        return self._labels.get(keyword, [])
+
+    def find(self, text_normalized: str) -> List[str]:
+        """Mots-clés trouvés dans un texte déjà normalisé (normalize_text), une entrée par occurrence"""
+        return [keyword for _, keyword, _ in self.scan(text_normalized)]
+
+    def scan(self, text_normalized: str) -> List[Tuple[int, str, str]]:
+        """
+        Occurrences des mots-clés dans un texte déjà normalisé, dans l'ordre du texte:
+        (position, mot-clé, suffixe de flexion). Les mots-clés contenus dans un
+        mot-clé composé sont rapportés à la même position, sans suffixe.
+        """
+        if self._pattern is None or not text_normalized:
+            return []
+        found = []
+        for match in self._pattern.finditer(text_normalized):
+            keyword, suffix = match.groups()
+            if " " not in keyword and keyword in self._labels:
+                found.append((match.start(), keyword, suffix))
+                continue
+            expansions = self._expansions[_normalize_keyword(keyword)]
+            found.append((match.start(), expansions[0], suffix))
+            found.extend((match.start(), part, "") for part in expansions[1:])
+        return found
+
+    def match(self, text: str) -> List[Tuple[str, List[Hashable]]]:
+        """
+        Trouver toutes les occurrences de mots-clés dans un texte.
+        Retourne des couples (mot-clé, étiquettes), une entrée par occurrence.
+        """
+        return [(keyword, self._labels[keyword]) for keyword in self.find(normalize_text(text))]
+
+    def count_labels(self, text: str, distinct: bool = True) -> Counter:
+        """
+        Compter les correspondances par étiquette.
+        distinct=True compte chaque mot-clé une seule fois, sinon chaque occurrence.
+        """
+        keywords = self.find(normalize_text(text))
+        if distinct:
+            keywords = set(keywords)
+        counts = Counter()
+        for keyword in keywords:
+            for label in self._labels[keyword]:
+                counts[label] += 1
+        return counts
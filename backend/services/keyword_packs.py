@@ -0,0 +1,207 @@
+"""
+Packs de mots-clés par domaine (transport, télécom, distribution...)
+
+Un pack est un fichier JSON de keyword_packs/ (KEYWORD_PACKS_DIR):
+- reasons: mots-clés par raison (valeurs de ReasonType), remplacent REASON_KEYWORDS
+- reason_details: libellés des raisons (optionnel)
+- sentiment: {langue: {positive: [...], negative: [...]}}, ajoutés aux lexiques de repli
+- critical_keywords: ajoutés aux mots-clés critiques des alertes
+- alert_rules: règles d'alerte (format de services/alert_service.py), remplacent
+  DEFAULT_ALERT_RULES (seuils de sentiment, raisons, mots-clés critiques)
+
+keyword_packs/entities.json associe les entités (par nom) à un pack; le pack
+"default" correspond aux mots-clés intégrés (domaine smartphone).
+
+Chaque pack est compilé une seule fois en un pipeline de texte (un matcher unique
+partagé par le classifieur de raisons, l'analyse de sentiment de repli, les
+alertes, les aspects et les solutions) et rechargé à chaud
+lorsque son fichier est modifié (vérification au plus toutes les
+KEYWORD_PACKS_RELOAD_INTERVAL secondes).
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from models import Entity, ReasonType
+from services.alert_service import CRITICAL_KEYWORDS, DEFAULT_ALERT_RULESET, AlertRuleSet
+from services.aspect_extractor import NEGATIONS
+from services.keyword_matcher import DEFAULT_INFLECTION
+from services.reason_classifier import DEFAULT_REASON_DETAIL, REASON_INFLECTION, REASON_KEYWORDS
+from services.sentiment_analyzer import LEXICONS, sentiment_vocabulary
+from services.solution_generator import SPECIFIC_ISSUES
+from services.text_pipeline import (
+    CRITICAL_VOCABULARY,
+    ISSUE_VOCABULARY,
+    NEGATION_VOCABULARY,
+    REASON_VOCABULARY,
+    SENTIMENT_VOCABULARY,
+    TextPipeline,
+)
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_PACKS_DIR = Path(os.getenv(
+    "KEYWORD_PACKS_DIR",
+    str(Path(__file__).parent.parent / "keyword_packs")
+))
+KEYWORD_PACKS_RELOAD_INTERVAL = float(os.getenv("KEYWORD_PACKS_RELOAD_INTERVAL", 5.0))
+DEFAULT_PACK_NAME = "default"
+ENTITY_PACKS_FILE = "entities.json"
+
+
+class KeywordPack:
+    """Mots-clés d'un domaine, compilés en un pipeline de texte réutilisable"""
+
+    def __init__(
+        self,
+        name: str,
+        version: str,
+        reasons: Dict[ReasonType, List[str]],
+        reason_details: Optional[Dict[ReasonType, str]] = None,
+        sentiment: Optional[Dict[str, Dict[str, List[str]]]] = None,
+        critical_keywords: Iterable[str] = (),
+        alert_rules: Optional[List[Dict]] = None
+    ):
+        self.name = name
+        self.version = version
+        self.reason_keywords = reasons
+        self.reason_details = {**DEFAULT_REASON_DETAIL, **(reason_details or {})}
+        # Ordre de déclaration des raisons: départage les égalités du classement
+        self.reason_priority = {reason_type: rank for rank, reason_type in enumerate(reasons)}
+
+        lexicons = {language: (list(positive), list(negative)) for language, (positive, negative) in LEXICONS.items()}
+        for language, words in (sentiment or {}).items():
+            positive, negative = lexicons.setdefault(language, ([], []))
+            positive.extend(words.get("positive", []))
+            negative.extend(words.get("negative", []))
+        self.alert_rules = AlertRuleSet(alert_rules) if alert_rules is not None else DEFAULT_ALERT_RULESET
+        self.sentiment_languages = frozenset(lexicons)
+        self.pipeline = TextPipeline({
+            REASON_VOCABULARY: (reasons, REASON_INFLECTION),
+            SENTIMENT_VOCABULARY: (sentiment_vocabulary(lexicons), DEFAULT_INFLECTION),
+            CRITICAL_VOCABULARY: ({CRITICAL_VOCABULARY: [*CRITICAL_KEYWORDS, *critical_keywords]}, DEFAULT_INFLECTION),
+            ISSUE_VOCABULARY: (SPECIFIC_ISSUES, REASON_INFLECTION),
+            # Négations: mots exacts ("nos" n'est pas "no")
+            NEGATION_VOCABULARY: ({NEGATION_VOCABULARY: NEGATIONS}, ""),
+        })
+
+    @classmethod
+    def from_file(cls, path: Path) -> "KeywordPack":
+        """Charger et compiler un pack JSON (ValueError si le fichier est invalide)"""
+        raw = path.read_bytes()
+        data = json.loads(raw)
+        reasons = {ReasonType(reason): keywords for reason, keywords in data["reasons"].items()}
+        if not reasons:
+            raise ValueError(f"Keyword pack {path.name} defines no reasons")
+        return cls(
+            name=path.stem,
+            version=f"{path.stem}-{hashlib.sha256(raw).hexdigest()[:12]}",
+            reasons=reasons,
+            reason_details={ReasonType(reason): detail for reason, detail in data.get("reason_details", {}).items()},
+            sentiment=data.get("sentiment"),
+            critical_keywords=data.get("critical_keywords", []),
+            alert_rules=data.get("alert_rules")
+        )
+
+
+DEFAULT_PACK = KeywordPack(DEFAULT_PACK_NAME, DEFAULT_PACK_NAME, REASON_KEYWORDS)
+
+
+class KeywordPackRegistry:
+    """Packs compilés et association entité -> pack, rechargés à chaud depuis le disque"""
+
+    def __init__(self, directory: Path = KEYWORD_PACKS_DIR, reload_interval: float = KEYWORD_PACKS_RELOAD_INTERVAL):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        # chemin -> [mtime, dernière vérification, valeur compilée]
+        self._entries: Dict[Path, list] = {}
+
+    def _load(self, path: Path, loader: Callable[[Path], object], default):
+        """Valeur compilée d'un fichier, recompilée si le fichier a changé; garde la dernière version valide"""
+        with self._lock:
+            entry = self._entries.get(path)
+            now = time.monotonic()
+            if entry is not None and now - entry[1] < self.reload_interval:
+                return entry[2]
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                if entry is None:
+                    logger.warning(f"Keyword pack file {path} not found, using defaults")
+                self._entries[path] = [None, now, default]
+                return default
+            if entry is not None and entry[0] == mtime:
+                entry[1] = now
+                return entry[2]
+            try:
+                value = loader(path)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.error(f"Invalid keyword pack file {path}: {e}")
+                value = entry[2] if entry is not None else default
+            else:
+                if entry is not None:
+                    logger.info(f"Keyword pack file {path.name} reloaded")
+            self._entries[path] = [mtime, now, value]
+            return value
+
+    def get(self, name: Optional[str]) -> KeywordPack:
+        """Pack compilé par nom (pack par défaut si absent ou invalide)"""
+        if not name or name == DEFAULT_PACK_NAME:
+            return DEFAULT_PACK
+        return self._load(self.directory / f"{name}.json", KeywordPack.from_file, DEFAULT_PACK)
+
+    def _entity_mapping(self) -> Dict:
+        def load(path: Path) -> Dict:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return {
+                "default": data.get("default", DEFAULT_PACK_NAME),
+                "entities": {name.lower(): pack for name, pack in data.get("entities", {}).items()},
+            }
+        return self._load(
+            self.directory / ENTITY_PACKS_FILE,
+            load,
+            {"default": DEFAULT_PACK_NAME, "entities": {}}
+        )
+
+    def pack_name_for_entity(self, entity_name: Optional[str]) -> str:
+        mapping = self._entity_mapping()
+        return mapping["entities"].get((entity_name or "").lower(), mapping["default"])
+
+    def for_entity(self, entity_name: Optional[str]) -> KeywordPack:
+        """Pack associé à une entité (par son nom)"""
+        return self.get(self.pack_name_for_entity(entity_name))
+
+    def fingerprint(self) -> str:
+        """Empreinte de tous les packs et de l'association entités (change à chaque modification)"""
+        versions = [DEFAULT_PACK.version]
+        for path in sorted(self.directory.glob("*.json")):
+            if path.name != ENTITY_PACKS_FILE:
+                versions.append(self.get(path.stem).version)
+        mapping = self._entity_mapping()
+        versions.append(json.dumps(mapping, sort_keys=True))
+        return hashlib.sha256("|".join(versions).encode("utf-8")).hexdigest()[:12]
+
+
+registry = KeywordPackRegistry()
+
+
+def get_pack(name: Optional[str]) -> KeywordPack:
+    return registry.get(name)
+
+
+def get_pack_for_entity(entity_name: Optional[str]) -> KeywordPack:
+    return registry.for_entity(entity_name)
+
+
+def get_pack_for_entity_id(db: Session, entity_id: int) -> KeywordPack:
+    """Pack d'une entité à partir de son id (entité lue via la session)"""
+    entity = db.get(Entity, entity_id)
+    return registry.for_entity(entity.name if entity else None)
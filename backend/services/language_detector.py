@@ -0,0 +1,74 @@
+"""
+Détection locale et rapide de la langue d'un texte
+
+Compte les mots outils (et quelques mots très fréquents dans les avis) de
+chaque langue supportée; la langue ayant le plus d'occurrences l'emporte.
+Sans indice suffisant, la langue par défaut (fr) est retenue.
+"""
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from services.keyword_matcher import normalize_text, tokenize
+
+DEFAULT_LANGUAGE = os.getenv("DEFAULT_LANGUAGE", "fr")
+
+LANGUAGE_WORDS: Dict[str, List[str]] = {
+    "fr": [
+        "le", "la", "les", "un", "une", "des", "du", "de", "et", "est", "sont", "pas", "ne", "je", "il",
+        "elle", "nous", "vous", "ils", "que", "qui", "pour", "dans", "sur", "avec", "au", "aux", "ce",
+        "cette", "mais", "ou", "très", "trop", "bien", "mon", "ma", "mes", "son", "sa", "ses", "leur",
+        "été", "être", "avoir", "fait", "plus", "moins", "aussi", "encore", "toujours", "rien", "déçu",
+        "nul", "génial", "merci", "problème", "vraiment", "c", "j", "l", "d", "qu", "n",
+    ],
+    "en": [
+        "the", "a", "an", "and", "is", "are", "was", "were", "not", "i", "it", "this", "that", "of",
+        "to", "in", "on", "with", "for", "my", "you", "your", "but", "very", "so", "have", "has", "had",
+        "be", "been", "do", "does", "don", "didn", "can", "will", "just", "after", "good", "bad", "great",
+        "worst", "best", "phone", "problem", "quality", "awesome", "nice", "poor", "t", "s", "its",
+    ],
+    "es": [
+        "el", "los", "las", "una", "y", "es", "son", "no", "que", "por", "para", "con", "muy", "pero",
+        "del", "al", "lo", "mi", "su", "como", "más", "está", "bueno", "malo", "problema",
+    ],
+    "de": [
+        "der", "die", "das", "und", "ist", "sind", "nicht", "ich", "es", "ein", "eine", "mit", "für",
+        "auf", "sehr", "aber", "zu", "von", "den", "dem", "auch", "gut", "schlecht", "kein", "keine",
+    ],
+}
+SUPPORTED_LANGUAGES = tuple(LANGUAGE_WORDS)
+
+# Mot -> langues dans lesquelles il est un indice (aussi sous sa forme sans
+# accents, pour les mots déjà normalisés par le pipeline de texte)
+_WORD_LANGUAGES: Dict[str, List[str]] = defaultdict(list)
+for _language, _words in LANGUAGE_WORDS.items():
+    for _word in _words:
+        for _form in {_word, normalize_text(_word)}:
+            if _language not in _WORD_LANGUAGES[_form]:
+                _WORD_LANGUAGES[_form].append(_language)
+_FRENCH_CHARACTERS = set("éèêëàâçùûôîïœ")
+
+
+def detect_language(text: str, default: str = DEFAULT_LANGUAGE, tokens: Optional[List[str]] = None) -> str:
+    """
+    Détecter la langue d'un texte (code ISO 639-1)
+    tokens: mots du texte déjà découpés (pipeline de texte), pour éviter un nouveau découpage
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    for token in tokens if tokens is not None else tokenize(text):
+        for language in _WORD_LANGUAGES.get(token, ()):
+            scores[language] += 1
+    if _FRENCH_CHARACTERS.intersection(text or ""):
+        scores["fr"] += 0.5
+    if not scores:
+        return default
+    best = max(scores, key=scores.get)
+    # En cas d'égalité, garder la langue par défaut si elle fait partie des meilleures
+    if scores.get(default) == scores[best]:
+        return default
+    return best
+
+
+def detect_languages(texts: List[str], default: str = DEFAULT_LANGUAGE) -> List[str]:
+    """Détecter la langue d'une liste de textes"""
+    return [detect_language(text, default) for text in texts]
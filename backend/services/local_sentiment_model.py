@@ -0,0 +1,209 @@
+"""
+Modèle de sentiment local (sans réseau): vectorisation par hachage + régression logistique
+
+Les textes sont convertis en mots et bigrammes hachés dans un espace de taille
+fixe; un modèle linéaire multinomial (négatif / neutre / positif) prédit un
+lot entier de documents en quelques opérations NumPy. Le modèle est entraîné
+par train_sentiment_model.py et stocké comme artefact versionné.
+"""
+import logging
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models import SentimentType
+from services.keyword_matcher import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Version de l'artefact: à incrémenter si la vectorisation ou les données d'entraînement changent
+LOCAL_MODEL_VERSION = "hashlr-1"
+N_FEATURES = 2 ** 14
+# En dessous de cette probabilité maximale, la prédiction est considérée neutre
+# (texte sans vocabulaire connu: probabilités uniformes)
+MIN_CONFIDENCE = 0.36
+CLASSES = (SentimentType.NEGATIVE, SentimentType.NEUTRAL, SentimentType.POSITIVE)
+
+ARTIFACTS_DIR = Path(__file__).parent.parent / "artifacts"
+DEFAULT_MODEL_PATH = Path(os.getenv(
+    "LOCAL_SENTIMENT_MODEL_PATH",
+    str(ARTIFACTS_DIR / f"sentiment-{LOCAL_MODEL_VERSION}.npz")
+))
+
+
+class HashingVectorizer:
+    """Vectorisation par hachage des mots et bigrammes (représentation creuse)"""
+
+    def __init__(self, n_features: int = N_FEATURES):
+        self.n_features = n_features
+        self._cache: Dict[str, Tuple[int, float]] = {}
+
+    def _feature(self, term: str) -> Tuple[int, float]:
+        feature = self._cache.get(term)
+        if feature is None:
+            digest = zlib.crc32(term.encode("utf-8"))
+            # Le bit de poids fort donne le signe (limite l'effet des collisions)
+            feature = (digest % self.n_features, 1.0 if digest & 0x80000000 else -1.0)
+            if len(self._cache) < 500000:
+                self._cache[term] = feature
+        return feature
+
+    def transform(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectoriser un lot de textes.
+        Retourne (lignes, colonnes, valeurs) des coefficients non nuls, normalisés L2 par document.
+        """
+        rows: List[int] = []
+        cols: List[int] = []
+        values: List[float] = []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            terms = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for term in terms:
+                col, sign = self._feature(term)
+                rows.append(row)
+                cols.append(col)
+                values.append(sign)
+
+        rows_arr = np.asarray(rows, dtype=np.int64)
+        cols_arr = np.asarray(cols, dtype=np.int64)
+        values_arr = np.asarray(values, dtype=np.float32)
+        if len(values_arr):
+            norms = np.sqrt(np.bincount(rows_arr, weights=values_arr ** 2, minlength=len(texts)))
+            values_arr = values_arr / np.maximum(norms[rows_arr], 1e-12).astype(np.float32)
+        return rows_arr, cols_arr, values_arr
+
+
+class LocalSentimentModel:
+    """Régression logistique multinomiale sur vecteurs hachés"""
+
+    def __init__(self, weights: Optional[np.ndarray] = None, bias: Optional[np.ndarray] = None,
+                 n_features: int = N_FEATURES, version: str = LOCAL_MODEL_VERSION):
+        self.n_features = n_features
+        self.version = version
+        self.weights = weights if weights is not None else np.zeros((n_features, len(CLASSES)), dtype=np.float32)
+        self.bias = bias if bias is not None else np.zeros(len(CLASSES), dtype=np.float32)
+        self.vectorizer = HashingVectorizer(n_features)
+
+    def _logits(self, rows: np.ndarray, cols: np.ndarray, values: np.ndarray, n_docs: int) -> np.ndarray:
+        contributions = self.weights[cols] * values[:, None]
+        logits = np.empty((n_docs, len(CLASSES)), dtype=np.float64)
+        for k in range(len(CLASSES)):
+            logits[:, k] = np.bincount(rows, weights=contributions[:, k], minlength=n_docs)
+        return logits + self.bias
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Probabilités (négatif, neutre, positif) pour un lot de textes"""
+        if not texts:
+            return np.zeros((0, len(CLASSES)))
+        rows, cols, values = self.vectorizer.transform(texts)
+        return self._softmax(self._logits(rows, cols, values, len(texts)))
+
+    def predict(self, texts: Sequence[str]) -> List[Dict]:
+        """Analyser un lot de textes (même format que SentimentAnalyzer)"""
+        probabilities = self.predict_proba(texts)
+        labels = probabilities.argmax(axis=1)
+        labels[probabilities.max(axis=1) < MIN_CONFIDENCE] = CLASSES.index(SentimentType.NEUTRAL)
+        results = []
+        for label, (negative, neutral, positive) in zip(labels, probabilities.tolist()):
+            sentiment = CLASSES[label]
+            if sentiment == SentimentType.POSITIVE:
+                score = positive
+            elif sentiment == SentimentType.NEGATIVE:
+                score = -negative
+            else:
+                score = 0.0
+            results.append({
+                "sentiment": sentiment,
+                "score": score,
+                "backend": "local",
+                "confidence": {
+                    "positive": positive,
+                    "neutral": neutral,
+                    "negative": negative
+                }
+            })
+        return results
+
+    def fit(self, texts: Sequence[str], labels: Sequence[SentimentType],
+            epochs: int = 300, learning_rate: float = 2.0, l2: float = 1e-4) -> "LocalSentimentModel":
+        """
+        Entraîner le modèle par descente de gradient (lot complet).
+        Le biais reste nul: un texte sans vocabulaire connu obtient des probabilités uniformes.
+        """
+        n_docs = len(texts)
+        rows, cols, values = self.vectorizer.transform(texts)
+        targets = np.zeros((n_docs, len(CLASSES)), dtype=np.float64)
+        targets[np.arange(n_docs), [CLASSES.index(label) for label in labels]] = 1.0
+        # Pondérer les classes pour compenser le déséquilibre des données
+        class_weights = n_docs / (len(CLASSES) * np.maximum(targets.sum(axis=0), 1.0))
+        sample_weights = (targets * class_weights).sum(axis=1, keepdims=True)
+
+        weights = np.zeros((self.n_features, len(CLASSES)), dtype=np.float64)
+        bias = np.zeros(len(CLASSES), dtype=np.float64)
+        for _ in range(epochs):
+            self.weights, self.bias = weights, bias
+            error = (self._softmax(self._logits(rows, cols, values, n_docs)) - targets) * sample_weights / n_docs
+            gradient = np.empty_like(weights)
+            for k in range(len(CLASSES)):
+                gradient[:, k] = np.bincount(cols, weights=values * error[rows, k], minlength=self.n_features)
+            weights -= learning_rate * (gradient + l2 * weights)
+
+        self.weights = weights.astype(np.float32)
+        self.bias = bias.astype(np.float32)
+        return self
+
+    def save(self, path: Path = DEFAULT_MODEL_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            version=np.array(self.version),
+            n_features=np.array(self.n_features),
+            weights=self.weights,
+            bias=self.bias
+        )
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_MODEL_PATH) -> "LocalSentimentModel":
+        with np.load(path) as artifact:
+            version = str(artifact["version"])
+            if version != LOCAL_MODEL_VERSION:
+                raise ValueError(f"Model artifact version {version} != {LOCAL_MODEL_VERSION}")
+            return cls(
+                weights=artifact["weights"],
+                bias=artifact["bias"],
+                n_features=int(artifact["n_features"]),
+                version=version
+            )
+
+
+_model: Optional[LocalSentimentModel] = None
+_model_lock = threading.Lock()
+
+
+def get_local_model() -> LocalSentimentModel:
+    """
+    Modèle local partagé par le processus.
+    Si l'artefact est absent, le modèle est entraîné en mémoire depuis les données d'exemple.
+    """
+    global _model
+    with _model_lock:
+        if _model is None:
+            try:
+                _model = LocalSentimentModel.load(DEFAULT_MODEL_PATH)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Local sentiment model artifact unavailable ({e}). Training from seed data.")
+                from train_sentiment_model import build_training_set
+                texts, labels = build_training_set()
+                _model = LocalSentimentModel().fit(texts, labels)
+        return _model
@@ -1,13 +1,25 @@
 """
 Classification des raisons des avis
+
+Les mots-clés de toutes les catégories sont compilés une seule fois en un
+automate (KeywordMatcher): un seul passage sur le texte compte les occurrences
+de chaque catégorie, et les catégories sont classées par nombre d'occurrences.
+Avec un pack de mots-clés, les occurrences viennent du pipeline de texte partagé
+(un seul passage pour le sentiment, les raisons, les alertes et les solutions).
 """
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from models import ReasonType
+from services.keyword_matcher import KeywordMatcher, normalize_text
+from services.text_pipeline import REASON_VOCABULARY
+
+# Version du classifieur: à incrémenter à chaque modification des mots-clés
+# (invalide les résultats mis en cache)
+CLASSIFIER_VERSION = "3"
 
 # Mapping de mots-clés vers des catégories (domaine smartphone / produit tech)
 REASON_KEYWORDS = {
     ReasonType.PERFORMANCE: [
-        "performance", "lag", "lent", "slow", "bug", "freeze", "hang", "stutter", "fps", "gaming",
+        "performance", "lag", "laggy", "lagging", "lent", "slow", "bug", "freeze", "hang", "stutter", "fps", "gaming",
         "processor", "cpu", "heat", "heating", "overheat", "temperature", "speed"
     ],
     ReasonType.CAMERA: [
@@ -57,29 +69,97 @@ DEFAULT_REASON_DETAIL = {
     ReasonType.CUSTOMER_SUPPORT: "Support client et service après-vente",
     ReasonType.DELIVERY: "Livraison, emballage et état à la réception",
     ReasonType.EXPERIENCE: "Expérience d'utilisation globale",
+    ReasonType.PUNCTUALITY: "Ponctualité, retards et annulations",
+    ReasonType.COMFORT: "Confort à bord et affluence",
+    ReasonType.CLEANLINESS: "Propreté et hygiène",
+    ReasonType.SAFETY: "Sécurité des voyageurs",
+    ReasonType.DIGITAL_EXPERIENCE: "Application, site web et réservation en ligne",
     ReasonType.OTHER: "Autres raisons"
 }
 
 
+# Suffixes tolérés: pluriels et flexions simples (fr), formes en -ed / -ing (en)
+REASON_INFLECTION = r"(?:es|s|x|e|ed|d|ing)?"
+REASON_MATCHER = KeywordMatcher(REASON_KEYWORDS, inflection=REASON_INFLECTION)
+# Rang de chaque catégorie dans REASON_KEYWORDS: départage les égalités
+_REASON_PRIORITY = {reason_type: rank for rank, reason_type in enumerate(REASON_KEYWORDS)}
+
+
+def classify_reasons(content: str, pack=None) -> List[Dict]:
+    """
+    Classer toutes les catégories présentes dans un avis (multi-étiquettes).
+    pack: pack de mots-clés de l'entité (par défaut REASON_KEYWORDS).
+    Retourne une liste triée par pertinence de:
+    {reason: ReasonType, hits: int, keywords: [str], confidence: float}
+    hits compte chaque occurrence; confidence est la part des occurrences de la catégorie.
+    Liste vide si aucun mot-clé n'est trouvé.
+    """
+    if pack is not None:
+        priority = pack.reason_priority
+        found = [
+            (keyword, reason_type)
+            for _, keyword, reason_type in pack.pipeline.analyze(content).occurrences(REASON_VOCABULARY)
+        ]
+    else:
+        priority = _REASON_PRIORITY
+        found = [
+            (keyword, reason_type)
+            for keyword in REASON_MATCHER.find(normalize_text(content))
+            for reason_type in REASON_MATCHER.labels(keyword)
+        ]
+    if not found:
+        return []
+
+    hits: Dict[ReasonType, int] = {}
+    keywords: Dict[ReasonType, List[str]] = {}
+    for keyword, reason_type in found:
+        hits[reason_type] = hits.get(reason_type, 0) + 1
+        reason_keywords = keywords.setdefault(reason_type, [])
+        if keyword not in reason_keywords:
+            reason_keywords.append(keyword)
+
+    total = sum(hits.values())
+    ranked = sorted(
+        hits,
+        key=lambda reason_type: (-hits[reason_type], -len(keywords[reason_type]), priority[reason_type])
+    )
+    return [
+        {
+            "reason": reason_type,
+            "hits": hits[reason_type],
+            "keywords": keywords[reason_type],
+            "confidence": round(hits[reason_type] / total, 3),
+        }
+        for reason_type in ranked
+    ]
+
+
+def classify_reasons_batch(contents: List[str], pack=None) -> List[List[Dict]]:
+    """Classer les catégories d'une liste d'avis (même format que classify_reasons)"""
+    return [classify_reasons(content, pack) for content in contents]
+
+
 def determine_reason(
     content: str,
     provided_reason: Optional[ReasonType] = None,
-    provided_detail: Optional[str] = None
+    provided_detail: Optional[str] = None,
+    pack=None
 ) -> Tuple[ReasonType, Optional[str]]:
     """
-    Déterminer la raison principale d'un avis.
+    Déterminer la raison principale d'un avis (catégorie la mieux classée).
     Si une raison est fournie, elle est prioritaire.
     """
+    details = pack.reason_details if pack is not None else DEFAULT_REASON_DETAIL
     if provided_reason:
-        detail = provided_detail or DEFAULT_REASON_DETAIL.get(provided_reason, None)
+        detail = provided_detail or details.get(provided_reason, None)
         return provided_reason, detail
 
-    text = content.lower()
-    for reason_type, keywords in REASON_KEYWORDS.items():
-        if any(keyword in text for keyword in keywords):
-            detail = provided_detail or DEFAULT_REASON_DETAIL.get(reason_type)
-            return reason_type, detail
+    ranked = classify_reasons(content, pack)
+    if ranked:
+        reason_type = ranked[0]["reason"]
+        detail = provided_detail or details.get(reason_type)
+        return reason_type, detail
 
-    return ReasonType.OTHER, provided_detail or DEFAULT_REASON_DETAIL[ReasonType.OTHER]
+    return ReasonType.OTHER, provided_detail or details[ReasonType.OTHER]
 
 
@@ -0,0 +1,296 @@
+"""
+Réanalyse par lots des mentions déjà stockées
+
+Après un changement de lexique, de mots-clés de raison ou de backend de
+sentiment, les colonnes sentiment / sentiment_score / reason / reason_detail
+/ language des mentions existantes sont recalculées sans réimport:
+- les mentions sont lues par id croissant (pagination par clé, sans OFFSET)
+- les lots sont analysés en parallèle par un pool de workers (via le cache d'analyse)
+- la raison fournie à l'ingestion (reason_provided: données de démonstration,
+  POST /api/mentions avec reason) est conservée; seul le sentiment est recalculé
+- seules les mentions modifiées sont réécrites, par UPDATE groupé
+- les alertes non résolues des mentions modifiées sont recalculées (et leurs
+  incidents mis à jour)
+- les aspects (mention_aspects) de chaque lot sont reconstruits: un job
+  complet (--reset) sert aussi à remplir l'index pour des mentions anciennes
+- en fin de job, les agrégats de volume (mention_rollups) sont recalculés et
+  l'état du détecteur de pics est reconstruit à partir de ces agrégats
+- l'avancement est enregistré dans la même transaction que chaque lot
+  (table reprocessing_checkpoints): un job interrompu reprend où il s'était arrêté
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Alert, AlertAcknowledgement, AlertKind, AlertSolutionSignature, Mention, ReprocessingCheckpoint
+from services.alert_counters import adjust_counters, count_changes
+from services.alert_service import AlertService
+from services.analysis_cache import analyze_contents
+from services.incidents import detach_alerts, insert_alerts
+from services.ingestion import reindex_aspects
+from services.keyword_packs import get_pack_for_entity_id, registry
+from services.reason_classifier import CLASSIFIER_VERSION
+from services.rollups import rebuild_rollups
+from services.sentiment_analyzer import SentimentAnalyzer
+from services.solution_generator import SolutionGenerator
+from services.spike_detector import spike_detector
+
+logger = logging.getLogger(__name__)
+
+REPROCESS_CHUNK_SIZE = int(os.getenv("REPROCESS_CHUNK_SIZE", 500))
+REPROCESS_WORKERS = int(os.getenv("REPROCESS_WORKERS", 4))
+# Écart de score en dessous duquel une mention est considérée inchangée
+SCORE_TOLERANCE = 1e-6
+
+_COLUMNS = (
+    Mention.id, Mention.entity_id, Mention.content, Mention.source, Mention.sentiment,
+    Mention.sentiment_score, Mention.reason, Mention.reason_detail, Mention.reason_provided,
+    Mention.language, Mention.published_at
+)
+
+
+class MentionReprocessor:
+    """Job de réanalyse des mentions, reprenable grâce à son point de contrôle"""
+
+    def __init__(
+        self,
+        job_name: str = "default",
+        entity_id: Optional[int] = None,
+        chunk_size: int = REPROCESS_CHUNK_SIZE,
+        workers: int = REPROCESS_WORKERS,
+        analyzer: Optional[SentimentAnalyzer] = None,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        self.job_name = job_name
+        self.entity_id = entity_id
+        self.chunk_size = chunk_size
+        self.workers = max(1, workers)
+        self.analyzer = analyzer or SentimentAnalyzer()
+        self.session_factory = session_factory
+
+    @property
+    def version(self) -> str:
+        """Version de l'analyse appliquée: un changement de version (ou de pack de mots-clés) redémarre le job"""
+        return f"{self.analyzer.version}/{CLASSIFIER_VERSION}/{registry.fingerprint()}"
+
+    def _load_checkpoint(self, db: Session, reset: bool) -> ReprocessingCheckpoint:
+        checkpoint = db.get(ReprocessingCheckpoint, self.job_name)
+        if checkpoint is None:
+            checkpoint = ReprocessingCheckpoint(job_name=self.job_name)
+            db.add(checkpoint)
+            reset = True
+        elif checkpoint.analyzer_version != self.version or checkpoint.entity_id != self.entity_id:
+            logger.info(f"Reprocessing job {self.job_name}: parameters changed, restarting from scratch")
+            reset = True
+
+        if reset:
+            checkpoint.analyzer_version = self.version
+            checkpoint.entity_id = self.entity_id
+            checkpoint.last_mention_id = 0
+            checkpoint.processed = 0
+            checkpoint.changed = 0
+            checkpoint.started_at = datetime.utcnow()
+            checkpoint.completed_at = None
+            db.commit()
+        else:
+            logger.info(f"Reprocessing job {self.job_name}: resuming after mention {checkpoint.last_mention_id}")
+        return checkpoint
+
+    def _read_chunk(self, db: Session, after_id: int) -> List:
+        query = db.query(*_COLUMNS).filter(Mention.id > after_id)
+        if self.entity_id is not None:
+            query = query.filter(Mention.entity_id == self.entity_id)
+        return query.order_by(Mention.id).limit(self.chunk_size).all()
+
+    def _analyze(self, rows: List) -> List[Dict]:
+        """
+        Analyser un lot (exécuté dans un worker, avec sa propre session pour le cache)
+        Les mentions sont regroupées par entité pour utiliser le pack de mots-clés de chacune.
+        """
+        by_entity: Dict[int, List[int]] = {}
+        for index, row in enumerate(rows):
+            by_entity.setdefault(row.entity_id, []).append(index)
+
+        analyses: List[Optional[Dict]] = [None] * len(rows)
+        db = self.session_factory()
+        try:
+            for entity_id, indices in by_entity.items():
+                results = analyze_contents(
+                    [rows[i].content for i in indices],
+                    db=db,
+                    analyzer=self.analyzer,
+                    pack=get_pack_for_entity_id(db, entity_id)
+                )
+                for index, analysis in zip(indices, results):
+                    row = rows[index]
+                    if row.reason_provided:
+                        analysis = {**analysis, "reason": row.reason, "reason_detail": row.reason_detail}
+                    analyses[index] = analysis
+            db.commit()
+            return analyses
+        finally:
+            db.close()
+
+    @staticmethod
+    def _is_changed(row, analysis: Dict) -> bool:
+        return (
+            row.sentiment != analysis["sentiment"]
+            or abs((row.sentiment_score or 0.0) - analysis["score"]) > SCORE_TOLERANCE
+            or row.reason != analysis["reason"]
+            or row.reason_detail != analysis["reason_detail"]
+            or row.language != analysis["language"]
+        )
+
+    def _recompute_alerts(self, db: Session, changed: List[Mention]):
+        """
+        Recalculer les alertes non résolues des mentions modifiées.
+        Une alerte dont la sévérité ne change pas est conservée (date de création
+        d'origine); les alertes résolues restent intactes (historique), comme les
+        alertes de pic rattachées à la mention déclenchante (hors règles par mention).
+        """
+        ids = [mention.id for mention in changed]
+        rule_alerts = db.query(Alert.id).filter(
+            Alert.mention_id.in_(ids),
+            Alert.kind == AlertKind.MENTION.value
+        )
+        existing: Dict[int, List] = {}
+        for alert in db.query(Alert.id, Alert.mention_id, Alert.severity).filter(
+            Alert.mention_id.in_(ids),
+            Alert.kind == AlertKind.MENTION.value,
+            Alert.is_resolved == False
+        ):
+            existing.setdefault(alert.mention_id, []).append(alert)
+
+        obsolete_ids = []
+        obsolete_keys = []
+        new_alerts = []
+        packs = {}
+        for mention in changed:
+            if mention.entity_id not in packs:
+                packs[mention.entity_id] = get_pack_for_entity_id(db, mention.entity_id)
+            result = AlertService.evaluate(mention, packs[mention.entity_id])
+            current = existing.get(mention.id, [])
+            kept = bool(result) and any(alert.severity == result[0] for alert in current)
+            for alert in current:
+                if not kept or alert.severity != result[0]:
+                    obsolete_ids.append(alert.id)
+                    obsolete_keys.append((mention.entity_id, alert.severity))
+            if result and not kept:
+                new_alerts.append({
+                    "mention_id": mention.id,
+                    "entity_id": mention.entity_id,
+                    "reason": mention.reason,
+                    "severity": result[0],
+                    "message": result[1],
+                    "solution_signature": SolutionGenerator.solution_signature(mention, packs[mention.entity_id]),
+                })
+
+        # Signatures de solution des alertes conservées: recalculées à la prochaine consultation
+        db.query(AlertSolutionSignature).filter(
+            AlertSolutionSignature.alert_id.in_(rule_alerts.scalar_subquery())
+        ).delete(synchronize_session=False)
+        if obsolete_ids:
+            detach_alerts(db, obsolete_ids)
+            db.query(AlertAcknowledgement).filter(
+                AlertAcknowledgement.alert_id.in_(obsolete_ids)
+            ).delete(synchronize_session=False)
+            db.query(Alert).filter(Alert.id.in_(obsolete_ids)).delete(synchronize_session=False)
+            adjust_counters(db, count_changes(obsolete_keys, sign=-1))
+        insert_alerts(db, new_alerts)
+
+    def _apply(self, db: Session, rows: List, analyses: List[Dict], checkpoint: ReprocessingCheckpoint) -> int:
+        """Écrire un lot analysé et avancer le point de contrôle (une transaction)"""
+        updates = []
+        changed = []
+        analyzed = []
+        for row, analysis in zip(rows, analyses):
+            # Mention transitoire (non ajoutée à la session) portant les nouvelles valeurs
+            mention = Mention(
+                id=row.id,
+                entity_id=row.entity_id,
+                content=row.content,
+                source=row.source,
+                sentiment=analysis["sentiment"],
+                sentiment_score=analysis["score"],
+                reason=analysis["reason"],
+                reason_detail=analysis["reason_detail"],
+                language=analysis["language"],
+                published_at=row.published_at
+            )
+            analyzed.append(mention)
+            if not self._is_changed(row, analysis):
+                continue
+            changed.append(mention)
+            updates.append({
+                "id": row.id,
+                "sentiment": analysis["sentiment"],
+                "sentiment_score": analysis["score"],
+                "reason": analysis["reason"],
+                "reason_detail": analysis["reason_detail"],
+                "language": analysis["language"],
+            })
+
+        try:
+            if updates:
+                db.execute(update(Mention), updates)
+                self._recompute_alerts(db, changed)
+            reindex_aspects(db, analyzed)
+            checkpoint.last_mention_id = rows[-1].id
+            checkpoint.processed += len(rows)
+            checkpoint.changed += len(updates)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(updates)
+
+    def run(self, reset: bool = False) -> Dict:
+        """
+        Exécuter (ou reprendre) le job.
+        Les lots sont lus par vagues de `workers` lots, analysés en parallèle
+        puis écrits dans l'ordre des id pour que le point de contrôle reste exact.
+        """
+        db = self.session_factory()
+        try:
+            checkpoint = self._load_checkpoint(db, reset)
+            last_id = checkpoint.last_mention_id
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                while True:
+                    chunks = []
+                    for _ in range(self.workers):
+                        rows = self._read_chunk(db, last_id)
+                        if not rows:
+                            break
+                        chunks.append(rows)
+                        last_id = rows[-1].id
+                    if not chunks:
+                        break
+
+                    futures = [executor.submit(self._analyze, rows) for rows in chunks]
+                    for rows, future in zip(chunks, futures):
+                        changed = self._apply(db, rows, future.result(), checkpoint)
+                        logger.info(
+                            f"Reprocessing job {self.job_name}: mentions up to {rows[-1].id} "
+                            f"({len(rows)} read, {changed} changed)"
+                        )
+
+            # Raisons et sentiments modifiés: recalculer les agrégats de volume
+            rebuild_rollups(db, self.entity_id)
+            checkpoint.completed_at = datetime.utcnow()
+            db.commit()
+            spike_detector.forget()
+            return {
+                "job_name": self.job_name,
+                "analyzer_version": checkpoint.analyzer_version,
+                "last_mention_id": checkpoint.last_mention_id,
+                "processed": checkpoint.processed,
+                "changed": checkpoint.changed,
+            }
+        finally:
+            db.close()
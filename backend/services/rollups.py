@@ -0,0 +1,130 @@
+"""
+Agrégats de volume des mentions (table mention_rollups)
+
+Pour chaque entité, raison et fenêtre de ROLLUP_WINDOW_MINUTES minutes
+(selon la date de publication, en UTC): nombre de mentions et de mentions
+négatives. Les compteurs sont incrémentés à l'ingestion, dans la
+transaction de l'appelant, par un INSERT ... ON CONFLICT DO UPDATE.
+
+Après une réanalyse (raisons / sentiments modifiés) ou un changement de
+ROLLUP_WINDOW_MINUTES, rebuild_rollups recalcule les compteurs à partir
+des mentions (python reprocess_mentions.py --rebuild-rollups).
+"""
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from database import dialect_insert
+from models import Mention, MentionRollup, ReasonType, SentimentType
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_WINDOW_MINUTES = int(os.getenv("ROLLUP_WINDOW_MINUTES", 60))
+ROLLUP_WINDOW = timedelta(minutes=ROLLUP_WINDOW_MINUTES)
+# Nombre de lignes par INSERT multi-valeurs (limite de variables SQLite)
+_UPSERT_CHUNK_SIZE = 500
+_EPOCH = datetime(1970, 1, 1)
+
+RollupKey = Tuple[int, ReasonType, datetime]
+
+
+def bucket_start(moment: datetime) -> datetime:
+    """Début (UTC, sans fuseau) de la fenêtre contenant une date"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment - (moment - _EPOCH) % ROLLUP_WINDOW
+
+
+def rollup_key(mention: Mention) -> RollupKey:
+    return mention.entity_id, mention.reason or ReasonType.OTHER, bucket_start(mention.published_at)
+
+
+def _count(mentions: Iterable) -> Dict[RollupKey, list]:
+    counts: Dict[RollupKey, list] = {}
+    for mention in mentions:
+        entry = counts.setdefault(rollup_key(mention), [0, 0])
+        entry[0] += 1
+        if mention.sentiment == SentimentType.NEGATIVE:
+            entry[1] += 1
+    return counts
+
+
+def _upsert(db: Session, counts: Dict[RollupKey, list], replace: bool):
+    """Écrire des compteurs: ajoutés aux compteurs existants, ou les remplaçant (replace=True)"""
+    rows = [
+        {
+            "entity_id": entity_id,
+            "reason": reason,
+            "bucket_start": start,
+            "mention_count": mention_count,
+            "negative_count": negative_count,
+        }
+        for (entity_id, reason, start), (mention_count, negative_count) in counts.items()
+    ]
+    table = MentionRollup.__table__
+    for i in range(0, len(rows), _UPSERT_CHUNK_SIZE):
+        statement = dialect_insert(db, table).values(rows[i:i + _UPSERT_CHUNK_SIZE])
+        if replace:
+            values = {
+                "mention_count": statement.excluded.mention_count,
+                "negative_count": statement.excluded.negative_count,
+            }
+        else:
+            values = {
+                "mention_count": table.c.mention_count + statement.excluded.mention_count,
+                "negative_count": table.c.negative_count + statement.excluded.negative_count,
+            }
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.entity_id, table.c.reason, table.c.bucket_start],
+            set_=values
+        ))
+
+
+def update_rollups(db: Session, mentions: Iterable[Mention]):
+    """Ajouter de nouvelles mentions aux agrégats (commit à la charge de l'appelant)"""
+    counts = _count(mentions)
+    if counts:
+        _upsert(db, counts, replace=False)
+
+
+def mark_spikes(db: Session, spikes: Iterable[Tuple[RollupKey, str]]):
+    """Noter les pics signalés (clé d'agrégat, "volume" ou "negative")"""
+    for (entity_id, reason, start), metric in spikes:
+        db.execute(
+            update(MentionRollup)
+            .where(
+                MentionRollup.entity_id == entity_id,
+                MentionRollup.reason == reason,
+                MentionRollup.bucket_start == start
+            )
+            .values({f"{metric}_spike": True})
+        )
+
+
+def rebuild_rollups(db: Session, entity_id: Optional[int] = None) -> int:
+    """
+    Recalculer les agrégats à partir des mentions (toutes, ou celles d'une entité).
+    Les indicateurs de pics déjà signalés sont conservés. Retourne le nombre d'agrégats.
+    """
+    query = db.query(Mention.entity_id, Mention.reason, Mention.sentiment, Mention.published_at)
+    reset = update(MentionRollup).values(mention_count=0, negative_count=0)
+    if entity_id is not None:
+        query = query.filter(Mention.entity_id == entity_id)
+        reset = reset.where(MentionRollup.entity_id == entity_id)
+
+    counts = _count(query.yield_per(5000))
+    db.execute(reset)
+    if counts:
+        _upsert(db, counts, replace=True)
+    # Fenêtres devenues vides et sans pic signalé
+    db.query(MentionRollup).filter(
+        MentionRollup.mention_count == 0,
+        MentionRollup.volume_spike == False,
+        MentionRollup.negative_spike == False
+    ).delete(synchronize_session=False)
+    logger.info(f"Rebuilt {len(counts)} mention rollup(s)")
+    return len(counts)
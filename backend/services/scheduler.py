@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from database import SessionLocal
 from models import Entity
 from services.collector import DataCollector
+from services.insights import refresh_all_snapshots
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +29,11 @@ class CollectionScheduler:
                     collector.collect_for_entity(entity.id, force=False)
                 except Exception as e:
                     logger.error(f"Error collecting for entity {entity.id}: {e}")
+            
+            # Rafraîchir les insights précalculés avec les nouvelles mentions
+            refreshed = refresh_all_snapshots(db)
+            db.commit()
+            logger.info(f"{refreshed} insights snapshot(s) refreshed")
         finally:
             db.close()
     
@@ -0,0 +1,108 @@
+"""
+Mise à niveau du schéma d'une base existante
+
+Les tables sont créées par Base.metadata.create_all, qui ne modifie pas une
+table déjà présente: les colonnes apparues depuis sa création sont ajoutées
+ici (avec leur valeur par défaut, les lignes existantes la reçoivent), suivies
+des instructions qui remplissent les lignes existantes ou créent leurs index.
+Sur PostgreSQL, les colonnes Enum sont des types natifs (reasontype...) créés
+une seule fois: les valeurs ajoutées depuis à ReasonType & co. y sont ajoutées
+par ALTER TYPE ... ADD VALUE IF NOT EXISTS.
+upgrade_schema est appelé au démarrage de l'API, par init_db.py et par
+reprocess_mentions.py; chaque étape est idempotente.
+"""
+import logging
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Enum, inspect, text
+from sqlalchemy.engine import Engine
+
+import models  # noqa: F401 (tables des modèles dans Base.metadata)
+from database import Base
+
+logger = logging.getLogger(__name__)
+
+
+class _AddedColumn(NamedTuple):
+    table: str
+    column: str
+    definition: str  # SQL commun à SQLite et PostgreSQL
+    # (instruction, table dont elle a besoin ou None) exécutées juste après l'ajout
+    followups: Tuple[Tuple[str, Optional[str]], ...] = ()
+
+
+# Compteurs d'un incident: ses alertes non résolues
+_INCIDENT_COUNTERS = ", ".join(
+    f"{column} = (SELECT COUNT(*) FROM alerts WHERE alerts.incident_id = incidents.id "
+    f"AND NOT alerts.is_resolved{condition})"
+    for column, condition in (
+        ("alert_count", ""),
+        ("critical_count", " AND alerts.severity = 'critical'"),
+        ("high_count", " AND alerts.severity = 'high'"),
+        ("medium_count", " AND alerts.severity = 'medium'"),
+        ("low_count", " AND alerts.severity = 'low'"),
+    )
+)
+
+_ADDED_COLUMNS: List[_AddedColumn] = [
+    _AddedColumn("alerts", "kind", "VARCHAR(20) NOT NULL DEFAULT 'mention'", (
+        # Alertes de pic créées avant la colonne: reconnues à leur message (spike_detector)
+        ("UPDATE alerts SET kind = 'spike' WHERE message LIKE 'Pic de %'", None),
+    )),
+    _AddedColumn("mentions", "reason_provided", "BOOLEAN NOT NULL DEFAULT FALSE"),
+    _AddedColumn("alerts", "incident_id", "INTEGER REFERENCES incidents (id) ON DELETE SET NULL", (
+        ("CREATE INDEX IF NOT EXISTS ix_alerts_incident_id ON alerts (incident_id)", None),
+        # Appartenance autrefois portée par la table incident_alerts (conservée, plus utilisée)
+        (
+            "UPDATE alerts SET incident_id = "
+            "(SELECT incident_id FROM incident_alerts WHERE incident_alerts.alert_id = alerts.id)",
+            "incident_alerts",
+        ),
+        (f"UPDATE incidents SET {_INCIDENT_COUNTERS}", None),
+    )),
+]
+
+
+def native_enums() -> List[Enum]:
+    """Types Enum natifs des modèles (un par nom de type PostgreSQL)"""
+    enums = {}
+    for table in Base.metadata.tables.values():
+        for column in table.columns:
+            if isinstance(column.type, Enum) and column.type.native_enum and column.type.name:
+                enums.setdefault(column.type.name, column.type)
+    return list(enums.values())
+
+
+def ensure_enum_values(engine: Engine):
+    """Ajouter aux types enum PostgreSQL existants les valeurs apparues depuis leur création"""
+    if engine.dialect.name != "postgresql":
+        return
+    # ADD VALUE n'est pas accepté dans un bloc de transaction avant PostgreSQL 12
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for enum_type in native_enums():
+            existing = set(connection.execute(
+                text("SELECT e.enumlabel FROM pg_enum e JOIN pg_type t ON t.oid = e.enumtypid WHERE t.typname = :name"),
+                {"name": enum_type.name}
+            ).scalars())
+            if not existing:
+                continue  # Type absent (créé par create_all avec toutes ses valeurs)
+            for value in enum_type.enums:
+                if value not in existing:
+                    connection.execute(text(f"ALTER TYPE {enum_type.name} ADD VALUE IF NOT EXISTS '{value}'"))
+                    logger.info(f"Value {value} added to enum type {enum_type.name}")
+
+
+def upgrade_schema(engine: Engine):
+    """Ajouter aux tables existantes les colonnes et valeurs d'enum manquantes (après create_all)"""
+    ensure_enum_values(engine)
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for added in _ADDED_COLUMNS:
+            existing = {info["name"] for info in inspector.get_columns(added.table)}
+            if added.column in existing:
+                continue
+            connection.execute(text(f"ALTER TABLE {added.table} ADD COLUMN {added.column} {added.definition}"))
+            for statement, required_table in added.followups:
+                if required_table is None or inspector.has_table(required_table):
+                    connection.execute(text(statement))
+            logger.info(f"Column {added.table}.{added.column} added")
@@ -0,0 +1,195 @@
+"""
+Recherche plein texte dans le contenu des mentions
+
+- SQLite: table virtuelle FTS5 "mentions_fts" (contenu externe: la table
+  mentions), tenue à jour par des triggers à l'insertion, à la modification
+  et à la suppression; classement bm25, extraits surlignés par highlight().
+- PostgreSQL: colonne générée mentions.search_vector (tsvector, configuration
+  "simple": mentions en plusieurs langues) avec un index GIN; classement
+  ts_rank_cd, extraits par ts_headline.
+
+Le contenu des extraits est échappé (HTML): seules les balises <mark> qui
+entourent les termes trouvés sont du HTML.
+
+ensure_search_index (appelé au démarrage de l'API, par init_db.py, et à la
+première recherche d'un processus où il n'a pas encore été appelé, comme sur
+Vercel où le lifespan est désactivé) crée l'index s'il manque et le remplit à
+partir des mentions existantes. Si FTS5 n'est pas disponible, la recherche se
+rabat sur un filtre LIKE, sans classement.
+
+Un astérisque final ("rembours*") recherche par préfixe: opérateur de préfixe
+FTS5, ou lexème suivi de :* dans un to_tsquery ajouté à websearch_to_tsquery
+(qui ignore l'astérisque) sous PostgreSQL.
+"""
+import html
+import logging
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import column, func, literal, literal_column, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+
+from database import engine
+from models import Mention
+
+logger = logging.getLogger(__name__)
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# Délimiteurs posés par la base autour des termes trouvés, remplacés par les
+# balises après échappement du contenu (caractères de contrôle, absents du texte)
+_START_SENTINEL = "\x02"
+_END_SENTINEL = "\x03"
+
+_SQLITE_STATEMENTS = [
+    """CREATE VIRTUAL TABLE mentions_fts USING fts5(
+        content, content='mentions', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS mentions_fts_insert AFTER INSERT ON mentions BEGIN
+        INSERT INTO mentions_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS mentions_fts_delete AFTER DELETE ON mentions BEGIN
+        INSERT INTO mentions_fts(mentions_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS mentions_fts_update AFTER UPDATE OF content ON mentions BEGIN
+        INSERT INTO mentions_fts(mentions_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO mentions_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    "INSERT INTO mentions_fts(mentions_fts) VALUES ('rebuild')",
+]
+
+_POSTGRES_STATEMENTS = [
+    """ALTER TABLE mentions ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_mentions_search_vector ON mentions USING GIN (search_vector)",
+]
+
+_fts = table("mentions_fts", column("rowid"), column("content"))
+# Moteur de recherche par dialecte, déterminé par ensure_search_index
+_available = {}
+_WORD = re.compile(r"[\w'-]+\*?")
+_PREFIX_WORD = re.compile(r"[\w'-]+\*")
+# Lexèmes d'un mot à préfixe sous PostgreSQL (lettres et chiffres: rien à échapper dans to_tsquery)
+_LEXEME = re.compile(r"[^\W_]+")
+
+
+def ensure_search_index(engine: Engine) -> bool:
+    """Créer l'index plein texte s'il n'existe pas encore; retourne False si indisponible"""
+    dialect = engine.dialect.name
+    try:
+        with engine.begin() as connection:
+            if dialect == "postgresql":
+                for statement in _POSTGRES_STATEMENTS:
+                    connection.execute(text(statement))
+            else:
+                exists = connection.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'mentions_fts'"
+                )).first()
+                if not exists:
+                    for statement in _SQLITE_STATEMENTS:
+                        connection.execute(text(statement))
+                    logger.info("Full-text index mentions_fts created")
+        _available[dialect] = True
+    except Exception as exc:
+        logger.warning(f"Full-text search unavailable, falling back to LIKE: {exc}")
+        _available[dialect] = False
+    return _available[dialect]
+
+
+def fts_query(query: str) -> str:
+    """
+    Requête FTS5 sûre à partir de la saisie: chaque mot entre guillemets (tous
+    requis), un astérisque final conservé comme recherche par préfixe
+    """
+    terms = []
+    for word in _WORD.findall(query):
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', "")
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def pg_tsquery(query: str):
+    """
+    tsquery PostgreSQL de la saisie: websearch_to_tsquery pour les mots (guillemets,
+    or, -), et les mots terminés par un astérisque en recherche par préfixe
+    ("rembours*" -> 'rembours':*), tous requis
+    """
+    prefixes = []
+    for word in _PREFIX_WORD.findall(query):
+        lexemes = _LEXEME.findall(word)
+        if lexemes:
+            prefixes.append(" <-> ".join(lexemes[:-1] + [f"{lexemes[-1]}:*"]))
+    plain = _PREFIX_WORD.sub(" ", query).strip()
+    if not prefixes:
+        return func.websearch_to_tsquery("simple", query)
+    tsquery = func.to_tsquery("simple", " & ".join(prefixes))
+    if plain:
+        tsquery = func.websearch_to_tsquery("simple", plain).op("&&")(tsquery)
+    return tsquery
+
+
+def search_mentions(
+    db: Session,
+    query: str,
+    filtered: Query,
+    skip: int = 0,
+    limit: int = 50
+) -> List[Tuple[Mention, Optional[float], str]]:
+    """
+    Mentions dont le contenu correspond à la recherche, les plus pertinentes d'abord.
+    filtered: requête sur Mention portant déjà les autres filtres (entité, source...).
+    Retourne (mention, score de pertinence, contenu surligné).
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect not in _available:
+        # Index créé sur la base principale (une réplique le reçoit par réplication)
+        ensure_search_index(engine)
+    if not _available.get(dialect, False):
+        return _search_like(query, filtered, skip, limit)
+
+    if dialect == "postgresql":
+        tsquery = pg_tsquery(query)
+        vector = literal_column("mentions.search_vector")
+        rank = func.ts_rank_cd(vector, tsquery)
+        highlight = func.ts_headline(
+            "simple", Mention.content, tsquery,
+            f'StartSel="{_START_SENTINEL}", StopSel="{_END_SENTINEL}", HighlightAll=true'
+        )
+        rows = filtered.add_columns(rank.label("rank"), highlight.label("highlight")).filter(
+            vector.op("@@")(tsquery)
+        ).order_by(rank.desc(), Mention.published_at.desc()).offset(skip).limit(limit).all()
+        return [(mention, float(score), _escape_snippet(snippet)) for mention, score, snippet in rows]
+
+    match = fts_query(query)
+    if not match:
+        return []
+    # bm25: plus la valeur est basse, plus la mention est pertinente
+    rank = func.bm25(literal_column("mentions_fts"))
+    highlight = func.highlight(literal_column("mentions_fts"), 0, _START_SENTINEL, _END_SENTINEL)
+    rows = filtered.add_columns(rank.label("rank"), highlight.label("highlight")).join(
+        _fts, _fts.c.rowid == Mention.id
+    ).filter(
+        literal_column("mentions_fts").op("MATCH")(literal(match))
+    ).order_by(rank, Mention.published_at.desc()).offset(skip).limit(limit).all()
+    return [(mention, -score, _escape_snippet(snippet)) for mention, score, snippet in rows]
+
+
+def _escape_snippet(snippet: str) -> str:
+    """Échapper le contenu surligné par la base, puis poser les balises <mark>"""
+    return html.escape(snippet).replace(_START_SENTINEL, HIGHLIGHT_START).replace(_END_SENTINEL, HIGHLIGHT_END)
+
+
+def _search_like(query: str, filtered: Query, skip: int, limit: int) -> List[Tuple[Mention, Optional[float], str]]:
+    """Recherche de secours (sans index): tous les mots présents, mentions les plus récentes d'abord"""
+    words = [word.rstrip("*") for word in _WORD.findall(query)]
+    words = [word for word in words if word]
+    if not words:
+        return []
+    mentions = filtered.filter(
+        *(Mention.content.ilike(f"%{word}%") for word in words)
+    ).order_by(Mention.published_at.desc()).offset(skip).limit(limit).all()
+    return [(mention, None, html.escape(mention.content)) for mention in mentions]
@@ -1,90 +1,290 @@
 """
 Service d'analyse de sentiment utilisant Azure Cognitive Services
+
+Backends disponibles (SENTIMENT_BACKEND): azure, local (modèle NumPy hors ligne),
+lexicon (mots-clés). Par défaut (auto), Azure s'il est configuré, sinon le lexique.
+Le modèle local n'est utilisé que s'il est demandé explicitement: sur les textes
+annotés du dépôt, sa précision seule (~54% en validation croisée, cf.
+benchmarks/bench_local_sentiment.py) reste inférieure à celle du lexique. Le
+backend local applique donc d'abord le lexique (langue du texte, vocabulaire du
+pack de l'entité) et ne confie au modèle que les textes qu'il laisse neutres.
+Une valeur inconnue de SENTIMENT_BACKEND est refusée (ValueError).
+
+Chaque appel Azure est borné par AZURE_LATENCY_BUDGET, nouvelles tentatives
+comprises: au-delà, le lot est analysé hors ligne et l'appel compte comme un
+échec du disjoncteur. Quand le disjoncteur est ouvert (comme en repli d'un
+appel en échec), les backends auto et azure passent à l'analyse hors ligne de
+l'analyseur, c'est-à-dire au lexique: le modèle local n'est chargé que pour
+SENTIMENT_BACKEND=local, moins précis que le lexique seul.
 """
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from azure.ai.textanalytics import TextAnalyticsClient
 from azure.core.credentials import AzureKeyCredential
-from typing import List, Dict
+from collections import Counter
+from typing import Collection, List, Dict, Optional, Tuple
 from models import SentimentType
+from services.circuit_breaker import OPEN, CircuitBreaker
+from services.keyword_matcher import KeywordMatcher
+from services.local_sentiment_model import LOCAL_MODEL_VERSION, get_local_model
+from services.text_pipeline import SENTIMENT_VOCABULARY, TextFeatures
 import logging
 
 logger = logging.getLogger(__name__)
 
+SENTIMENT_BACKENDS = ("auto", "azure", "local", "lexicon")
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "auto").lower()
+
+# Nombre maximum de documents acceptés par Azure pour une requête analyze_sentiment
+AZURE_MAX_BATCH_SIZE = 10
+# Nombre de requêtes Azure envoyées en parallèle par analyze_batch
+AZURE_MAX_CONCURRENCY = int(os.getenv("AZURE_MAX_CONCURRENCY", 4))
+# Délai global d'un appel Azure (secondes), nouvelles tentatives comprises: au-delà,
+# l'appel est abandonné (repli hors ligne) et compte comme un échec
+AZURE_LATENCY_BUDGET = float(os.getenv("AZURE_LATENCY_BUDGET", 3.0))
+# Nouvelles tentatives du SDK Azure (10 par défaut dans azure-core, avec attente exponentielle)
+AZURE_MAX_RETRIES = int(os.getenv("AZURE_MAX_RETRIES", 1))
+# Délais de connexion et de lecture d'une tentative: le budget est partagé entre
+# les tentatives, pour que le thread d'un appel abandonné se termine peu après
+AZURE_ATTEMPT_TIMEOUT = AZURE_LATENCY_BUDGET / (2 * (AZURE_MAX_RETRIES + 1))
+AZURE_BREAKER_FAILURE_THRESHOLD = int(os.getenv("AZURE_BREAKER_FAILURE_THRESHOLD", 5))
+AZURE_BREAKER_RESET_TIMEOUT = float(os.getenv("AZURE_BREAKER_RESET_TIMEOUT", 30.0))
+
+# Disjoncteur partagé par tous les analyseurs du processus: quand Azure est
+# indisponible ou trop lent, les analyses passent directement au backend hors ligne
+azure_breaker = CircuitBreaker(
+    "azure-text-analytics",
+    failure_threshold=AZURE_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=AZURE_BREAKER_RESET_TIMEOUT,
+    latency_budget=AZURE_LATENCY_BUDGET
+)
+# Threads des appels Azure, attendus au plus AZURE_LATENCY_BUDGET secondes: de quoi
+# servir plusieurs analyze_batch simultanés sans qu'un appel attende son tour
+_azure_calls = ThreadPoolExecutor(max_workers=4 * AZURE_MAX_CONCURRENCY, thread_name_prefix="azure-sentiment")
+
+# Versions des backends: à incrémenter lorsque leurs résultats changent
+# (invalide les résultats mis en cache)
+AZURE_MODEL_VERSION = "azure-1"
+LEXICON_VERSION = "lexicon-4"
+
+# Lexiques de l'analyse de repli par langue, compilés une seule fois
+POSITIVE_WORDS = ["excellent", "super", "génial", "merci", "bravo", "félicitations",
+                  "parfait", "top", "recommandé", "satisfait", "content", "heureux"]
+NEGATIVE_WORDS = ["mauvais", "nul", "déçu", "problème", "erreur", "bug", "lent",
+                  "cher", "inutile", "décevant", "horrible", "catastrophe", "scandale"]
+POSITIVE_WORDS_EN = ["excellent", "great", "good", "awesome", "amazing", "love", "perfect", "best",
+                     "recommend", "satisfied", "happy", "nice", "smooth", "fantastic", "incredible"]
+NEGATIVE_WORDS_EN = ["bad", "poor", "worst", "terrible", "horrible", "disappointed", "disappointing",
+                     "problem", "issue", "bug", "slow", "lag", "expensive", "overpriced", "useless",
+                     "broken", "waste", "frustrating", "dangerous"]
+LEXICONS = {
+    "fr": (POSITIVE_WORDS, NEGATIVE_WORDS),
+    "en": (POSITIVE_WORDS_EN, NEGATIVE_WORDS_EN),
+}
+
+
+def build_sentiment_matchers(lexicons: Dict[str, Tuple[List[str], List[str]]]) -> Dict[Optional[str], KeywordMatcher]:
+    """Compiler un matcher par langue, plus l'union des lexiques (clé None) pour les autres langues"""
+    matchers: Dict[Optional[str], KeywordMatcher] = {
+        language: KeywordMatcher({SentimentType.POSITIVE: positive, SentimentType.NEGATIVE: negative})
+        for language, (positive, negative) in lexicons.items()
+    }
+    matchers[None] = KeywordMatcher({
+        SentimentType.POSITIVE: [word for positive, _ in lexicons.values() for word in positive],
+        SentimentType.NEGATIVE: [word for _, negative in lexicons.values() for word in negative],
+    })
+    return matchers
+
+
+FALLBACK_MATCHERS = build_sentiment_matchers(LEXICONS)
+FALLBACK_MATCHER = FALLBACK_MATCHERS["fr"]
+
+
+def sentiment_vocabulary(lexicons: Dict[str, Tuple[List[str], List[str]]]) -> Dict[Tuple[str, SentimentType], List[str]]:
+    """Lexiques par langue au format du pipeline de texte: {(langue, polarité): [mots]}"""
+    vocabulary = {}
+    for language, (positive, negative) in lexicons.items():
+        vocabulary[(language, SentimentType.POSITIVE)] = positive
+        vocabulary[(language, SentimentType.NEGATIVE)] = negative
+    return vocabulary
+
+
+def count_sentiment(
+    features: TextFeatures,
+    language: Optional[str],
+    languages: Collection[str],
+    start: int = 0,
+    end: Optional[int] = None,
+    distinct: bool = True
+) -> Counter:
+    """
+    Compter les mots positifs / négatifs d'un texte analysé par le pipeline
+    (mêmes règles que build_sentiment_matchers: lexique de la langue si elle fait
+    partie de `languages`, union des lexiques sinon).
+    distinct=True compte chaque mot une seule fois, sinon chaque occurrence.
+    """
+    if language not in languages:
+        language = None
+    counts = Counter()
+    seen = set()
+    for position, keyword, (word_language, polarity) in features.occurrences(SENTIMENT_VOCABULARY, start, end):
+        if language is not None and word_language != language:
+            continue
+        # Union des lexiques: un mot lu dans plusieurs langues ne compte qu'une fois
+        keys = ((keyword, polarity) if distinct else (position, keyword, polarity),)
+        if language is None:
+            keys += ((position, polarity),)
+        if not any(key in seen for key in keys):
+            seen.update(keys)
+            counts[polarity] += 1
+    return counts
+
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(self, backend: Optional[str] = None):
+        self.requested_backend = (backend or SENTIMENT_BACKEND).lower()
+        if self.requested_backend not in SENTIMENT_BACKENDS:
+            raise ValueError(
+                f"Unknown sentiment backend '{self.requested_backend}' "
+                f"(expected one of: {', '.join(SENTIMENT_BACKENDS)})"
+            )
         self.key = os.getenv("AZURE_TEXT_ANALYTICS_KEY")
         self.endpoint = os.getenv("AZURE_TEXT_ANALYTICS_ENDPOINT")
+        self.client = None
+        self.local_model = None
         
-        if not self.key or not self.endpoint:
-            logger.warning("Azure credentials not configured. Using fallback sentiment analysis.")
-            self.client = None
-        else:
+        if self.requested_backend in ("auto", "azure"):
+            if not self.key or not self.endpoint:
+                logger.warning("Azure credentials not configured. Using fallback sentiment analysis.")
+            else:
+                try:
+                    self.client = TextAnalyticsClient(
+                        endpoint=self.endpoint,
+                        credential=AzureKeyCredential(self.key),
+                        retry_total=AZURE_MAX_RETRIES,
+                        connection_timeout=AZURE_ATTEMPT_TIMEOUT,
+                        read_timeout=AZURE_ATTEMPT_TIMEOUT
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to initialize Azure client: {e}")
+                    self.client = None
+        
+        # Modèle local seulement sur demande (SENTIMENT_BACKEND=local): moins précis que le lexique
+        if self.requested_backend == "local":
             try:
-                self.client = TextAnalyticsClient(
-                    endpoint=self.endpoint,
-                    credential=AzureKeyCredential(self.key)
-                )
+                self.local_model = get_local_model()
             except Exception as e:
-                logger.error(f"Failed to initialize Azure client: {e}")
-                self.client = None
+                logger.error(f"Failed to load local sentiment model: {e}")
+                self.local_model = None
+    
+    @property
+    def backend(self) -> str:
+        """Backend utilisé pour l'analyse: azure, local ou lexicon"""
+        if self.client:
+            return "azure"
+        return "local" if self.local_model else "lexicon"
     
-    def analyze_sentiment(self, text: str, language: str = "fr") -> Dict:
+    @property
+    def version(self) -> str:
+        """Version des résultats produits (clé de cache)"""
+        backend = self.backend
+        if backend == "azure":
+            return AZURE_MODEL_VERSION
+        if backend == "local":
+            return f"local-{LOCAL_MODEL_VERSION}+{LEXICON_VERSION}"
+        return LEXICON_VERSION
+    
+    def analyze_sentiment(self, text: str, language: str = "fr", pack=None) -> Dict:
         """
         Analyse le sentiment d'un texte
         Retourne: {sentiment: SentimentType, score: float}
         """
         if self.client:
-            try:
-                result = self.client.analyze_sentiment(
-                    documents=[text],
-                    language=language
-                )[0]
-                
-                if result.is_error:
-                    logger.error(f"Error analyzing sentiment: {result.error}")
-                    return self._fallback_analysis(text)
-                
-                # Convertir le sentiment Azure en notre enum
-                azure_sentiment = result.sentiment.lower()
-                if azure_sentiment == "positive":
-                    sentiment = SentimentType.POSITIVE
-                    score = result.confidence_scores.positive
-                elif azure_sentiment == "negative":
-                    sentiment = SentimentType.NEGATIVE
-                    score = -result.confidence_scores.negative
-                else:
-                    sentiment = SentimentType.NEUTRAL
-                    score = 0.0
-                
-                return {
-                    "sentiment": sentiment,
-                    "score": score,
-                    "confidence": {
-                        "positive": result.confidence_scores.positive,
-                        "neutral": result.confidence_scores.neutral,
-                        "negative": result.confidence_scores.negative
-                    }
-                }
-            except Exception as e:
-                logger.error(f"Error calling Azure API: {e}")
-                return self._fallback_analysis(text)
+            return self._analyze_chunk([text], language, pack)[0]
         else:
-            return self._fallback_analysis(text)
+            return self._offline_batch([text], language, pack)[0]
     
-    def _fallback_analysis(self, text: str) -> Dict:
+    def _analyze_chunk(self, texts: List[str], language: str, pack=None) -> List[Dict]:
         """
-        Analyse de sentiment basique en cas d'absence d'Azure
-        Utilise des mots-clés simples
+        Analyse un lot de textes (au plus AZURE_MAX_BATCH_SIZE) en une seule requête Azure.
+        Les documents en erreur sont analysés individuellement par le fallback.
+        Si le disjoncteur Azure est ouvert, ou si la réponse n'arrive pas dans le
+        budget de latence, le lot part au backend hors ligne.
         """
-        text_lower = text.lower()
+        if not azure_breaker.allow_request():
+            return self._offline_batch(texts, language, pack)
+        
+        started = time.monotonic()
+        call = _azure_calls.submit(self.client.analyze_sentiment, documents=texts, language=language)
+        try:
+            results = call.result(timeout=AZURE_LATENCY_BUDGET)
+        except FutureTimeoutError:
+            # L'appel continue dans son thread (délais de tentative) mais sa réponse est ignorée
+            call.cancel()
+            azure_breaker.record_failure(
+                time.monotonic() - started, f"no response within {AZURE_LATENCY_BUDGET:.2f}s"
+            )
+            logger.error(f"Azure API did not respond within {AZURE_LATENCY_BUDGET:.2f}s")
+            return self._offline_batch(texts, language, pack)
+        except Exception as e:
+            azure_breaker.record_failure(time.monotonic() - started, str(e))
+            logger.error(f"Error calling Azure API: {e}")
+            return self._offline_batch(texts, language, pack)
+        azure_breaker.record_success(time.monotonic() - started)
         
-        positive_words = ["excellent", "super", "génial", "merci", "bravo", "félicitations", 
-                         "parfait", "top", "recommandé", "satisfait", "content", "heureux"]
-        negative_words = ["mauvais", "nul", "déçu", "problème", "erreur", "bug", "lent",
-                         "cher", "inutile", "décevant", "horrible", "catastrophe", "scandale"]
+        analyses = []
+        failed = []
+        for index, (text, result) in enumerate(zip(texts, results)):
+            if result.is_error:
+                logger.error(f"Error analyzing sentiment: {result.error}")
+                analyses.append(None)
+                failed.append(index)
+            else:
+                analyses.append(self._convert_azure_result(result))
+        if failed:
+            for index, analysis in zip(failed, self._offline_batch([texts[i] for i in failed], language, pack)):
+                analyses[index] = analysis
+        return analyses
+    
+    @staticmethod
+    def _convert_azure_result(result) -> Dict:
+        """Convertir un résultat Azure en notre format"""
+        # Convertir le sentiment Azure en notre enum
+        azure_sentiment = result.sentiment.lower()
+        if azure_sentiment == "positive":
+            sentiment = SentimentType.POSITIVE
+            score = result.confidence_scores.positive
+        elif azure_sentiment == "negative":
+            sentiment = SentimentType.NEGATIVE
+            score = -result.confidence_scores.negative
+        else:
+            sentiment = SentimentType.NEUTRAL
+            score = 0.0
         
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        return {
+            "sentiment": sentiment,
+            "score": score,
+            "backend": "azure",
+            "confidence": {
+                "positive": result.confidence_scores.positive,
+                "neutral": result.confidence_scores.neutral,
+                "negative": result.confidence_scores.negative
+            }
+        }
+    
+    def _fallback_analysis(self, text: str, language: str = "fr", pack=None) -> Dict:
+        """
+        Analyse de sentiment basique en cas d'absence d'Azure
+        Utilise des mots-clés simples de la langue du texte (correspondance par mots entiers),
+        enrichis du vocabulaire du pack de mots-clés de l'entité s'il est fourni
+        """
+        if pack is not None:
+            counts = count_sentiment(pack.pipeline.analyze(text), language, pack.sentiment_languages)
+        else:
+            matcher = FALLBACK_MATCHERS.get(language) or FALLBACK_MATCHERS[None]
+            counts = matcher.count_labels(text)
+        positive_count = counts[SentimentType.POSITIVE]
+        negative_count = counts[SentimentType.NEGATIVE]
         
         if positive_count > negative_count:
             sentiment = SentimentType.POSITIVE
@@ -99,6 +299,7 @@ class SentimentAnalyzer:
         return {
             "sentiment": sentiment,
             "score": score,
+            "backend": "lexicon",
             "confidence": {
                 "positive": 0.5,
                 "neutral": 0.5,
@@ -106,7 +307,51 @@ class SentimentAnalyzer:
             }
         }
     
-    def analyze_batch(self, texts: List[str], language: str = "fr") -> List[Dict]:
-        """Analyse le sentiment d'une liste de textes"""
-        return [self.analyze_sentiment(text, language) for text in texts]
-
+    def analyze_batch(self, texts: List[str], language: str = "fr", pack=None) -> List[Dict]:
+        """
+        Analyse le sentiment d'une liste de textes.
+        Avec Azure, les textes sont découpés en lots de AZURE_MAX_BATCH_SIZE documents
+        envoyés en parallèle; les résultats sont renvoyés dans l'ordre d'entrée.
+        pack: pack de mots-clés de l'entité (vocabulaire ajouté à l'analyse par lexique)
+        """
+        if not texts:
+            return []
+        if not self.client or azure_breaker.state == OPEN:
+            return self._offline_batch(texts, language, pack)
+        
+        chunks = [
+            texts[i:i + AZURE_MAX_BATCH_SIZE]
+            for i in range(0, len(texts), AZURE_MAX_BATCH_SIZE)
+        ]
+        if len(chunks) == 1:
+            return self._analyze_chunk(chunks[0], language, pack)
+        
+        workers = max(1, min(AZURE_MAX_CONCURRENCY, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            chunk_results = executor.map(
+                lambda chunk: self._analyze_chunk(chunk, language, pack), chunks
+            )
+            return [analysis for analyses in chunk_results for analysis in analyses]
+    
+    def fallback_batch(self, texts: List[str], language: str = "fr", pack=None) -> List[Dict]:
+        """Analyse de repli d'une liste de textes de même langue"""
+        return [self._fallback_analysis(text, language, pack) for text in texts]
+    
+    def _offline_batch(self, texts: List[str], language: str = "fr", pack=None) -> List[Dict]:
+        """
+        Analyse sans réseau: lexique (langue, pack), puis modèle local s'il est
+        disponible pour les textes sans mot de sentiment du lexique
+        """
+        analyses = self.fallback_batch(texts, language, pack)
+        if not self.local_model:
+            return analyses
+        undecided = [
+            index for index, analysis in enumerate(analyses)
+            if analysis["sentiment"] == SentimentType.NEUTRAL
+        ]
+        predictions = self.local_model.predict([texts[index] for index in undecided])
+        for index, prediction in zip(undecided, predictions):
+            analyses[index] = prediction
+        for analysis in analyses:
+            analysis["backend"] = "local"
+        return analyses
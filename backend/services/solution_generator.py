@@ -1,8 +1,54 @@
 """
 Service de génération de solutions pour les problèmes détectés
+
+Une solution ne dépend que de la raison de la mention, des problèmes
+spécifiques détectés dans son contenu et de son niveau de sentiment: ces
+trois éléments forment sa signature ("raison|niveau|problèmes"). Les
+solutions sont mémorisées par signature (LRU de SOLUTION_CACHE_SIZE
+entrées) et la signature de chaque alerte est enregistrée à sa création
+(table alert_solution_signatures): retrouver la solution d'une alerte ne
+demande plus d'analyser le contenu de sa mention.
 """
-from typing import Dict, List
-from models import Mention, ReasonType
+import os
+from functools import lru_cache
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from database import dialect_insert
+from models import Alert, AlertSolutionSignature, Mention, ReasonType, SentimentType
+from services.keyword_matcher import KeywordMatcher
+from services.reason_classifier import REASON_INFLECTION
+from services.text_pipeline import ISSUE_VOCABULARY
+
+SOLUTION_CACHE_SIZE = int(os.getenv("SOLUTION_CACHE_SIZE", 1024))
+# Citations renvoyées par raison dans les solutions agrégées
+SOLUTION_SAMPLE_SIZE = 3
+PRIORITY_RANK = {"critical": 0, "high": 1, "medium": 2}
+
+# Problèmes spécifiques signalés dans les solutions, avec leurs mots-clés
+# (mots entiers; les formes en -s / -ed / -ing sont tolérées).
+# L'ordre est celui des signatures enregistrées: ajouter les nouveaux problèmes à la fin.
+SPECIFIC_ISSUES = {
+    "Device freezing/hanging issues detected": ["hang", "freeze", "freezing", "frozen"],
+    "Overheating concerns identified": ["heating", "overheat"],
+    "Performance lag reported": ["slow", "slowness", "lag", "laggy", "lagging"],
+    "Display-related issues found": ["display", "screen"],
+}
+SPECIFIC_ISSUE_MATCHER = KeywordMatcher(SPECIFIC_ISSUES, inflection=REASON_INFLECTION)
+_ISSUE_LIST = list(SPECIFIC_ISSUES)
+
+
+def sentiment_band(score: float) -> str:
+    """Niveau d'impact d'une mention selon son score de sentiment"""
+    if score < -0.7:
+        return "high"
+    if score < -0.5:
+        return "medium"
+    return "low"
+
 
 class SolutionGenerator:
     """Génère des solutions basées sur le type de problème et le contexte"""
@@ -109,6 +155,56 @@ class SolutionGenerator:
             ],
             "priority": "medium"
         },
+        ReasonType.PUNCTUALITY: {
+            "short": "Improve punctuality and disruption handling",
+            "actions": [
+                "Analyze recurring delays by line and time slot",
+                "Provide real-time information on delays and cancellations",
+                "Automate compensation for delayed or cancelled journeys",
+                "Communicate strike schedules and alternative options in advance"
+            ],
+            "priority": "high"
+        },
+        ReasonType.COMFORT: {
+            "short": "Improve on-board comfort",
+            "actions": [
+                "Adjust capacity on the most crowded services",
+                "Check air conditioning, heating and on-board Wi-Fi",
+                "Plan seat and equipment maintenance",
+                "Inform passengers about expected occupancy"
+            ],
+            "priority": "medium"
+        },
+        ReasonType.CLEANLINESS: {
+            "short": "Raise cleanliness standards",
+            "actions": [
+                "Increase cleaning frequency of vehicles and toilets",
+                "Set up quick reporting of cleanliness issues by passengers",
+                "Audit cleaning contractors on affected lines",
+                "Communicate on the actions taken"
+            ],
+            "priority": "medium"
+        },
+        ReasonType.SAFETY: {
+            "short": "Reinforce passenger safety",
+            "actions": [
+                "Investigate reported incidents with the safety team",
+                "Increase staff and security presence on affected services",
+                "Review crisis communication and evacuation procedures",
+                "Follow up directly with affected passengers"
+            ],
+            "priority": "critical"
+        },
+        ReasonType.DIGITAL_EXPERIENCE: {
+            "short": "Fix digital booking experience",
+            "actions": [
+                "Prioritize fixes for app and website errors reported by users",
+                "Monitor booking and payment funnel failures",
+                "Simplify ticket management and e-ticket access",
+                "Inform users about known issues and workarounds"
+            ],
+            "priority": "high"
+        },
         ReasonType.OTHER: {
             "short": "Address customer concerns",
             "actions": [
@@ -121,43 +217,52 @@ class SolutionGenerator:
         }
     }
     
+    IMPACT_BY_BAND = {
+        "high": "High - Negative sentiment may affect brand reputation",
+        "medium": "Medium - Moderate negative impact expected",
+        "low": "Low - Limited impact but should be addressed",
+    }
+    
     @staticmethod
-    def generate_solution(mention: Mention) -> Dict:
+    def solution_signature(mention: Mention, pack=None) -> str:
         """
-        Génère une solution basée sur la mention et sa raison
+        Signature de la solution d'une mention: "raison|niveau|problèmes"
+        (problèmes: indices dans SPECIFIC_ISSUES, séparés par des virgules)
+        pack: pack de mots-clés de l'entité (réutilise l'analyse du pipeline de texte)
         """
         reason = mention.reason or ReasonType.OTHER
         
+        # Détecter des problèmes spécifiques dans le contenu
+        if pack is not None:
+            found = set(pack.pipeline.analyze(mention.content).labels(ISSUE_VOCABULARY))
+        else:
+            found = set(SPECIFIC_ISSUE_MATCHER.count_labels(mention.content))
+        issues = ",".join(str(index) for index, issue in enumerate(_ISSUE_LIST) if issue in found)
+        return f"{reason.value}|{sentiment_band(mention.sentiment_score)}|{issues}"
+    
+    @staticmethod
+    @lru_cache(maxsize=SOLUTION_CACHE_SIZE)
+    def _solution_for_signature(signature: str) -> Dict:
+        """Solution (partagée, à ne pas modifier) correspondant à une signature"""
+        reason_value, band, issues = signature.split("|")
+        reason = ReasonType(reason_value)
+        specific_issues = [_ISSUE_LIST[int(index)] for index in issues.split(",") if index]
+        
         # Récupérer la solution de base
         solution_template = SolutionGenerator.SOLUTIONS_BY_REASON.get(
             reason, 
             SolutionGenerator.SOLUTIONS_BY_REASON[ReasonType.OTHER]
         )
         
-        # Personnaliser selon le contenu
-        content_lower = mention.content.lower()
-        
-        # Détecter des problèmes spécifiques
-        specific_issues = []
-        if "hang" in content_lower or "freeze" in content_lower:
-            specific_issues.append("Device freezing/hanging issues detected")
-        if "heating" in content_lower or "overheat" in content_lower:
-            specific_issues.append("Overheating concerns identified")
-        if "slow" in content_lower or "lag" in content_lower:
-            specific_issues.append("Performance lag reported")
-        if "display" in content_lower or "screen" in content_lower:
-            specific_issues.append("Display-related issues found")
-        
         # Construire la solution
         solution = {
-            "reason": reason.value if reason else "other",
-            "reason_detail": mention.reason_detail or "General issue",
+            "reason": reason.value,
             "summary": solution_template["short"],
             "priority": solution_template["priority"],
             "recommended_actions": solution_template["actions"].copy(),
             "specific_issues": specific_issues,
-            "estimated_impact": SolutionGenerator._estimate_impact(mention),
-            "timeline": SolutionGenerator._estimate_timeline(mention, solution_template["priority"])
+            "estimated_impact": SolutionGenerator.IMPACT_BY_BAND[band],
+            "timeline": SolutionGenerator._estimate_timeline(solution_template["priority"])
         }
         
         # Ajouter des actions spécifiques si des problèmes sont détectés
@@ -171,18 +276,61 @@ class SolutionGenerator:
         
         return solution
     
+    @staticmethod
+    def solution_for_signature(signature: str, reason_detail: Optional[str] = None) -> Dict:
+        """Solution d'une signature, complétée du détail de la raison (copie modifiable)"""
+        cached = SolutionGenerator._solution_for_signature(signature)
+        return {
+            "reason": cached["reason"],
+            "reason_detail": reason_detail or "General issue",
+            **cached,
+            "recommended_actions": list(cached["recommended_actions"]),
+            "specific_issues": list(cached["specific_issues"]),
+        }
+    
+    @staticmethod
+    def generate_solution(mention: Mention, pack=None) -> Dict:
+        """
+        Génère une solution basée sur la mention et sa raison
+        pack: pack de mots-clés de l'entité (réutilise l'analyse du pipeline de texte)
+        """
+        return SolutionGenerator.solution_for_signature(
+            SolutionGenerator.solution_signature(mention, pack),
+            mention.reason_detail
+        )
+    
+    @staticmethod
+    def solution_for_alert(db: Session, alert: Alert, pack_loader=None) -> Optional[Dict]:
+        """
+        Solution d'une alerte à partir de sa signature enregistrée; pour une alerte
+        sans signature (antérieure, ou mention réanalysée), la signature est calculée
+        et enregistrée (commit à la charge de l'appelant).
+        pack_loader: fonction entity_id -> pack de mots-clés
+        Retourne None si la mention n'existe plus.
+        """
+        row = db.query(AlertSolutionSignature.signature, Mention.reason_detail).join(
+            Alert, Alert.id == AlertSolutionSignature.alert_id
+        ).join(Mention, Mention.id == Alert.mention_id).filter(
+            AlertSolutionSignature.alert_id == alert.id
+        ).first()
+        if row:
+            return SolutionGenerator.solution_for_signature(row.signature, row.reason_detail)
+        
+        mention = db.query(Mention).filter(Mention.id == alert.mention_id).first()
+        if not mention:
+            return None
+        pack = pack_loader(mention.entity_id) if pack_loader else None
+        signature = SolutionGenerator.solution_signature(mention, pack)
+        store_signatures(db, {alert.id: signature})
+        return SolutionGenerator.solution_for_signature(signature, mention.reason_detail)
+    
     @staticmethod
     def _estimate_impact(mention: Mention) -> str:
         """Estime l'impact basé sur le sentiment et la source"""
-        if mention.sentiment_score < -0.7:
-            return "High - Negative sentiment may affect brand reputation"
-        elif mention.sentiment_score < -0.5:
-            return "Medium - Moderate negative impact expected"
-        else:
-            return "Low - Limited impact but should be addressed"
+        return SolutionGenerator.IMPACT_BY_BAND[sentiment_band(mention.sentiment_score)]
     
     @staticmethod
-    def _estimate_timeline(mention: Mention, priority: str) -> str:
+    def _estimate_timeline(priority: str) -> str:
         """Estime le temps de résolution"""
         if priority == "critical":
             return "1-2 weeks - Urgent action required"
@@ -192,7 +340,7 @@ class SolutionGenerator:
             return "1-2 months - Standard resolution timeline"
     
     @staticmethod
-    def generate_bulk_solutions(mentions: List[Mention]) -> Dict:
+    def generate_bulk_solutions(mentions: List[Mention], pack=None) -> Dict:
         """Génère des solutions agrégées pour plusieurs mentions"""
         solutions_by_reason = {}
         
@@ -213,20 +361,117 @@ class SolutionGenerator:
         for reason_key, data in solutions_by_reason.items():
             # Utiliser la première mention comme base
             base_mention = data["mentions"][0]
-            solution = SolutionGenerator.generate_solution(base_mention)
+            solution = SolutionGenerator.generate_solution(base_mention, pack)
             solution["affected_count"] = data["count"]
-            solution["sample_quotes"] = [
-                m.content[:100] + "..." if len(m.content) > 100 else m.content
-                for m in data["mentions"][:3]
-            ]
+            solution["sample_quotes"] = [_quote(m.content) for m in data["mentions"][:SOLUTION_SAMPLE_SIZE]]
             aggregated_solutions.append(solution)
         
         return {
             "total_issues": len(mentions),
             "solutions": aggregated_solutions,
-            "priority_order": sorted(
-                aggregated_solutions,
-                key=lambda x: {"critical": 0, "high": 1, "medium": 2}.get(x["priority"], 3)
+            "priority_order": sorted(aggregated_solutions, key=lambda x: PRIORITY_RANK.get(x["priority"], 3))
+        }
+    
+    @staticmethod
+    def aggregate_solutions(
+        db: Session,
+        entity_id: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        severity: Optional[str] = None,
+        sentiment: Optional[SentimentType] = None,
+        samples: int = SOLUTION_SAMPLE_SIZE,
+        pack=None
+    ) -> Dict:
+        """
+        Équivalent de generate_bulk_solutions calculé en SQL sur les mentions d'un filtre
+        (entité, période de publication, sévérité d'alerte, sentiment): comptes par raison
+        par un GROUP BY, et au plus `samples` mentions par raison (les plus récentes, par
+        ROW_NUMBER() OVER (PARTITION BY raison)); la mémoire utilisée ne dépend pas du
+        nombre de mentions sélectionnées.
+        La solution d'une raison combine le niveau de sentiment moyen et les problèmes
+        spécifiques détectés dans ses citations. total_issues compte les mentions
+        classées (somme des affected_count), unclassified_count celles sans raison.
+        """
+        conditions = []
+        if entity_id is not None:
+            conditions.append(Mention.entity_id == entity_id)
+        if start is not None:
+            conditions.append(Mention.published_at >= start)
+        if end is not None:
+            conditions.append(Mention.published_at < end)
+        if sentiment is not None:
+            conditions.append(Mention.sentiment == sentiment)
+        if severity:
+            conditions.append(
+                select(Alert.id).where(Alert.mention_id == Mention.id, Alert.severity == severity).exists()
             )
+        
+        groups = db.query(Mention.reason, func.count(Mention.id), func.avg(Mention.sentiment_score)).filter(
+            *conditions
+        ).group_by(Mention.reason).all()
+        
+        ranked = select(
+            Mention.reason,
+            Mention.content,
+            Mention.reason_detail,
+            Mention.sentiment_score,
+            func.row_number().over(
+                partition_by=Mention.reason,
+                order_by=(Mention.published_at.desc(), Mention.id.desc())
+            ).label("rank")
+        ).where(Mention.reason.isnot(None), *conditions).subquery()
+        sampled: Dict[ReasonType, List] = {}
+        for row in db.execute(
+            select(ranked).where(ranked.c.rank <= samples).order_by(ranked.c.reason, ranked.c.rank)
+        ):
+            sampled.setdefault(row.reason, []).append(row)
+        
+        aggregated_solutions = []
+        unclassified = 0
+        for reason, count, average_score in groups:
+            if reason is None:
+                unclassified = count
+                continue
+            rows = sampled.get(reason, [])
+            issues = set()
+            for row in rows:
+                issues.update(SolutionGenerator.solution_signature(row, pack).split("|")[2].split(","))
+            issues.discard("")
+            signature = f"{reason.value}|{sentiment_band(average_score)}|{','.join(sorted(issues, key=int))}"
+            solution = SolutionGenerator.solution_for_signature(
+                signature, rows[0].reason_detail if rows else None
+            )
+            solution["affected_count"] = count
+            solution["sample_quotes"] = [_quote(row.content) for row in rows]
+            aggregated_solutions.append(solution)
+        aggregated_solutions.sort(key=lambda x: x["affected_count"], reverse=True)
+        
+        return {
+            "total_issues": sum(solution["affected_count"] for solution in aggregated_solutions),
+            "unclassified_count": unclassified,
+            "solutions": aggregated_solutions,
+            "priority_order": sorted(aggregated_solutions, key=lambda x: PRIORITY_RANK.get(x["priority"], 3))
         }
 
+
+def _quote(content: str) -> str:
+    return content[:100] + "..." if len(content) > 100 else content
+
+
+def store_signatures(db: Session, signatures: Dict[int, str]):
+    """
+    Enregistrer des signatures de solution {alert_id: signature} (commit à la charge de l'appelant).
+    Une signature existante est remplacée: elle ne peut appartenir qu'à une alerte supprimée
+    dont l'id a été réutilisé, ou précéder une réanalyse.
+    """
+    if not signatures:
+        return
+    table = AlertSolutionSignature.__table__
+    statement = dialect_insert(db, table).values([
+        {"alert_id": alert_id, "signature": signature} for alert_id, signature in signatures.items()
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[table.c.alert_id],
+        set_={"signature": statement.excluded.signature}
+    ))
@@ -0,0 +1,230 @@
+"""
+Détection en continu des pics de volume et de négativité des mentions
+
+Pour chaque couple (entité, raison), le détecteur garde en mémoire les
+compteurs de la fenêtre en cours (ROLLUP_WINDOW_MINUTES) et, pour les
+fenêtres terminées, une moyenne et une variance à décroissance exponentielle
+(EWMA) du nombre de mentions et du nombre de mentions négatives. Chaque
+mention ingérée met à jour ces statistiques; lorsque le compteur de la
+fenêtre en cours s'écarte de la moyenne de plus de SPIKE_Z_THRESHOLD
+écarts-types, une alerte agrégée "pic" est créée, rattachée à la mention qui
+a déclenché le pic (une seule par fenêtre et par indicateur). Un pic n'est
+noté comme signalé qu'une fois son alerte créée: un pic observé sans création
+d'alertes (POST /api/mentions) reste signalable par le lot suivant.
+
+Au redémarrage, l'état d'un couple est reconstruit à partir des
+SPIKE_HISTORY_WINDOWS dernières fenêtres de la table mention_rollups,
+sans relire les mentions.
+
+L'état est propre au processus: après un rollback de la session, les
+couples touchés sont oubliés et seront reconstruits depuis les agrégats.
+"""
+import logging
+import math
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import AlertKind, Mention, MentionRollup, ReasonType, SentimentType
+from services.incidents import insert_alerts
+from services.rollups import ROLLUP_WINDOW, ROLLUP_WINDOW_MINUTES, mark_spikes, rollup_key
+
+logger = logging.getLogger(__name__)
+
+SPIKE_EWMA_ALPHA = float(os.getenv("SPIKE_EWMA_ALPHA", 0.1))
+SPIKE_Z_THRESHOLD = float(os.getenv("SPIKE_Z_THRESHOLD", 3.0))
+# Nombre minimum de mentions dans la fenêtre pour signaler un pic
+SPIKE_MIN_COUNT = int(os.getenv("SPIKE_MIN_COUNT", 5))
+# Fenêtres terminées nécessaires avant de signaler un pic (mise en route)
+SPIKE_MIN_WINDOWS = int(os.getenv("SPIKE_MIN_WINDOWS", 12))
+# Fenêtres relues dans mention_rollups pour reconstruire l'état
+SPIKE_HISTORY_WINDOWS = int(os.getenv("SPIKE_HISTORY_WINDOWS", 168))
+# Écart-type minimum (séries creuses: évite qu'une poignée de mentions soit un pic)
+SPIKE_MIN_STD = 1.0
+
+VOLUME = "volume"
+NEGATIVE = "negative"
+METRICS = (VOLUME, NEGATIVE)
+SPIKE_SEVERITY = {VOLUME: "medium", NEGATIVE: "high"}
+
+
+class EwmaStat:
+    """Moyenne et variance à décroissance exponentielle"""
+
+    __slots__ = ("alpha", "mean", "variance")
+
+    def __init__(self, alpha: float = SPIKE_EWMA_ALPHA):
+        self.alpha = alpha
+        self.mean = 0.0
+        self.variance = 0.0
+
+    def update(self, value: float):
+        diff = value - self.mean
+        increment = self.alpha * diff
+        self.mean += increment
+        self.variance = (1 - self.alpha) * (self.variance + diff * increment)
+
+    def zscore(self, value: float) -> float:
+        return (value - self.mean) / max(math.sqrt(self.variance), SPIKE_MIN_STD)
+
+
+class SeriesState:
+    """État d'un couple (entité, raison): fenêtre en cours et statistiques des fenêtres passées"""
+
+    __slots__ = ("window", "counts", "stats", "windows_seen", "alerted")
+
+    def __init__(self, window: datetime):
+        self.window = window
+        self.counts = {metric: 0 for metric in METRICS}
+        self.stats = {metric: EwmaStat() for metric in METRICS}
+        self.windows_seen = 0
+        self.alerted = set()
+
+    def advance(self, window: datetime):
+        """Clore la fenêtre en cours (et les fenêtres vides intermédiaires) jusqu'à `window`"""
+        if window <= self.window:
+            return
+        gap = int((window - self.window) / ROLLUP_WINDOW)
+        for index in range(min(gap, SPIKE_HISTORY_WINDOWS)):
+            for metric in METRICS:
+                self.stats[metric].update(self.counts[metric] if index == 0 else 0)
+        self.windows_seen += gap
+        self.window = window
+        self.counts = {metric: 0 for metric in METRICS}
+        self.alerted = set()
+
+
+class SpikeDetector:
+    """Détecteur de pics partagé par le processus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[Tuple[int, ReasonType], SeriesState] = {}
+
+    def _restore(self, db: Session, entity_id: int, reason: ReasonType, window: datetime) -> SeriesState:
+        """Reconstruire l'état d'un couple à partir des dernières fenêtres agrégées"""
+        rows = db.query(MentionRollup).filter(
+            MentionRollup.entity_id == entity_id,
+            MentionRollup.reason == reason,
+            MentionRollup.bucket_start > window - SPIKE_HISTORY_WINDOWS * ROLLUP_WINDOW,
+            MentionRollup.bucket_start <= window
+        ).order_by(MentionRollup.bucket_start).all()
+
+        state = SeriesState(rows[0].bucket_start if rows else window)
+        for row in rows:
+            state.advance(row.bucket_start)
+            state.counts = {VOLUME: row.mention_count, NEGATIVE: row.negative_count}
+            state.alerted = {metric for metric in METRICS if getattr(row, f"{metric}_spike")}
+        return state
+
+    def observe(self, db: Session, mentions: List[Mention]) -> List[Dict]:
+        """
+        Prendre en compte des mentions ingérées (avant la mise à jour des agrégats
+        de la transaction en cours). Retourne les pics détectés:
+        {key, metric, mention, count, mean, zscore}
+        """
+        spikes = []
+        reported = set()
+        touched = db.info.setdefault("spike_detector_keys", set())
+        with self._lock:
+            for key, mention in sorted(((rollup_key(m), m) for m in mentions), key=lambda item: item[0][2]):
+                entity_id, reason, window = key
+                state = self._states.get((entity_id, reason))
+                if state is None:
+                    state = self._states[(entity_id, reason)] = self._restore(db, entity_id, reason, window)
+                touched.add((entity_id, reason))
+                if window < state.window:
+                    # Mention tardive: comptée dans les agrégats, pas dans la détection
+                    continue
+                state.advance(window)
+
+                state.counts[VOLUME] += 1
+                if mention.sentiment == SentimentType.NEGATIVE:
+                    state.counts[NEGATIVE] += 1
+                if state.windows_seen < SPIKE_MIN_WINDOWS:
+                    continue
+                for metric in METRICS:
+                    count = state.counts[metric]
+                    if metric in state.alerted or (key, metric) in reported or count < SPIKE_MIN_COUNT:
+                        continue
+                    zscore = state.stats[metric].zscore(count)
+                    if zscore >= SPIKE_Z_THRESHOLD:
+                        reported.add((key, metric))
+                        spikes.append({
+                            "key": key,
+                            "metric": metric,
+                            "mention": mention,
+                            "count": count,
+                            "mean": state.stats[metric].mean,
+                            "zscore": zscore,
+                        })
+        return spikes
+
+    def mark_alerted(self, spikes: List[Dict]):
+        """Noter des pics comme signalés (alertes créées) dans leur fenêtre"""
+        with self._lock:
+            for spike in spikes:
+                entity_id, reason, window = spike["key"]
+                state = self._states.get((entity_id, reason))
+                if state is not None and state.window == window:
+                    state.alerted.add(spike["metric"])
+
+    def forget_entity(self, entity_id: int):
+        """Oublier l'état de tous les couples d'une entité (entité supprimée)"""
+        self.forget([(entity_id, reason) for reason in ReasonType])
+
+    def forget(self, keys=None):
+        """Oublier l'état de couples (entity_id, raison), ou de tous: reconstruits au prochain usage"""
+        with self._lock:
+            if keys is None:
+                self._states.clear()
+            for key in keys or ():
+                self._states.pop(key, None)
+
+
+def create_spike_alerts(db: Session, spikes: List[Dict]) -> int:
+    """Créer les alertes de pic (rattachées à la mention déclenchante) et les noter dans les agrégats"""
+    if not spikes:
+        return 0
+    rows = []
+    for spike in spikes:
+        reason = spike["key"][1].value
+        label = "mentions négatives" if spike["metric"] == NEGATIVE else "mentions"
+        rows.append({
+            "mention_id": spike["mention"].id,
+            "entity_id": spike["key"][0],
+            "reason": spike["key"][1],
+            "severity": SPIKE_SEVERITY[spike["metric"]],
+            "kind": AlertKind.SPIKE.value,
+            "message": (
+                f"Pic de {label} ({reason}): {spike['count']} en {ROLLUP_WINDOW_MINUTES} min "
+                f"(moyenne {spike['mean']:.1f}, z={spike['zscore']:.1f})"
+            ),
+        })
+        logger.info(
+            f"Spike detected for entity {spike['key'][0]}, reason {reason}: "
+            f"{spike['metric']} {spike['count']} (z={spike['zscore']:.1f})"
+        )
+    insert_alerts(db, rows)
+    mark_spikes(db, [(spike["key"], spike["metric"]) for spike in spikes])
+    spike_detector.mark_alerted(spikes)
+    return len(rows)
+
+
+spike_detector = SpikeDetector()
+
+
+@event.listens_for(Session, "after_commit")
+def _release_keys(session: Session):
+    session.info.pop("spike_detector_keys", None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session: Session):
+    keys = session.info.pop("spike_detector_keys", None)
+    if keys:
+        spike_detector.forget(keys)
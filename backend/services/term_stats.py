@@ -0,0 +1,203 @@
+"""
+Statistiques de termes pour repérer les sujets émergents
+
+À l'ingestion, chaque mention est découpée en mots (texte normalisé: casse,
+accents) puis en paires de mots consécutifs, sans les mots vides; pour chaque
+entité et jour de publication, term_counts compte les mentions contenant
+chaque terme et term_days le nombre de mentions indexées. Les compteurs sont
+incrémentés dans la transaction de l'appelant (INSERT ... ON CONFLICT DO UPDATE).
+
+emerging_terms classe les termes par "lift": fréquence du terme dans la
+fenêtre récente rapportée à sa fréquence sur la période de référence qui la
+précède, à partir des seuls compteurs (le contenu des mentions n'est pas relu).
+"""
+import logging
+import re
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from database import dialect_insert
+from models import Mention, TermCount, TermDay
+from services.keyword_matcher import normalize_text, tokenize
+
+logger = logging.getLogger(__name__)
+
+MIN_TERM_LENGTH = 3
+MAX_TERM_LENGTH = 100
+# Nombre de lignes par INSERT multi-valeurs (limite de variables SQLite)
+_UPSERT_CHUNK_SIZE = 500
+_REBUILD_BATCH_SIZE = 5000
+# Lissage additif des fréquences: (mentions + α) / (total + 2α), sur les deux fenêtres
+TERM_SMOOTHING = 1.0
+_NUMBER = re.compile(r"^\d+$")
+
+STOPWORDS = frozenset("""
+    les des une dans par pour sur avec sans sous entre vers chez que qui quoi dont est sont etait ete
+    etre avoir ont avait aux ces cet cette mon mes ton tes son ses notre nos votre vos leur leurs
+    pas plus moins tres trop tout tous toute toutes rien elle elles ils nous vous lui meme aussi
+    mais donc car alors comme quand encore deja bien fait faire peu peut avec apres avant
+    the and for are was were been being have has had not but with without this that these those
+    from into onto about over under they them their there then than you your our ours his her its
+    what which who whom will would can could should just very too also only any all some more most
+    out off after before again when where why how does did doing
+""".split())
+
+TermKey = Tuple[int, date, str]
+
+
+def extract_terms(tokens: Iterable[str]) -> set:
+    """Termes distincts d'une mention (mots et paires de mots consécutifs), à partir de ses mots normalisés"""
+    words = [
+        word for word in tokens
+        if len(word) >= MIN_TERM_LENGTH and word not in STOPWORDS and not _NUMBER.match(word)
+    ]
+    terms = set(words)
+    terms.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+    return {term for term in terms if len(term) <= MAX_TERM_LENGTH}
+
+
+def _mention_terms(mention, pack=None) -> set:
+    if pack is not None:
+        tokens = pack.pipeline.analyze(mention.content).tokens
+    else:
+        tokens = tokenize(normalize_text(mention.content))
+    return extract_terms(tokens)
+
+
+def _count(mentions: Iterable, packs: Optional[Dict[int, object]] = None) -> Tuple[Dict[TermKey, int], Dict[Tuple[int, date], int]]:
+    terms: Counter = Counter()
+    days: Counter = Counter()
+    for mention in mentions:
+        day = mention.published_at.date()
+        days[(mention.entity_id, day)] += 1
+        pack = packs.get(mention.entity_id) if packs else None
+        for term in _mention_terms(mention, pack):
+            terms[(mention.entity_id, day, term)] += 1
+    return terms, days
+
+
+def _upsert(db: Session, model, rows: List[Dict], keys: List[str]):
+    table = model.__table__
+    for i in range(0, len(rows), _UPSERT_CHUNK_SIZE):
+        statement = dialect_insert(db, table).values(rows[i:i + _UPSERT_CHUNK_SIZE])
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[table.c[key] for key in keys],
+            set_={"mention_count": table.c.mention_count + statement.excluded.mention_count}
+        ))
+
+
+def update_term_counts(db: Session, mentions: Iterable[Mention], packs: Optional[Dict[int, object]] = None):
+    """
+    Ajouter de nouvelles mentions aux compteurs de termes (commit à la charge de l'appelant).
+    packs: {entity_id: pack} pour réutiliser les mots du pipeline de texte déjà calculés
+    """
+    terms, days = _count(mentions, packs)
+    if not days:
+        return
+    _upsert(db, TermCount, [
+        {"entity_id": entity_id, "day": day, "term": term, "mention_count": count}
+        for (entity_id, day, term), count in terms.items()
+    ], ["entity_id", "day", "term"])
+    _upsert(db, TermDay, [
+        {"entity_id": entity_id, "day": day, "mention_count": count}
+        for (entity_id, day), count in days.items()
+    ], ["entity_id", "day"])
+
+
+def rebuild_term_counts(db: Session, entity_id: Optional[int] = None) -> int:
+    """Recalculer les compteurs de termes à partir des mentions (toutes, ou d'une entité)"""
+    for model in (TermCount, TermDay):
+        query = db.query(model)
+        if entity_id is not None:
+            query = query.filter(model.entity_id == entity_id)
+        query.delete(synchronize_session=False)
+
+    query = db.query(Mention.id, Mention.entity_id, Mention.content, Mention.published_at).order_by(Mention.id)
+    if entity_id is not None:
+        query = query.filter(Mention.entity_id == entity_id)
+    count = 0
+    batch = []
+    for row in query.yield_per(_REBUILD_BATCH_SIZE):
+        batch.append(row)
+        if len(batch) >= _REBUILD_BATCH_SIZE:
+            update_term_counts(db, batch)
+            count += len(batch)
+            batch = []
+    update_term_counts(db, batch)
+    count += len(batch)
+    logger.info(f"Rebuilt term counts from {count} mention(s)")
+    return count
+
+
+def _smoothed_rate(count: int, docs: int) -> float:
+    return (count + TERM_SMOOTHING) / (docs + 2 * TERM_SMOOTHING)
+
+
+def emerging_terms(
+    db: Session,
+    entity_id: Optional[int] = None,
+    recent_days: int = 3,
+    baseline_days: int = 28,
+    min_count: int = 3,
+    limit: int = 20,
+    today: Optional[date] = None
+) -> Dict:
+    """
+    Termes dont la fréquence (part des mentions qui les contiennent) augmente le plus
+    dans les `recent_days` derniers jours par rapport aux `baseline_days` jours précédents.
+    lift = fréquence récente / fréquence de référence, toutes deux lissées de la même
+    façon ((n + α) / (N + 2α), α = TERM_SMOOTHING): un terme absent de la référence a
+    un lift élevé mais fini. Sans mention sur la période de référence, rien ne peut
+    être comparé: lift = 1 et les termes sont classés par nombre de mentions récentes.
+    Seuls les termes présents dans au moins `min_count` mentions récentes sont classés.
+    """
+    today = today or datetime.utcnow().date()
+    recent_start = today - timedelta(days=recent_days - 1)
+    baseline_start = recent_start - timedelta(days=baseline_days)
+
+    def scoped(query, model):
+        query = query.filter(model.day >= baseline_start, model.day <= today)
+        if entity_id is not None:
+            query = query.filter(model.entity_id == entity_id)
+        return query
+
+    recent_docs, baseline_docs = scoped(db.query(
+        func.coalesce(func.sum(case((TermDay.day >= recent_start, TermDay.mention_count), else_=0)), 0),
+        func.coalesce(func.sum(case((TermDay.day < recent_start, TermDay.mention_count), else_=0)), 0)
+    ), TermDay).one()
+
+    terms = []
+    if recent_docs:
+        recent = func.sum(case((TermCount.day >= recent_start, TermCount.mention_count), else_=0))
+        baseline = func.sum(case((TermCount.day < recent_start, TermCount.mention_count), else_=0))
+        for term, recent_count, baseline_count in scoped(
+            db.query(TermCount.term, recent, baseline), TermCount
+        ).group_by(TermCount.term).having(recent >= min_count):
+            if baseline_docs:
+                lift = _smoothed_rate(recent_count, recent_docs) / _smoothed_rate(baseline_count, baseline_docs)
+            else:
+                lift = 1.0
+            terms.append({
+                "term": term,
+                "recent_count": recent_count,
+                "baseline_count": baseline_count,
+                "recent_share": round(recent_count / recent_docs, 4),
+                "baseline_share": round(baseline_count / baseline_docs, 4) if baseline_docs else 0.0,
+                "lift": round(lift, 2),
+            })
+        terms.sort(key=lambda item: (item["lift"], item["recent_count"]), reverse=True)
+
+    return {
+        "entity_id": entity_id,
+        "recent_window": {"start": recent_start.isoformat(), "end": today.isoformat(), "mentions": recent_docs},
+        "baseline_window": {
+            "start": baseline_start.isoformat(),
+            "end": (recent_start - timedelta(days=1)).isoformat(),
+            "mentions": baseline_docs,
+        },
+        "terms": terms[:limit],
+    }
@@ -0,0 +1,139 @@
+"""
+Pipeline de texte partagé par toutes les analyses d'une mention
+
+Un texte est normalisé une seule fois (casse, Unicode, accents), puis
+parcouru une seule fois par un matcher compilé qui réunit tous les
+vocabulaires d'un pack de mots-clés: raisons, sentiment, mots critiques,
+problèmes spécifiques (solutions), négations. Le résultat (TextFeatures)
+est consommé par l'analyse de sentiment de repli, le classifieur de
+raisons, les alertes, l'extraction d'aspects et le générateur de solutions.
+
+Chaque vocabulaire garde ses propres suffixes de flexion: le matcher
+commun accepte l'union des suffixes, puis chaque occurrence n'est retenue
+que pour les vocabulaires qui tolèrent son suffixe.
+
+Les résultats sont mémorisés (LRU de TEXT_PIPELINE_CACHE_SIZE textes):
+les consommateurs successifs d'une même mention ne refont pas le passage.
+"""
+import os
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from services.keyword_matcher import KeywordMatcher, normalize_text, tokenize
+
+TEXT_PIPELINE_CACHE_SIZE = int(os.getenv("TEXT_PIPELINE_CACHE_SIZE", 4096))
+
+# Vocabulaires compilés par les packs de mots-clés
+REASON_VOCABULARY = "reason"
+SENTIMENT_VOCABULARY = "sentiment"
+CRITICAL_VOCABULARY = "critical"
+ISSUE_VOCABULARY = "issue"
+NEGATION_VOCABULARY = "negation"
+
+# Occurrence: (position dans le texte normalisé, mot-clé, étiquette)
+Occurrence = Tuple[int, str, Hashable]
+
+
+class TextFeatures:
+    """Texte normalisé et occurrences de mots-clés, par vocabulaire"""
+
+    __slots__ = ("text", "_occurrences", "_tokens")
+
+    def __init__(self, text: str, occurrences: Dict[str, List[Occurrence]]):
+        self.text = text
+        self._occurrences = occurrences
+        self._tokens: Optional[List[str]] = None
+
+    @property
+    def tokens(self) -> List[str]:
+        """Mots du texte normalisé (calculés à la demande)"""
+        if self._tokens is None:
+            self._tokens = tokenize(self.text)
+        return self._tokens
+
+    def occurrences(self, kind: str, start: int = 0, end: Optional[int] = None) -> List[Occurrence]:
+        """Occurrences d'un vocabulaire, éventuellement limitées à un intervalle du texte normalisé"""
+        found = self._occurrences.get(kind, [])
+        if not found or (start == 0 and end is None):
+            return found
+        # Occurrences triées par position: recherche dichotomique des bornes
+        low = bisect_left(found, (start,))
+        high = len(found) if end is None else bisect_left(found, (end,), low)
+        return found[low:high]
+
+    def labels(self, kind: str) -> List[Hashable]:
+        """Étiquettes distinctes trouvées pour un vocabulaire, dans l'ordre du texte"""
+        return list(dict.fromkeys(label for _, _, label in self._occurrences.get(kind, [])))
+
+    def has(self, kind: str) -> bool:
+        return bool(self._occurrences.get(kind))
+
+
+class TextPipeline:
+    """
+    Matcher unique compilé à partir de plusieurs vocabulaires.
+    vocabularies: {vocabulaire: ({étiquette: [mots-clés]}, suffixes de flexion tolérés)}
+    """
+
+    def __init__(
+        self,
+        vocabularies: Dict[str, Tuple[Dict[Hashable, Iterable[str]], str]],
+        cache_size: int = TEXT_PIPELINE_CACHE_SIZE
+    ):
+        lexicons: Dict[Tuple[str, Hashable], Iterable[str]] = {}
+        inflections: Dict[str, re.Pattern] = {}
+        for kind, (vocabulary, inflection) in vocabularies.items():
+            inflections[kind] = re.compile(inflection)
+            for label, keywords in vocabulary.items():
+                lexicons[(kind, label)] = keywords
+
+        union = "|".join(dict.fromkeys(pattern.pattern for pattern in inflections.values()))
+        self.matcher = KeywordMatcher(lexicons, inflection=f"(?:{union})")
+        self._inflections = inflections
+        # (vocabulaire, suffixe) -> suffixe toléré
+        self._accepts: Dict[Tuple[str, str], bool] = {}
+        # mot -> lectures (mot-clé, suffixe)
+        self._word_readings: Dict[str, List[Tuple[str, str]]] = {}
+        self.analyze = lru_cache(maxsize=cache_size)(self._analyze)
+
+    def _accepts_suffix(self, kind: str, suffix: str) -> bool:
+        accepted = self._accepts.get((kind, suffix))
+        if accepted is None:
+            accepted = self._accepts[(kind, suffix)] = self._inflections[kind].fullmatch(suffix) is not None
+        return accepted
+
+    def _readings(self, keyword: str, suffix: str) -> List[Tuple[str, str]]:
+        """
+        Lectures possibles d'un mot trouvé: (mot-clé, suffixe), du mot-clé le plus
+        long au plus court ("probleme" -> ("probleme", ""), ("problem", "e"))
+        """
+        word = keyword + suffix
+        readings = self._word_readings.get(word)
+        if readings is None:
+            readings = [(keyword, suffix)]
+            for end in range(len(word) - 1, 0, -1):
+                if end != len(keyword) and self.matcher.labels(word[:end]):
+                    readings.append((word[:end], word[end:]))
+            self._word_readings[word] = readings
+        return readings
+
+    def _analyze(self, text: str) -> TextFeatures:
+        """Normaliser et parcourir un texte une seule fois"""
+        normalized = normalize_text(text)
+        occurrences: Dict[str, List[Occurrence]] = {}
+        for position, keyword, suffix in self.matcher.scan(normalized):
+            readings = [(keyword, suffix)] if " " in keyword else self._readings(keyword, suffix)
+            # Pour chaque étiquette, le mot-clé le plus long dont le suffixe est
+            # toléré par son vocabulaire (comme le ferait un matcher séparé)
+            found = set()
+            for reading, reading_suffix in readings:
+                for kind, label in self.matcher.labels(reading):
+                    if (kind, label) not in found and self._accepts_suffix(kind, reading_suffix):
+                        found.add((kind, label))
+                        occurrences.setdefault(kind, []).append((position, reading, label))
+        return TextFeatures(normalized, occurrences)
+
+    def analyze_batch(self, texts: List[str]) -> List[TextFeatures]:
+        return [self.analyze(text or "") for text in texts]
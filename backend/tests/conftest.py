@@ -0,0 +1,14 @@
+"""
+Configuration commune des tests: base SQLite temporaire et analyse de sentiment
+par lexique (déterministe, sans Azure), fixées avant l'import des modules du backend
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='reputation-tests-')}/test.db"
+os.environ["SENTIMENT_BACKEND"] = "lexicon"
+
+# Ajouter le dossier backend au path Python
+sys.path.insert(0, str(Path(__file__).parent.parent))
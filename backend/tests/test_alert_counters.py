@@ -0,0 +1,45 @@
+"""
+Compteurs d'alertes: une base antérieure à alert_counters est réconciliée à la première lecture
+"""
+from datetime import datetime
+
+from database import Base, SessionLocal, engine
+from models import Alert, AlertCounter, Entity, Mention, SentimentType, SourceType
+from services import alert_counters
+from services.alert_counters import active_alerts_count
+from services.entity_data import purge_entity
+
+
+def test_empty_counters_are_reconciled_on_first_read(monkeypatch):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        entity = Entity(name="Compteurs", keywords='["compteurs"]')
+        db.add(entity)
+        db.flush()
+        mention = Mention(
+            entity_id=entity.id,
+            content="Service client injoignable",
+            source=SourceType.WEB,
+            sentiment=SentimentType.NEGATIVE,
+            sentiment_score=-0.5,
+            published_at=datetime.utcnow()
+        )
+        db.add(mention)
+        db.flush()
+        # Alertes écrites sans les compteurs (base antérieure à alert_counters)
+        db.add_all([
+            Alert(mention_id=mention.id, severity="high", message="Mention négative"),
+            Alert(mention_id=mention.id, severity="medium", message="Mention négative modérée"),
+        ])
+        db.query(AlertCounter).delete()
+        db.commit()
+        entity_id = entity.id
+
+        monkeypatch.setattr(alert_counters, "_counters_checked", False)
+        assert active_alerts_count(db, entity_id) == 2
+        assert active_alerts_count(db, entity_id, "high") == 1
+        purge_entity(db, entity_id)
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,21 @@
+"""
+Flux SSE des alertes: l'abonnement n'existe que pendant la lecture du flux
+"""
+import asyncio
+
+from routers.alerts import stream_alerts
+from services.event_bus import event_bus
+
+
+def test_stream_subscribes_only_while_iterated():
+    async def scenario():
+        response = await stream_alerts(request=None, entity_id=None, last_event_id=None, last_event_id_header=None)
+        # Client déconnecté avant le début du flux: aucun abonnement
+        assert event_bus._subscribers == []
+        events = response.body_iterator
+        assert (await events.__anext__()).startswith("retry:")
+        assert len(event_bus._subscribers) == 1
+        await events.aclose()
+        assert event_bus._subscribers == []
+
+    asyncio.run(scenario())
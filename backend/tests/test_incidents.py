@@ -0,0 +1,66 @@
+"""
+Incidents: compteurs d'alertes ouvertes mis à jour à la résolution d'une alerte
+(unitaire ou groupée), incident résolu avec sa dernière alerte ouverte
+"""
+from datetime import datetime
+
+from database import Base, SessionLocal, engine
+from models import Alert, Entity, Incident, Mention, ReasonType, SentimentType, SourceType
+from routers.alerts import resolve_alert
+from services.alert_triage import bulk_resolve
+from services.entity_data import purge_entity
+from services.incidents import insert_alerts
+
+
+def test_incident_follows_resolution_of_its_alerts():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        entity = Entity(name="Incidents", keywords='["incidents"]')
+        db.add(entity)
+        db.flush()
+        mentions = [
+            Mention(
+                entity_id=entity.id,
+                content=content,
+                source=SourceType.WEB,
+                sentiment=SentimentType.NEGATIVE,
+                sentiment_score=-0.8,
+                reason=ReasonType.PUNCTUALITY,
+                published_at=datetime.utcnow()
+            )
+            for content in ("Train en retard", "Encore un retard")
+        ]
+        db.add_all(mentions)
+        db.flush()
+        first_id, second_id = insert_alerts(db, [
+            {
+                "mention_id": mention.id,
+                "entity_id": entity.id,
+                "reason": ReasonType.PUNCTUALITY,
+                "severity": severity,
+                "message": "Mention négative",
+            }
+            for mention, severity in zip(mentions, ("high", "medium"))
+        ])
+        db.commit()
+        entity_id = entity.id
+        incident_id = db.get(Alert, first_id).incident_id
+        assert db.get(Alert, second_id).incident_id == incident_id
+
+        assert bulk_resolve(db, ids=[first_id]) == 1
+        db.commit()
+        incident = db.get(Incident, incident_id)
+        db.refresh(incident)
+        assert (incident.alert_count, incident.high_count, incident.medium_count) == (1, 0, 1)
+        assert not incident.is_resolved
+
+        resolve_alert(second_id, db)
+        db.refresh(incident)
+        assert incident.alert_count == 0
+        assert incident.is_resolved
+
+        purge_entity(db, entity_id)
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,185 @@
+"""
+Réanalyse des mentions: les alertes recalculées portent la nouvelle raison,
+les alertes devenues obsolètes disparaissent avec leurs prises en charge
+"""
+from datetime import datetime
+
+from database import Base, SessionLocal, engine
+from models import (
+    Alert, AlertAcknowledgement, AlertKind, AlertSolutionSignature, Entity, Incident, Mention,
+    ReasonType, SentimentType, SourceType
+)
+from services.entity_data import purge_entity
+from services.incidents import insert_alerts
+from services.reprocessing import MentionReprocessor
+from services.sentiment_analyzer import SentimentAnalyzer
+
+
+def test_reclassified_mention_alert_uses_new_reason():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        entity = Entity(name="SNCF", keywords='["sncf"]')
+        db.add(entity)
+        db.flush()
+        # Mention stockée avant la réanalyse: neutre, sans raison, sans alerte
+        mention = Mention(
+            entity_id=entity.id,
+            content="Train encore en retard de deux heures, horrible et inacceptable, je suis très déçu",
+            source=SourceType.WEB,
+            sentiment=SentimentType.NEUTRAL,
+            sentiment_score=0.0,
+            reason=ReasonType.OTHER,
+            published_at=datetime.utcnow()
+        )
+        db.add(mention)
+        db.commit()
+        mention_id = mention.id
+    finally:
+        db.close()
+
+    summary = MentionReprocessor(job_name="test", workers=1, analyzer=SentimentAnalyzer("lexicon")).run(reset=True)
+    assert summary["changed"] == 1
+
+    db = SessionLocal()
+    try:
+        assert db.get(Mention, mention_id).reason == ReasonType.PUNCTUALITY
+        alert = db.query(Alert).filter(Alert.mention_id == mention_id).one()
+        incident = db.get(Incident, alert.incident_id)
+        assert incident.reason == ReasonType.PUNCTUALITY
+        signature = db.get(AlertSolutionSignature, alert.id).signature
+        assert signature.startswith("punctuality|")
+    finally:
+        db.close()
+
+
+def test_obsolete_alert_is_deleted_with_its_acknowledgement():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        entity = Entity(name="Wifi", keywords='["wifi"]')
+        db.add(entity)
+        db.flush()
+        # Mention positive stockée à tort comme négative, avec une alerte prise en charge
+        mention = Mention(
+            entity_id=entity.id,
+            content="Contrôleur très aimable, voyage parfait et excellent. Merci !",
+            source=SourceType.WEB,
+            sentiment=SentimentType.NEGATIVE,
+            sentiment_score=-0.9,
+            reason=ReasonType.OTHER,
+            published_at=datetime.utcnow()
+        )
+        db.add(mention)
+        db.flush()
+        alert = Alert(mention_id=mention.id, severity="high", message="Mention négative")
+        db.add(alert)
+        db.flush()
+        db.add(AlertAcknowledgement(alert_id=alert.id, acknowledged_by="bob", acknowledged_at=datetime.utcnow()))
+        db.commit()
+        mention_id, alert_id = mention.id, alert.id
+    finally:
+        db.close()
+
+    MentionReprocessor(job_name="test-obsolete", workers=1, analyzer=SentimentAnalyzer("lexicon")).run(reset=True)
+
+    db = SessionLocal()
+    try:
+        assert db.get(Mention, mention_id).sentiment == SentimentType.POSITIVE
+        assert db.get(Alert, alert_id) is None
+        assert db.get(AlertAcknowledgement, alert_id) is None
+    finally:
+        db.close()
+
+
+def test_spike_alert_is_left_alone():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        entity = Entity(name="Pic", keywords='["pic"]')
+        db.add(entity)
+        db.flush()
+        # Mention déclenchante d'un pic, stockée à tort comme négative
+        mention = Mention(
+            entity_id=entity.id,
+            content="Contrôleur très aimable, voyage parfait et excellent. Merci !",
+            source=SourceType.WEB,
+            sentiment=SentimentType.NEGATIVE,
+            sentiment_score=-0.9,
+            reason=ReasonType.OTHER,
+            published_at=datetime.utcnow()
+        )
+        db.add(mention)
+        db.flush()
+        alert_id = insert_alerts(db, [{
+            "mention_id": mention.id,
+            "entity_id": entity.id,
+            "reason": ReasonType.OTHER,
+            "severity": "high",
+            "kind": AlertKind.SPIKE.value,
+            "message": "Pic de mentions négatives (other): 12 en 60 min (moyenne 2.0, z=5.0)",
+        }])[0]
+        db.commit()
+        entity_id, mention_id = entity.id, mention.id
+    finally:
+        db.close()
+
+    MentionReprocessor(
+        job_name="test-spike", entity_id=entity_id, workers=1, analyzer=SentimentAnalyzer("lexicon")
+    ).run(reset=True)
+
+    db = SessionLocal()
+    try:
+        assert db.get(Mention, mention_id).sentiment == SentimentType.POSITIVE
+        alert = db.get(Alert, alert_id)
+        assert alert is not None and not alert.is_resolved
+        incident = db.get(Incident, alert.incident_id)
+        assert incident.high_count == 1
+        purge_entity(db, entity_id)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_provided_reason_is_kept():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        entity = Entity(name="Livraison", keywords='["livraison"]')
+        db.add(entity)
+        db.flush()
+        # Mention de démonstration: raison fixée à l'import, sentiment à recalculer
+        mention = Mention(
+            entity_id=entity.id,
+            content="Train encore en retard de deux heures, horrible et inacceptable, je suis très déçu",
+            source=SourceType.WEB,
+            sentiment=SentimentType.NEUTRAL,
+            sentiment_score=0.0,
+            reason=ReasonType.DELIVERY,
+            reason_detail="Colis livré en retard",
+            reason_provided=True,
+            published_at=datetime.utcnow()
+        )
+        db.add(mention)
+        db.commit()
+        entity_id, mention_id = entity.id, mention.id
+    finally:
+        db.close()
+
+    MentionReprocessor(
+        job_name="test-provided", entity_id=entity_id, workers=1, analyzer=SentimentAnalyzer("lexicon")
+    ).run(reset=True)
+
+    db = SessionLocal()
+    try:
+        mention = db.get(Mention, mention_id)
+        assert mention.sentiment == SentimentType.NEGATIVE
+        assert mention.reason == ReasonType.DELIVERY
+        assert mention.reason_detail == "Colis livré en retard"
+        alert = db.query(Alert).filter(Alert.mention_id == mention_id).one()
+        incident = db.get(Incident, alert.incident_id)
+        assert incident.reason == ReasonType.DELIVERY
+        purge_entity(db, entity_id)
+        db.commit()
+    finally:
+        db.close()
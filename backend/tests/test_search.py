@@ -0,0 +1,65 @@
+"""
+Recherche plein texte: extraits surlignés sans HTML provenant du contenu,
+index créé à la première recherche
+"""
+from datetime import datetime
+
+from database import Base, SessionLocal, engine
+from models import Entity, Mention, SentimentType, SourceType
+from services import search
+from services.search import ensure_search_index, search_mentions
+
+
+def test_highlight_escapes_mention_content():
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    db = SessionLocal()
+    try:
+        entity = Entity(name="Recherche", keywords='["recherche"]')
+        db.add(entity)
+        db.flush()
+        db.add(Mention(
+            entity_id=entity.id,
+            content='Remboursement refusé <img src=x onerror="alert(1)"> & aucune réponse',
+            source=SourceType.WEB,
+            sentiment=SentimentType.NEGATIVE,
+            sentiment_score=-0.6,
+            published_at=datetime.utcnow()
+        ))
+        db.commit()
+
+        filtered = db.query(Mention).filter(Mention.entity_id == entity.id)
+        [(mention, rank, highlight)] = search_mentions(db, "remboursement", filtered)
+        assert highlight == (
+            "<mark>Remboursement</mark> refusé &lt;img src=x onerror=&quot;alert(1)&quot;&gt; "
+            "&amp; aucune réponse"
+        )
+    finally:
+        db.close()
+
+
+def test_first_search_creates_index():
+    Base.metadata.create_all(bind=engine)
+    # Processus sans lifespan (Vercel): l'index n'a pas été vérifié au démarrage
+    search._available.clear()
+    db = SessionLocal()
+    try:
+        entity = Entity(name="Préfixe", keywords='["prefixe"]')
+        db.add(entity)
+        db.flush()
+        db.add(Mention(
+            entity_id=entity.id,
+            content="Toujours aucun remboursement après trois semaines",
+            source=SourceType.WEB,
+            sentiment=SentimentType.NEGATIVE,
+            sentiment_score=-0.5,
+            published_at=datetime.utcnow()
+        ))
+        db.commit()
+
+        filtered = db.query(Mention).filter(Mention.entity_id == entity.id)
+        [(mention, rank, highlight)] = search_mentions(db, "rembours*", filtered)
+        assert rank is not None
+        assert highlight == "Toujours aucun <mark>remboursement</mark> après trois semaines"
+    finally:
+        db.close()
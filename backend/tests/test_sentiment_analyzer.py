@@ -0,0 +1,76 @@
+"""
+Choix du backend de sentiment: valeurs reconnues, lexique par défaut hors ligne,
+vocabulaire du pack appliqué par le backend local, repli d'Azure borné dans le temps
+"""
+import time
+
+import pytest
+
+from models import SentimentType
+from services import sentiment_analyzer as sentiment_module
+from services.keyword_packs import get_pack
+from services.sentiment_analyzer import SentimentAnalyzer, azure_breaker
+
+
+class SlowAzureClient:
+    """Client Azure qui ne répond qu'après `delay` secondes"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    def analyze_sentiment(self, documents, language):
+        self.calls += 1
+        time.sleep(self.delay)
+        raise RuntimeError("too late")
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="lexcon"):
+        SentimentAnalyzer("lexcon")
+
+
+def test_auto_without_azure_uses_lexicon(monkeypatch):
+    monkeypatch.delenv("AZURE_TEXT_ANALYTICS_KEY", raising=False)
+    monkeypatch.delenv("AZURE_TEXT_ANALYTICS_ENDPOINT", raising=False)
+    assert SentimentAnalyzer("auto").backend == "lexicon"
+    assert SentimentAnalyzer("local").backend == "local"
+
+
+def test_local_backend_applies_pack_vocabulary():
+    analyzer = SentimentAnalyzer("local")
+    text = "Encore une coupure réseau depuis ce matin"
+    # "coupure" n'est négatif que dans le pack telecom
+    [analysis] = analyzer.analyze_batch([text], "fr", get_pack("telecom"))
+    assert analysis["sentiment"] == SentimentType.NEGATIVE
+    assert analysis["backend"] == "local"
+
+
+def test_azure_call_is_bounded_by_latency_budget(monkeypatch):
+    monkeypatch.setattr(sentiment_module, "AZURE_LATENCY_BUDGET", 0.2)
+    analyzer = SentimentAnalyzer("lexicon")
+    analyzer.client = SlowAzureClient(delay=1.0)
+    try:
+        started = time.monotonic()
+        [analysis] = analyzer.analyze_batch(["Service horrible, très déçu"], "fr")
+        assert time.monotonic() - started < 0.6
+        assert analysis["sentiment"] == SentimentType.NEGATIVE
+        assert analysis["backend"] == "lexicon"
+        assert azure_breaker.snapshot()["failures"] == 1
+    finally:
+        azure_breaker.reset()
+
+
+def test_open_breaker_falls_back_to_lexicon():
+    # auto / azure: le repli d'Azure est le lexique, pas le modèle local (non chargé)
+    analyzer = SentimentAnalyzer("azure")
+    client = analyzer.client = SlowAzureClient(delay=0.0)
+    try:
+        for _ in range(azure_breaker.failure_threshold):
+            azure_breaker.record_failure(0.0, "unavailable")
+        [analysis] = analyzer.analyze_batch(["Encore une coupure réseau depuis ce matin"], "fr", get_pack("telecom"))
+        assert client.calls == 0
+        assert analysis["sentiment"] == SentimentType.NEGATIVE
+        assert analysis["backend"] == "lexicon"
+    finally:
+        azure_breaker.reset()
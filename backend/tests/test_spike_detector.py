@@ -0,0 +1,69 @@
+"""
+Détection des pics: un pic observé sans création d'alertes reste signalable,
+l'état d'une entité supprimée est oublié
+"""
+from datetime import datetime, timedelta
+
+from database import Base, SessionLocal, engine
+from models import Alert, Entity, Mention, MentionRollup, ReasonType, SentimentType, SourceType
+from services.entity_data import purge_entity
+from services.ingestion import on_mentions_ingested
+from services.spike_detector import spike_detector
+
+START = datetime(2026, 10, 1)
+
+
+def _ingest(db, entity_id, items, alerts=True):
+    mentions = [
+        Mention(
+            entity_id=entity_id,
+            content=content,
+            source=SourceType.WEB,
+            sentiment=sentiment,
+            sentiment_score=-0.3 if sentiment == SentimentType.NEGATIVE else 0.3,
+            reason=ReasonType.DELIVERY,
+            published_at=published_at
+        )
+        for content, sentiment, published_at in items
+    ]
+    db.add_all(mentions)
+    db.flush()
+    on_mentions_ingested(db, mentions, alerts=alerts)
+    db.commit()
+
+
+def _spike_alerts(db, entity_id):
+    return db.query(Alert).join(Mention).filter(
+        Mention.entity_id == entity_id, Alert.message.like("Pic de%")
+    ).count()
+
+
+def test_spike_without_alerts_is_reported_by_next_batch():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        entity = Entity(name="Livraison", keywords='["livraison"]')
+        db.add(entity)
+        db.commit()
+        entity_id = entity.id
+        for hour in range(24):
+            _ingest(db, entity_id, [
+                ("Livraison correcte", SentimentType.POSITIVE, START + timedelta(hours=hour, minutes=5)),
+                ("Livraison dans les temps", SentimentType.NEUTRAL, START + timedelta(hours=hour, minutes=20)),
+            ])
+        burst = START + timedelta(hours=24)
+        # Pic atteint par des mentions ajoutées sans création d'alertes (POST /api/mentions)
+        _ingest(db, entity_id, [
+            ("Colis perdu", SentimentType.NEGATIVE, burst + timedelta(minutes=minute)) for minute in range(6)
+        ], alerts=False)
+        assert _spike_alerts(db, entity_id) == 0
+
+        _ingest(db, entity_id, [("Colis perdu", SentimentType.NEGATIVE, burst + timedelta(minutes=30))])
+        assert _spike_alerts(db, entity_id) == 2
+
+        purge_entity(db, entity_id)
+        db.commit()
+        assert db.query(MentionRollup).filter(MentionRollup.entity_id == entity_id).count() == 0
+        assert (entity_id, ReasonType.DELIVERY) not in spike_detector._states
+    finally:
+        db.close()
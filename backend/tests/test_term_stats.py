@@ -0,0 +1,56 @@
+"""
+Termes émergents: lift lissé de la même façon sur les deux fenêtres
+"""
+from datetime import date, datetime, timedelta
+
+from database import Base, SessionLocal, engine
+from models import Entity, Mention
+from services.term_stats import emerging_terms, update_term_counts
+
+TODAY = date(2026, 10, 19)
+
+
+def _mentions(entity_id, content, days_ago, count):
+    published_at = datetime.combine(TODAY - timedelta(days=days_ago), datetime.min.time())
+    return [Mention(entity_id=entity_id, content=content, published_at=published_at) for _ in range(count)]
+
+
+def _lifts(db, entity_id):
+    result = emerging_terms(db, entity_id, min_count=1, limit=100, today=TODAY)
+    return {item["term"]: item["lift"] for item in result["terms"]}
+
+
+def test_new_entity_terms_have_neutral_lift():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        entity = Entity(name="Nouvelle entité", keywords='["nouvelle"]')
+        db.add(entity)
+        db.flush()
+        # Aucune mention sur la période de référence: rien à comparer
+        update_term_counts(db, _mentions(entity.id, "panne fibre", 0, 5))
+        update_term_counts(db, _mentions(entity.id, "service client", 0, 5))
+        lifts = _lifts(db, entity.id)
+        assert lifts["panne"] == 1.0
+        db.rollback()
+    finally:
+        db.close()
+
+
+def test_new_term_lift_exceeds_stable_term():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        entity = Entity(name="Référence", keywords='["reference"]')
+        db.add(entity)
+        db.flush()
+        update_term_counts(db, _mentions(entity.id, "wifi lent", 10, 50))
+        update_term_counts(db, _mentions(entity.id, "wifi lent", 0, 5))
+        update_term_counts(db, _mentions(entity.id, "wifi coupure", 1, 5))
+        lifts = _lifts(db, entity.id)
+        assert lifts["coupure"] > 1
+        assert lifts["coupure"] > lifts["wifi"]
+        assert abs(lifts["wifi"] - 1) < 0.1
+        db.rollback()
+    finally:
+        db.close()
@@ -0,0 +1,77 @@
+"""
+Script pour entraîner le modèle de sentiment local à partir des données d'exemple
+(notes des avis OnePlus et des entreprises d'exemple, alertes de démonstration,
+lexiques de l'analyse de repli).
+"""
+import csv
+import io
+from typing import List, Tuple
+
+from models import SentimentType
+from services.local_sentiment_model import DEFAULT_MODEL_PATH, LocalSentimentModel
+from services.sentiment_analyzer import POSITIVE_WORDS, NEGATIVE_WORDS
+
+
+def rating_to_label(rating_value: float) -> SentimentType:
+    if rating_value >= 3.5:
+        return SentimentType.POSITIVE
+    if rating_value >= 2.5:
+        return SentimentType.NEUTRAL
+    return SentimentType.NEGATIVE
+
+
+def build_training_set() -> Tuple[List[str], List[SentimentType]]:
+    """Assembler les textes annotés disponibles dans le dépôt"""
+    from import_oneplus_reviews import RAW_CSV
+    from import_sample_companies import SAMPLE_DATA
+    from seed_additional_alerts import SEED_ITEMS
+
+    texts: List[str] = []
+    labels: List[SentimentType] = []
+
+    for row in csv.DictReader(io.StringIO(RAW_CSV)):
+        try:
+            rating_value = float(row.get("rating", "").split()[0])
+        except (ValueError, IndexError):
+            continue
+        content = " ".join(filter(None, [row.get("Review-Title", "").strip(), row.get("Review-Body", "").strip()]))
+        if content:
+            texts.append(content)
+            labels.append(rating_to_label(rating_value))
+
+    for company in SAMPLE_DATA.values():
+        for review in company["reviews"]:
+            texts.append(review["content"])
+            labels.append(rating_to_label(review["rating"]))
+
+    for item in SEED_ITEMS:
+        for mention in item["mentions"]:
+            texts.append(mention["content"])
+            labels.append(SentimentType.NEGATIVE)
+
+    # Les lexiques de repli apportent un signal pour les textes en français
+    for word in POSITIVE_WORDS:
+        texts.append(word)
+        labels.append(SentimentType.POSITIVE)
+    for word in NEGATIVE_WORDS:
+        texts.append(word)
+        labels.append(SentimentType.NEGATIVE)
+
+    return texts, labels
+
+
+def train_model():
+    texts, labels = build_training_set()
+    print(f"Entraînement sur {len(texts)} textes annotés...")
+    model = LocalSentimentModel().fit(texts, labels)
+
+    predictions = [result["sentiment"] for result in model.predict(texts)]
+    accuracy = sum(1 for predicted, label in zip(predictions, labels) if predicted == label) / len(labels)
+    print(f"Précision sur l'ensemble d'entraînement : {accuracy:.1%}")
+
+    model.save(DEFAULT_MODEL_PATH)
+    print(f"✓ Modèle {model.version} enregistré : {DEFAULT_MODEL_PATH}")
+
+
+if __name__ == "__main__":
+    train_model()